@@ -0,0 +1,3 @@
+"""
+效能量測腳本
+"""
@@ -0,0 +1,68 @@
+"""
+歌詞批次匯入吞吐量
+
+作用：
+- 產生大量合成 .txt 歌詞（或使用指定目錄），以不同工作行程數批次匯入
+- 輸出每秒處理的檔案數（workers=1 為目前行程依序處理的基準）
+
+用法：
+    python -m benchmarks.bulk_import [--files 400] [--lines 40] [--workers 1 4] [--dir lyrics/]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+
+from pipeline.bulk_import import import_directory
+
+from .lrc_memory import build_sample_text
+
+# 去除 {假名} 標注（讓匯入時實際產生假名）
+RUBY_MARKUP_PATTERN = re.compile(r'\{[^}]*\}')
+
+
+def build_corpus(directory: str, files: int, lines: int):
+    """產生合成 .txt 歌詞檔"""
+    for index in range(files):
+        text = RUBY_MARKUP_PATTERN.sub('', build_sample_text(lines, seed=index))
+        with open(os.path.join(directory, f'song_{index:05d}.txt'), 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='歌詞批次匯入吞吐量')
+    arg_parser.add_argument('--files', type=int, default=400, help='合成檔案數')
+    arg_parser.add_argument('--lines', type=int, default=40, help='每個檔案的行數')
+    arg_parser.add_argument(
+        '--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1], help='比較的工作行程數'
+    )
+    arg_parser.add_argument('--no-ruby', action='store_true', help='不自動產生假名')
+    arg_parser.add_argument('--dir', help='改用指定的歌詞目錄')
+    args = arg_parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bulk_import_')
+    try:
+        source_dir = args.dir
+        if not source_dir:
+            source_dir = os.path.join(work_dir, 'source')
+            os.makedirs(source_dir)
+            build_corpus(source_dir, args.files, args.lines)
+
+        for workers in args.workers:
+            output_dir = os.path.join(work_dir, f'output_{workers}')
+            report = import_directory(
+                source_dir, output_dir, workers=workers, auto_ruby=not args.no_ruby
+            )
+            print(
+                f"workers={report.workers:<3} {len(report.results):6,} 檔  "
+                f"{report.wall_time:8.2f} 秒  {report.files_per_second:9.1f} 檔/秒  "
+                f"失敗 {len(report.failed)}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
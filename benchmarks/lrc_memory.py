@@ -0,0 +1,127 @@
+"""
+LRC 時間軸記憶體用量比較
+
+作用：
+- 產生（或讀取）歌詞，分別以 dataclass、精簡版（slots + intern + 共用假名）與欄式時間軸保存多份
+- 以 tracemalloc 量測每個詞平均佔用的位元組數
+
+用法：
+    python -m benchmarks.lrc_memory [--copies 200] [--lines 60] [--file song.lrc]
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from typing import Callable, List
+
+from core.lrc import LrcParser, LrcTimeline
+from core.lrc.compact import compact_timeline
+from core.lrc.encoding import read_text_file
+
+# 範例文字（漢字附假名）
+SAMPLE_WORDS = [
+    ('今日', 'きょう'),
+    ('空', 'そら'),
+    ('君', 'きみ'),
+    ('夢', 'ゆめ'),
+    ('歌', 'うた'),
+    ('心', 'こころ'),
+    ('の', ''),
+    ('が', ''),
+    ('を', ''),
+    ('に', ''),
+    ('と', ''),
+    ('て', ''),
+]
+
+
+def build_sample_text(lines: int, words_per_line: int = 10, seed: int = 0) -> str:
+    """產生 TXT 範例歌詞（每行一句，漢字以 {假名} 標注）"""
+    rng = random.Random(seed)
+    output = []
+    for _ in range(lines):
+        parts = []
+        for _ in range(words_per_line):
+            text, ruby = rng.choice(SAMPLE_WORDS)
+            parts.append(f"{text}{{{ruby}}}" if ruby else text)
+        output.append(''.join(parts))
+    return '\n'.join(output)
+
+
+def load_timeline(parser: LrcParser, content: str, is_lrc: bool) -> LrcTimeline:
+    """解析歌詞（TXT 依序配置每字 0.5 秒）"""
+    if is_lrc:
+        return parser.parse_string(content)
+    timeline = parser.parse_txt_string(content, auto_ruby=False)
+    time = 1.0
+    for line in timeline.lines:
+        for word in line.words:
+            word.start_time = time
+            word.end_time = time + 0.5
+            time += 0.5
+        time += 1.0
+    return timeline
+
+
+def measure(build: Callable[[], List[LrcTimeline]]) -> tuple:
+    """量測建立結果的記憶體（位元組, 詞數）"""
+    gc.collect()
+    tracemalloc.start()
+    timelines = build()
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    words = sum(len(line.words) for timeline in timelines for line in timeline.lines)
+    return current, words
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='LRC 時間軸記憶體用量比較')
+    arg_parser.add_argument('--copies', type=int, default=200, help='保存的時間軸份數')
+    arg_parser.add_argument('--lines', type=int, default=60, help='範例歌詞行數')
+    arg_parser.add_argument('--file', help='改用指定的 .lrc / .txt 檔案')
+    args = arg_parser.parse_args()
+
+    parser = LrcParser()
+    if args.file:
+        content = read_text_file(args.file)
+        is_lrc = args.file.lower().endswith('.lrc')
+    else:
+        content = build_sample_text(args.lines)
+        is_lrc = False
+
+    def load():
+        return load_timeline(parser, content, is_lrc)
+
+    def plain():
+        return [load() for _ in range(args.copies)]
+
+    def compact():
+        return [compact_timeline(load()) for _ in range(args.copies)]
+
+    variants = [('dataclass', plain), ('compact', compact)]
+    try:
+        from core.lrc.columnar import ColumnarTimeline
+
+        def columnar():
+            return [ColumnarTimeline.from_timeline(load()) for _ in range(args.copies)]
+
+        ColumnarTimeline()
+        variants.append(('columnar', columnar))
+    except ImportError:
+        print('numpy 未安裝，略過欄式時間軸')
+
+    baseline = None
+    for name, build in variants:
+        total, words = measure(build)
+        per_word = total / max(1, words)
+        baseline = baseline or per_word
+        print(
+            f"{name:<10} {words:>8} 詞  {total / 1024 / 1024:8.2f} MiB  "
+            f"{per_word:7.1f} B/詞  ({per_word / baseline:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
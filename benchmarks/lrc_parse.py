@@ -0,0 +1,140 @@
+"""
+LRC 解析吞吐量
+
+作用：
+- 產生大型合成 LRC（逐詞舊格式、增強格式、多時間標記），或讀取指定檔案
+- 分別量測標記化與完整解析（由檔案串流）的每秒行數與 MB/s
+- 以舊的逐行 re.match(字串樣式) + startswith 寫法作為標記化基準
+
+用法：
+    python -m benchmarks.lrc_parse [--lines 200000] [--repeat 3] [--file song.lrc]
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+from typing import Callable, List
+
+from core.lrc import LrcParser, LrcWriter
+from core.lrc.encoding import read_text_file
+from core.lrc.tokenizer import tokenize
+
+from .lrc_memory import build_sample_text, load_timeline
+
+
+def build_corpus(kind: str, lines: int, seed: int = 0) -> str:
+    """產生合成 LRC（kind：legacy / enhanced / repeated）"""
+    parser = LrcParser()
+    # 說明：每句 10 個詞，行數換算成句數
+    sentences = max(1, lines // 10) if kind == 'legacy' else lines
+    timeline = load_timeline(parser, build_sample_text(sentences, seed=seed), False)
+    if kind == 'legacy':
+        return LrcWriter(enhanced=False).to_string(timeline)
+    if kind == 'enhanced':
+        return LrcWriter().to_string(timeline)
+
+    rng = random.Random(seed)
+    output = []
+    for line in timeline.lines:
+        repeats = rng.randint(1, 3)
+        stamps = [line.start_time + rng.choice((0, 0, 60.0, 120.0)) for _ in range(repeats)]
+        tags = ''.join(f"[{int(t) // 60:02d}:{t % 60:06.3f}]" for t in stamps)
+        output.append(f"{tags}{line.text}")
+    return '\n'.join(output)
+
+
+def legacy_tokenize(lines) -> list:
+    """舊寫法：元資訊以 startswith 逐一判斷，歌詞行每次以字串樣式 re.match（只接受 [mm:ss.xx]）"""
+    tokens = []
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        if line.startswith('[ar:') and line.endswith(']'):
+            tokens.append(('artist', line[4:-1]))
+            continue
+        if line.startswith('[ti:') and line.endswith(']'):
+            tokens.append(('title', line[4:-1]))
+            continue
+        if line.startswith('[al:') and line.endswith(']'):
+            tokens.append(('album', line[4:-1]))
+            continue
+        if line.startswith('[offset:') and line.endswith(']'):
+            tokens.append(('offset', line[8:-1]))
+            continue
+        pattern = r'^\[(\d{2}):(\d{2})\.(\d{2})\](.*)$'
+        match = re.match(pattern, line)
+        if not match:
+            continue
+        minutes_str, seconds_str, centisecs_str, content = match.groups()
+        timestamp = int(minutes_str) * 60 + int(seconds_str) + int(centisecs_str) / 100.0
+        tokens.append((timestamp, content))
+    return tokens
+
+
+def measure(run: Callable[[], object], repeat: int) -> float:
+    """最佳執行時間（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def report(name: str, seconds: float, line_count: int, size: int):
+    print(
+        f"{name:<24} {seconds * 1000:9.1f} ms  {line_count / seconds:12,.0f} 行/秒  "
+        f"{size / seconds / 1024 / 1024:7.1f} MB/s"
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='LRC 解析吞吐量')
+    arg_parser.add_argument('--lines', type=int, default=200000, help='合成 LRC 行數')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='重複次數（取最佳）')
+    arg_parser.add_argument('--file', help='改用指定的 .lrc 檔案')
+    args = arg_parser.parse_args()
+
+    parser = LrcParser()
+    if args.file:
+        corpora = [(os.path.basename(args.file), read_text_file(args.file))]
+    else:
+        corpora = [
+            (kind, build_corpus(kind, args.lines))
+            for kind in ('legacy', 'enhanced', 'repeated')
+        ]
+
+    for name, content in corpora:
+        lines: List[str] = content.splitlines()
+        size = len(content.encode('utf-8'))
+        print(f"== {name}：{len(lines):,} 行，{size / 1024 / 1024:.1f} MB")
+
+        report(
+            'legacy re.match',
+            measure(lambda: legacy_tokenize(lines), args.repeat),
+            len(lines),
+            size,
+        )
+        report('tokenize', measure(lambda: list(tokenize(lines)), args.repeat), len(lines), size)
+
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.lrc', encoding='utf-8', delete=False
+        ) as handle:
+            handle.write(content)
+            path = handle.name
+        try:
+            def parse_file():
+                with open(path, 'r', encoding='utf-8') as file_handle:
+                    return parser.parse_stream(file_handle)
+
+            report('parse_stream（檔案）', measure(parse_file, args.repeat), len(lines), size)
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,23 @@ DEMUCS_MODEL = 'htdemucs'  # 4-track model
 # Video settings
 VIDEO_CODEC = 'libx264'
 AUDIO_CODEC = 'aac'
+MEDIA_CACHE_PATH = TEMP_DIR / 'media_cache.sqlite3'  # ffprobe 結果快取
+SEGMENT_CACHE_DIR = TEMP_DIR / 'segment_cache'  # 分段渲染快取
+SEGMENT_CACHE_MAX_BYTES = 4 * 1024 ** 3  # 分段快取容量上限（4GB）
+SEGMENT_LENGTH_SEC = 10.0  # 分段渲染的目標區段長度
+# GUI「分段增量輸出」選項的預設值（會寫入分段快取，預設開啟；設 BOOKARA_INCREMENTAL_RENDER=0 關閉）
+INCREMENTAL_RENDER = os.environ.get('BOOKARA_INCREMENTAL_RENDER', '1') != '0'
+RENDER_HISTORY_PATH = TEMP_DIR / 'render_history.sqlite3'  # 輸出耗時紀錄（預估時間用）
+PROXY_DIR = TEMP_DIR / 'proxies'  # 預覽與草稿用的低解析度代理檔
+PROXY_HEIGHT = 360  # 代理檔高度
+# 區網渲染節點（host:port，以逗號分隔；空白表示只在本機編碼）
+RENDER_FARM_WORKERS = [
+    endpoint.strip()
+    for endpoint in os.environ.get('BOOKARA_RENDER_FARM', '').split(',')
+    if endpoint.strip()
+]
+# 區網渲染節點的共用金鑰（節點以 --token 或同一環境變數設定）
+RENDER_FARM_TOKEN = os.environ.get('BOOKARA_RENDER_FARM_TOKEN', '')
 
 # LRC settings
 LRC_ENCODING = 'utf-8-sig'
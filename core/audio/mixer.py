@@ -2,23 +2,37 @@
 音訊混音工具
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+import os
 import subprocess
 
+from core.cancellation import CancellationToken, CancelledError
+
 
 class AudioMixer:
     """多軌混音"""
 
-    def mix_stems(
+    def build_mix_filter(
         self,
         stems: Dict[str, str],
         volumes: Optional[Dict[str, float]] = None,
-        output_path: Optional[str] = None,
-    ) -> Optional[str]:
-        """使用 FFmpeg 混音並輸出檔案"""
-        if not stems:
-            return None
+        input_offset: int = 0,
+        output_label: str = 'mix',
+        normalize: bool = True,
+    ) -> Tuple[List[str], str]:
+        """
+        建立混音濾鏡（可併入其他 FFmpeg 指令的濾鏡圖）
+
+        Args:
+            stems: 各軌路徑
+            volumes: 各軌音量（預設 1.0）
+            input_offset: 第一軌在整體指令中的輸入索引
+            output_label: 混音輸出標籤
+            normalize: 是否依軌數平均音量（False 時直接相加，還原分離前的響度）
 
+        Returns:
+            (輸入參數, 濾鏡字串)
+        """
         if volumes is None:
             volumes = {name: 1.0 for name in stems.keys()}
 
@@ -26,12 +40,33 @@ class AudioMixer:
         filter_parts = []
         mix_inputs = []
         for index, (stem_name, stem_path) in enumerate(stems.items()):
+            input_index = input_offset + index
             input_args.extend(['-i', stem_path])
             volume = volumes.get(stem_name, 1.0)
-            filter_parts.append(f"[{index}:a]volume={volume}[a{index}]")
-            mix_inputs.append(f"[a{index}]")
+            filter_parts.append(f"[{input_index}:a]volume={volume}[a{input_index}]")
+            mix_inputs.append(f"[a{input_index}]")
+
+        mix_options = f"inputs={len(stems)}"
+        if not normalize:
+            mix_options += ":normalize=0"
+        filter_graph = (
+            ";".join(filter_parts)
+            + f";{''.join(mix_inputs)}amix={mix_options}[{output_label}]"
+        )
+        return input_args, filter_graph
+
+    def mix_stems(
+        self,
+        stems: Dict[str, str],
+        volumes: Optional[Dict[str, float]] = None,
+        output_path: Optional[str] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[str]:
+        """使用 FFmpeg 混音並輸出檔案（取消時終止 FFmpeg、刪除未完成的檔案並拋出 CancelledError）"""
+        if not stems:
+            return None
 
-        filter_graph = ";".join(filter_parts) + f";{''.join(mix_inputs)}amix=inputs={len(stems)}[mix]"
+        input_args, filter_graph = self.build_mix_filter(stems, volumes)
         if not output_path:
             return None
 
@@ -45,17 +80,26 @@ class AudioMixer:
             output_path,
         ]
 
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
         try:
-            result = subprocess.run(
+            process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                check=False,
             )
-            if result.returncode != 0:
-                return None
+            unregister = cancel_token.on_cancel(process.terminate) if cancel_token else None
+            process.communicate()
+            if unregister:
+                unregister()
         except Exception:
             return None
 
+        if cancel_token and cancel_token.is_cancelled:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise CancelledError()
+        if process.returncode != 0:
+            return None
         return output_path
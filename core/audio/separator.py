@@ -9,11 +9,12 @@ Phase 1.1.2: 影片上傳與音源分離
 
 import os
 import logging
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 
 import config
+from core.cancellation import CancellationToken, CancelledError
 
 try:
     import librosa
@@ -30,6 +31,10 @@ except ImportError as e:
 
 logger = logging.getLogger(__name__)
 
+# 分段分離：每段長度與相鄰段交疊（秒，交疊處線性淡入淡出；有無取消旗標皆走同一路徑，結果一致）
+SEPARATION_CHUNK_SEC = 60.0
+SEPARATION_OVERLAP_SEC = 1.0
+
 
 class AudioSeparator:
     """音源分離器 - 產出音訊檔案"""
@@ -81,9 +86,21 @@ class AudioSeparator:
             return 'vocal'
         return source
 
-    def _separate_audio(self, audio: np.ndarray, sample_rate: int) -> Tuple[Dict[str, np.ndarray], int]:
-        """分離音源（使用已讀取音訊）"""
+    def _separate_audio(
+        self,
+        audio: np.ndarray,
+        sample_rate: int,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        分離音源（使用已讀取音訊）
+
+        一律分段執行（見 SEPARATION_CHUNK_SEC），結果與整段一次執行 apply_model
+        在段落接縫附近略有差異，但不因是否傳入 cancel_token 而不同。
+        """
         self._load_model()
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
 
         # 轉為 torch tensor（batch=1）
         audio_tensor = torch.from_numpy(audio).float().unsqueeze(0)  # 音訊張量
@@ -99,7 +116,7 @@ class AudioSeparator:
         # 執行分離
         logger.info("Starting separation...")
         with torch.no_grad():
-            stems_tensor = apply_model(self.model, audio_tensor)  # 分離結果張量
+            stems_tensor = self._apply_model_chunked(audio_tensor, target_sr, cancel_token)  # 分離結果張量
 
         # 轉為 numpy
         stems: Dict[str, np.ndarray] = {}  # stems 音源字典
@@ -113,12 +130,57 @@ class AudioSeparator:
         logger.info("Separation complete: stems=%s", list(stems.keys()))
         return stems, target_sr
 
-    def separate(self, video_path: str) -> Tuple[Dict[str, np.ndarray], int]:
+    def _apply_model_chunked(
+        self,
+        audio_tensor: 'torch.Tensor',
+        sample_rate: int,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> 'torch.Tensor':
+        """分段執行模型，段與段之間檢查取消（交疊處線性混合避免接縫）"""
+        total = audio_tensor.shape[-1]
+        chunk = int(SEPARATION_CHUNK_SEC * sample_rate)
+        overlap = int(SEPARATION_OVERLAP_SEC * sample_rate)
+        if total <= chunk:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            return apply_model(self.model, audio_tensor)
+
+        output = None  # 加權累加結果
+        weight = torch.zeros(total, device=audio_tensor.device)  # 各取樣點權重總和
+        start = 0
+        while start < total:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            end = min(total, start + chunk)
+            piece = apply_model(self.model, audio_tensor[..., start:end])
+            length = end - start
+            window = torch.ones(length, device=piece.device)
+            ramp = min(overlap, length)
+            if start > 0 and ramp > 0:
+                window[:ramp] = torch.linspace(0.0, 1.0, ramp, device=piece.device)
+            if end < total and ramp > 0:
+                window[-ramp:] = torch.linspace(1.0, 0.0, ramp, device=piece.device)
+            if output is None:
+                output = torch.zeros(piece.shape[:-1] + (total,), device=piece.device)
+            output[..., start:end] += piece * window
+            weight[start:end] += window
+            logger.info("Separation progress: %.0f%%", end / total * 100)
+            if end >= total:
+                break
+            start = end - overlap
+        return output / weight.clamp(min=1e-8)
+
+    def separate(
+        self,
+        video_path: str,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Tuple[Dict[str, np.ndarray], int]:
         """
         分離音源並回傳 stems
 
         Args:
             video_path: 影片檔案路徑
+            cancel_token: 取消旗標（模型分段之間檢查）
 
         Returns:
             (stems, sample_rate)
@@ -135,7 +197,7 @@ class AudioSeparator:
             sample_rate,
             audio.shape[-1] / sample_rate,
         )
-        return self._separate_audio(audio, sample_rate)
+        return self._separate_audio(audio, sample_rate, cancel_token)
 
     def _save_audio(self, audio: np.ndarray, sample_rate: int, output_path: str):
         """保存音訊檔案"""
@@ -173,17 +235,42 @@ class AudioSeparator:
 
         return stems_paths
 
-    def process_video(self, video_path: str, output_dir: str, output_options: dict) -> Dict[str, str]:
+    def process_video(
+        self,
+        video_path: str,
+        output_dir: str,
+        output_options: dict,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Dict[str, str]:
         """
         完整流程：分離並保存
 
         Args:
             video_path: 影片路徑
             output_dir: 輸出資料夾
+            cancel_token: 取消旗標（取消時刪除已寫出的檔案並拋出 CancelledError）
 
         Returns:
             stems_paths: 儲存路徑字典
         """
+        output_paths: Dict[str, str] = {}  # 輸出路徑
+        try:
+            return self._process_video(video_path, output_dir, output_options, output_paths, cancel_token)
+        except CancelledError:
+            for path in output_paths.values():
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+    def _process_video(
+        self,
+        video_path: str,
+        output_dir: str,
+        output_options: dict,
+        output_paths: Dict[str, str],
+        cancel_token: Optional[CancellationToken],
+    ) -> Dict[str, str]:
+        """完整流程本體（已寫出的檔案記錄於 output_paths）"""
         # 建立輸出資料夾
         os.makedirs(output_dir, exist_ok=True)
 
@@ -195,7 +282,8 @@ class AudioSeparator:
         original_audio, original_sr = self._load_audio(video_path)  # 原始音訊
 
         # 先處理 original.wav
-        output_paths: Dict[str, str] = {}  # 輸出路徑
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
         if output_options.get('original'):
             original_path = os.path.join(output_dir, 'original.wav')
             self._save_audio(original_audio, original_sr, original_path)
@@ -210,12 +298,14 @@ class AudioSeparator:
             return output_paths
 
         # 分離 stems
-        stems, sample_rate = self._separate_audio(original_audio, original_sr)
+        stems, sample_rate = self._separate_audio(original_audio, original_sr, cancel_token)
 
         # 儲存選擇的 stems
         stem_keys = ['vocal', 'drums', 'bass', 'other']
         for key in stem_keys:
             if output_options.get(key) and key in stems:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 output_path = os.path.join(output_dir, f"{key}.wav")
                 self._save_audio(stems[key], sample_rate, output_path)
                 output_paths[key] = output_path
@@ -230,6 +320,8 @@ class AudioSeparator:
                     else:
                         music_audio = music_audio + stems[key]
             if music_audio is not None:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 # 正規化防止爆音
                 max_val = np.max(np.abs(music_audio))
                 if max_val > 1.0:
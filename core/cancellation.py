@@ -0,0 +1,74 @@
+"""
+背景工作取消
+
+作用：
+- 提供可跨執行緒共用的取消旗標
+- 取消時立即執行已註冊的回呼（例如終止 FFmpeg 子行程）
+- 長時間迴圈在步驟之間呼叫 raise_if_cancelled() 中止
+"""
+
+import threading
+from typing import Callable, List
+
+
+class CancelledError(Exception):
+    """工作已被取消"""
+
+
+class CancellationToken:
+    """取消旗標"""
+
+    def __init__(self):
+        # 取消事件
+        self._event = threading.Event()
+        # 取消時執行的回呼
+        self._callbacks: List[Callable[[], None]] = []
+        # 回呼列表鎖
+        self._lock = threading.Lock()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """是否已取消"""
+        return self._event.is_set()
+
+    def cancel(self):
+        """要求取消（重複呼叫無作用）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def raise_if_cancelled(self):
+        """已取消時拋出 CancelledError"""
+        if self._event.is_set():
+            raise CancelledError()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        註冊取消回呼（已取消時立即執行）
+
+        Returns:
+            取消註冊的函式
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+
+        def unregister():
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return unregister
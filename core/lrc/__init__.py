@@ -2,10 +2,16 @@
 LRC 模組公開介面
 """
 
+from .columnar import ColumnarTimeline
+from .compact import CompactLine, CompactWord, compact_timeline
+from .events import TimelineChange
+from .history import EditJournal
+from .index import TimelineIndex
 from .model import LrcLine, LrcTimeline, LrcWord, RubyPair
 from .parser import LrcParser
 from .ruby_generator import RubyGenerator
 from .validator import LrcValidator, ValidationError
+from .word_index import FlatWordIndex
 from .writer import LrcWriter
 
 __all__ = [
@@ -13,6 +19,14 @@ __all__ = [
     'LrcWord',
     'LrcLine',
     'LrcTimeline',
+    'TimelineIndex',
+    'TimelineChange',
+    'FlatWordIndex',
+    'EditJournal',
+    'ColumnarTimeline',
+    'CompactWord',
+    'CompactLine',
+    'compact_timeline',
     'LrcParser',
     'RubyGenerator',
     'LrcValidator',
@@ -0,0 +1,532 @@
+"""
+欄式（columnar）時間軸
+
+作用：
+- 以連續的 numpy 陣列儲存所有詞的開始 / 結束時間，文字與假名存於字串表
+- 各行以 offsets 陣列表示詞範圍，平移 / 縮放 / 量化等批次操作可對整首或選取行向量化執行
+- 提供輕量的 LrcLine / LrcWord 視圖，維持 LrcParser、LrcWriter、LrcValidator 與 ASS 轉換器使用的介面
+- numpy 為選用相依套件（未安裝時無法建立欄式時間軸）
+"""
+
+from typing import Dict, Iterable, Iterator, List, MutableSequence, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .events import WORD_TIMES
+from .model import LrcLine, LrcTimeline, LrcWord, RubyPair
+
+# 無假名時的字串表索引
+NO_STRING = -1
+
+
+class ColumnarWord:
+    """詞視圖（讀寫直接對應欄式陣列）"""
+
+    __slots__ = ('_timeline', '_index')
+
+    def __init__(self, timeline: 'ColumnarTimeline', index: int):
+        # 所屬時間軸
+        self._timeline = timeline
+        # 全域詞索引
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._timeline._strings[self._timeline._text_ids[self._index]]
+
+    @text.setter
+    def text(self, value: str):
+        self._timeline._text_ids[self._index] = self._timeline._intern(value)
+
+    @property
+    def start_time(self) -> float:
+        return float(self._timeline._starts[self._index])
+
+    @start_time.setter
+    def start_time(self, value: float):
+        self._timeline._starts[self._index] = value
+
+    @property
+    def end_time(self) -> float:
+        return float(self._timeline._ends[self._index])
+
+    @end_time.setter
+    def end_time(self, value: float):
+        self._timeline._ends[self._index] = value
+
+    @property
+    def ruby_pair(self) -> Optional[RubyPair]:
+        timeline = self._timeline
+        ruby_id = timeline._ruby_ids[self._index]
+        if ruby_id == NO_STRING:
+            return None
+        kanji_id = timeline._kanji_ids[self._index]
+        return RubyPair(kanji=timeline._strings[kanji_id], ruby=timeline._strings[ruby_id])
+
+    @ruby_pair.setter
+    def ruby_pair(self, value: Optional[RubyPair]):
+        timeline = self._timeline
+        if value is None:
+            timeline._kanji_ids[self._index] = NO_STRING
+            timeline._ruby_ids[self._index] = NO_STRING
+            return
+        timeline._kanji_ids[self._index] = timeline._intern(value.kanji)
+        timeline._ruby_ids[self._index] = timeline._intern(value.ruby)
+
+    @property
+    def ruby_pending(self) -> bool:
+        return bool(self._timeline._pending[self._index])
+
+    @ruby_pending.setter
+    def ruby_pending(self, value: bool):
+        self._timeline._pending[self._index] = value
+
+    def to_word(self) -> LrcWord:
+        """轉為獨立的 LrcWord"""
+        return LrcWord(self.text, self.start_time, self.end_time, self.ruby_pair, self.ruby_pending)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ColumnarWord, LrcWord)):
+            return (
+                self.text == other.text
+                and self.start_time == other.start_time
+                and self.end_time == other.end_time
+                and self.ruby_pair == other.ruby_pair
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return (
+            f"ColumnarWord(text={self.text!r}, start_time={self.start_time}, "
+            f"end_time={self.end_time}, ruby_pair={self.ruby_pair!r})"
+        )
+
+
+class ColumnarWords(MutableSequence):
+    """一行的詞列表視圖（修改時整行重寫欄位，介面與 list 相同）"""
+
+    __slots__ = ('_timeline', '_line_idx')
+
+    def __init__(self, timeline: 'ColumnarTimeline', line_idx: int):
+        self._timeline = timeline
+        self._line_idx = line_idx
+
+    def _bounds(self):
+        offsets = self._timeline._offsets
+        return int(offsets[self._line_idx]), int(offsets[self._line_idx + 1])
+
+    def __len__(self) -> int:
+        begin, end = self._bounds()
+        return end - begin
+
+    def __getitem__(self, index):
+        begin, end = self._bounds()
+        if isinstance(index, slice):
+            return [ColumnarWord(self._timeline, i) for i in range(begin, end)[index]]
+        count = end - begin
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('word index out of range')
+        return ColumnarWord(self._timeline, begin + index)
+
+    def __iter__(self) -> Iterator[ColumnarWord]:
+        begin, end = self._bounds()
+        for i in range(begin, end):
+            yield ColumnarWord(self._timeline, i)
+
+    def __setitem__(self, index, value):
+        words = list(self)
+        words[index] = value
+        self._timeline._replace_line_words(self._line_idx, words)
+
+    def __delitem__(self, index):
+        words = list(self)
+        del words[index]
+        self._timeline._replace_line_words(self._line_idx, words)
+
+    def insert(self, index: int, value):
+        words = list(self)
+        words.insert(index, value)
+        self._timeline._replace_line_words(self._line_idx, words)
+
+
+class ColumnarLine:
+    """行視圖"""
+
+    __slots__ = ('_timeline', '_line_idx')
+
+    def __init__(self, timeline: 'ColumnarTimeline', line_idx: int):
+        # 所屬時間軸
+        self._timeline = timeline
+        # 行索引
+        self._line_idx = line_idx
+
+    @property
+    def words(self) -> ColumnarWords:
+        return ColumnarWords(self._timeline, self._line_idx)
+
+    @words.setter
+    def words(self, value: Iterable):
+        self._timeline._replace_line_words(self._line_idx, list(value))
+
+    @property
+    def group_id(self) -> str:
+        return self._timeline._group_ids[self._line_idx]
+
+    @property
+    def identity(self) -> object:
+        """行的識別物件（行插入 / 刪除後不變，視圖本身每次重新建立）"""
+        return self._timeline._line_keys[self._line_idx]
+
+    @group_id.setter
+    def group_id(self, value: str):
+        self._timeline._group_ids[self._line_idx] = value
+
+    @property
+    def text(self) -> str:
+        """整行純文字內容（不含假名）"""
+        timeline = self._timeline
+        begin, end = timeline._line_bounds(self._line_idx)
+        strings = timeline._strings
+        return ''.join(strings[i] for i in timeline._text_ids[begin:end])
+
+    @property
+    def ruby_pending(self) -> bool:
+        """是否有詞的假名尚未產生"""
+        begin, end = self._timeline._line_bounds(self._line_idx)
+        return bool(self._timeline._pending[begin:end].any())
+
+    @property
+    def start_time(self) -> float:
+        """這一行的開始時間"""
+        begin, end = self._timeline._line_bounds(self._line_idx)
+        return float(self._timeline._starts[begin]) if end > begin else 0.0
+
+    @property
+    def end_time(self) -> float:
+        """這一行的結束時間"""
+        begin, end = self._timeline._line_bounds(self._line_idx)
+        return float(self._timeline._ends[end - 1]) if end > begin else 0.0
+
+    def to_line(self) -> LrcLine:
+        """轉為獨立的 LrcLine"""
+        return LrcLine(words=[word.to_word() for word in self.words], group_id=self.group_id)
+
+
+class ColumnarLines(Sequence):
+    """行列表視圖"""
+
+    __slots__ = ('_timeline',)
+
+    def __init__(self, timeline: 'ColumnarTimeline'):
+        self._timeline = timeline
+
+    def __len__(self) -> int:
+        return len(self._timeline._group_ids)
+
+    def __getitem__(self, index):
+        count = len(self)
+        if isinstance(index, slice):
+            return [ColumnarLine(self._timeline, i) for i in range(count)[index]]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('line index out of range')
+        return ColumnarLine(self._timeline, index)
+
+    def __iter__(self) -> Iterator[ColumnarLine]:
+        for i in range(len(self)):
+            yield ColumnarLine(self._timeline, i)
+
+    def insert(self, index: int, line):
+        self._timeline.insert_line(index, line)
+
+    def append(self, line):
+        self._timeline.add_line(line)
+
+    def pop(self, index: int = -1) -> LrcLine:
+        line = self[index].to_line()
+        self._timeline.remove_line(index)
+        return line
+
+
+class ColumnarTimeline(LrcTimeline):
+    """以 numpy 陣列儲存的時間軸（介面與 LrcTimeline 相同）"""
+
+    def __init__(self):
+        if np is None:
+            raise ImportError('ColumnarTimeline requires numpy')
+        # 說明：LrcTimeline.__init__ 設定 lines = [] 時建立空的欄位陣列
+        super().__init__()
+
+    @classmethod
+    def from_timeline(cls, timeline: LrcTimeline) -> 'ColumnarTimeline':
+        """由一般時間軸建立（一次配置所有陣列）"""
+        columnar = cls()
+        columnar.offset = timeline.offset
+        columnar.metadata = dict(timeline.metadata)
+        columnar.lines = timeline.lines
+        return columnar
+
+    def to_timeline(self) -> LrcTimeline:
+        """轉回一般時間軸（LrcLine / LrcWord 物件）"""
+        timeline = LrcTimeline()
+        timeline.offset = self.offset
+        timeline.metadata = dict(self.metadata)
+        for line in self.lines:
+            timeline.lines.append(line.to_line())
+        return timeline
+
+    @property
+    def lines(self) -> ColumnarLines:
+        """行列表視圖"""
+        return ColumnarLines(self)
+
+    @lines.setter
+    def lines(self, lines: Iterable):
+        """以行列表（LrcLine 或相容物件）取代全部內容（一次配置所有陣列）"""
+        # 說明：先轉成純值，傳入的可能是本時間軸的視圖
+        values = [
+            (
+                line.group_id,
+                [
+                    (word.start_time, word.end_time, word.text, word.ruby_pair, word.ruby_pending)
+                    for word in line.words
+                ],
+            )
+            for line in lines
+        ]
+        # 字串表與反查表（文字、漢字、假名共用）
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        starts, ends, text_ids, kanji_ids, ruby_ids, pending = [], [], [], [], [], []
+        counts = []
+        for _group_id, words in values:
+            counts.append(len(words))
+            for start_time, end_time, text, ruby_pair, ruby_pending in words:
+                pending.append(ruby_pending)
+                starts.append(start_time)
+                ends.append(end_time)
+                text_ids.append(self._intern(text))
+                if ruby_pair is None:
+                    kanji_ids.append(NO_STRING)
+                    ruby_ids.append(NO_STRING)
+                else:
+                    kanji_ids.append(self._intern(ruby_pair.kanji))
+                    ruby_ids.append(self._intern(ruby_pair.ruby))
+        # 詞欄位
+        self._starts = np.array(starts, dtype=np.float64)
+        self._ends = np.array(ends, dtype=np.float64)
+        self._text_ids = np.array(text_ids, dtype=np.int32)
+        self._kanji_ids = np.array(kanji_ids, dtype=np.int32)
+        self._ruby_ids = np.array(ruby_ids, dtype=np.int32)
+        # 假名等待背景產生（延遲產生假名時使用）
+        self._pending = np.array(pending, dtype=np.bool_)
+        # 行 i 的詞範圍為 offsets[i]:offsets[i + 1]
+        self._offsets = np.concatenate(([0], np.cumsum(counts, dtype=np.int64)))
+        # 各行顏色群組
+        self._group_ids: List[str] = [group_id for group_id, _words in values]
+        # 各行識別物件（背景假名工作以此找回行）
+        self._line_keys: List[object] = [object() for _values in values]
+
+    @property
+    def word_count(self) -> int:
+        """總詞數"""
+        return len(self._starts)
+
+    @property
+    def nbytes(self) -> int:
+        """欄位陣列佔用的位元組數（不含字串表，實際用量見 benchmarks.lrc_memory）"""
+        return sum(
+            array.nbytes
+            for array in (
+                self._starts,
+                self._ends,
+                self._text_ids,
+                self._kanji_ids,
+                self._ruby_ids,
+                self._pending,
+                self._offsets,
+            )
+        )
+
+    def _insert_line(self, index: int, line) -> LrcLine:
+        """插入行（不記錄），回傳插入內容的獨立副本"""
+        # 說明：先複製成 LrcLine，插入的行可能是本時間軸的視圖
+        copied = LrcLine(
+            words=[
+                LrcWord(w.text, w.start_time, w.end_time, w.ruby_pair, w.ruby_pending)
+                for w in line.words
+            ],
+            group_id=line.group_id,
+        )
+        position = int(self._offsets[index])
+        self._offsets = np.insert(self._offsets, index + 1, position)
+        self._group_ids.insert(index, copied.group_id)
+        self._line_keys.insert(index, object())
+        self._replace_line_words(index, copied.words)
+        return copied
+
+    def _remove_line(self, index: int) -> LrcLine:
+        """刪除行並回傳被刪除的行（不記錄）"""
+        if not 0 <= index < len(self._group_ids):
+            raise IndexError('line index out of range')
+        removed = ColumnarLine(self, index).to_line()
+        self._replace_line_words(index, [])
+        self._offsets = np.delete(self._offsets, index + 1)
+        del self._group_ids[index]
+        del self._line_keys[index]
+        return removed
+
+    def line_starts(self) -> 'np.ndarray':
+        """各行開始時間（空行為 NaN）"""
+        return self._line_reduce(self._starts, first=True)
+
+    def line_ends(self) -> 'np.ndarray':
+        """各行結束時間（空行為 NaN）"""
+        return self._line_reduce(self._ends, first=False)
+
+    def line_of_words(self) -> 'np.ndarray':
+        """每個詞所屬的行索引"""
+        counts = np.diff(self._offsets)
+        return np.repeat(np.arange(len(counts)), counts)
+
+    def shift_times(self, seconds: float, lines: Optional[Sequence[int]] = None):
+        """平移指定行（預設全部）所有詞的時間"""
+        words = self._word_selection(lines)
+        self._starts[words] += seconds
+        self._ends[words] += seconds
+        self._notify_times(lines)
+
+    def scale_times(
+        self,
+        factor: float,
+        anchor: float = 0.0,
+        lines: Optional[Sequence[int]] = None,
+    ):
+        """以 anchor 為中心縮放指定行的時間"""
+        words = self._word_selection(lines)
+        self._starts[words] = anchor + (self._starts[words] - anchor) * factor
+        self._ends[words] = anchor + (self._ends[words] - anchor) * factor
+        self._notify_times(lines)
+
+    def quantize_times(
+        self,
+        step: float,
+        origin: float = 0.0,
+        lines: Optional[Sequence[int]] = None,
+    ):
+        """將指定行的時間對齊到 origin + step 的整數倍（結束時間至少晚於開始一格）"""
+        if step <= 0:
+            return
+        words = self._word_selection(lines)
+        starts = origin + np.round((self._starts[words] - origin) / step) * step
+        ends = origin + np.round((self._ends[words] - origin) / step) * step
+        self._starts[words] = starts
+        self._ends[words] = np.maximum(ends, starts + step)
+        self._notify_times(lines)
+
+    def clamp_times(self, minimum: float = 0.0, lines: Optional[Sequence[int]] = None):
+        """將指定行的時間夾在 minimum 以上"""
+        words = self._word_selection(lines)
+        self._starts[words] = np.maximum(self._starts[words], minimum)
+        self._ends[words] = np.maximum(self._ends[words], minimum)
+        self._notify_times(lines)
+
+    def words_at(self, times) -> 'np.ndarray':
+        """
+        批次查詢多個時間點正在播放的詞（全域詞索引，無則為 -1）
+
+        詞需依開始時間排序（一般歌詞皆是如此）。
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if not len(self._starts):
+            return np.full(times.shape, -1, dtype=np.int64)
+        positions = np.searchsorted(self._starts, times, side='right') - 1
+        clipped = np.clip(positions, 0, None)
+        valid = (positions >= 0) & (self._ends[clipped] > times)
+        return np.where(valid, positions, -1)
+
+    def _intern(self, value: str) -> int:
+        """字串表索引（相同字串共用一筆）"""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def _line_bounds(self, line_idx: int):
+        """行的詞範圍"""
+        return int(self._offsets[line_idx]), int(self._offsets[line_idx + 1])
+
+    def _word_selection(self, lines: Optional[Sequence[int]]):
+        """行索引對應的詞索引（None 表示全部）"""
+        if lines is None:
+            return slice(None)
+        lines = np.unique(np.asarray(list(lines), dtype=np.int64))
+        lines = lines[(lines >= 0) & (lines < len(self._group_ids))]
+        begins = self._offsets[lines]
+        counts = self._offsets[lines + 1] - begins
+        # 說明：每行的詞索引 = 該行起點 + 行內序號，以 repeat + arange 一次展開
+        bases = np.repeat(begins - np.cumsum(counts) + counts, counts)
+        return bases + np.arange(int(counts.sum()), dtype=np.int64)
+
+    def _notify_times(self, lines: Optional[Sequence[int]]):
+        """發出選取行（None 表示全部）的詞時間變更通知"""
+        if lines is None:
+            self.notify(WORD_TIMES)
+            return
+        lines = [line_idx for line_idx in lines if 0 <= line_idx < len(self._group_ids)]
+        if lines:
+            self.notify(WORD_TIMES, min(lines), max(lines) + 1)
+
+    def _line_reduce(self, values, first: bool) -> 'np.ndarray':
+        """各行第一個（或最後一個）詞的欄位值（空行為 NaN）"""
+        counts = np.diff(self._offsets)
+        result = np.full(len(counts), np.nan)
+        non_empty = counts > 0
+        if not len(values):
+            return result
+        if first:
+            result[non_empty] = values[self._offsets[:-1][non_empty]]
+        else:
+            result[non_empty] = values[self._offsets[1:][non_empty] - 1]
+        return result
+
+    def _replace_line_words(self, line_idx: int, words: List) -> List[LrcWord]:
+        """替換整行詞列表並回傳舊詞（LrcWord 副本，不記錄）"""
+        begin, end = self._line_bounds(line_idx)
+        old = [ColumnarWord(self, i).to_word() for i in range(begin, end)]
+        # 說明：先轉成純值，避免新詞是本時間軸的視圖時被刪除後讀錯位置
+        values = [
+            (word.start_time, word.end_time, word.text, word.ruby_pair, word.ruby_pending)
+            for word in words
+        ]
+        starts = np.array([value[0] for value in values], dtype=np.float64)
+        ends = np.array([value[1] for value in values], dtype=np.float64)
+        text_ids = np.array([self._intern(value[2]) for value in values], dtype=np.int32)
+        kanji_ids = np.array(
+            [NO_STRING if value[3] is None else self._intern(value[3].kanji) for value in values],
+            dtype=np.int32,
+        )
+        ruby_ids = np.array(
+            [NO_STRING if value[3] is None else self._intern(value[3].ruby) for value in values],
+            dtype=np.int32,
+        )
+        pending = np.array([value[4] for value in values], dtype=np.bool_)
+        self._starts = np.concatenate((self._starts[:begin], starts, self._starts[end:]))
+        self._ends = np.concatenate((self._ends[:begin], ends, self._ends[end:]))
+        self._text_ids = np.concatenate((self._text_ids[:begin], text_ids, self._text_ids[end:]))
+        self._kanji_ids = np.concatenate(
+            (self._kanji_ids[:begin], kanji_ids, self._kanji_ids[end:])
+        )
+        self._ruby_ids = np.concatenate((self._ruby_ids[:begin], ruby_ids, self._ruby_ids[end:]))
+        self._pending = np.concatenate((self._pending[:begin], pending, self._pending[end:]))
+        self._offsets[line_idx + 1:] += len(values) - (end - begin)
+        self.invalidate_index()
+        return old
@@ -0,0 +1,153 @@
+"""
+精簡記憶體的 LRC 資料結構
+
+作用：
+- 以 __slots__ 取代每個物件的 __dict__
+- 文字與假名字串以 sys.intern 共用
+- 相同的漢字 / 假名組合共用同一個不可變的假名物件
+- 介面與 LrcWord / LrcLine / RubyPair 相同，可直接放入 LrcTimeline
+"""
+
+import sys
+from functools import lru_cache
+from typing import List, Optional
+
+from .model import LrcTimeline
+
+# 共用假名物件的快取上限
+RUBY_POOL_SIZE = 65536
+
+
+class SharedRubyPair:
+    """不可變的漢字與假名對應（由 shared_ruby_pair 取得共用實例）"""
+
+    __slots__ = ('kanji', 'ruby')
+
+    def __init__(self, kanji: str, ruby: str):
+        object.__setattr__(self, 'kanji', sys.intern(kanji))
+        object.__setattr__(self, 'ruby', sys.intern(ruby))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SharedRubyPair is immutable')
+
+    def __eq__(self, other) -> bool:
+        if hasattr(other, 'kanji') and hasattr(other, 'ruby'):
+            return self.kanji == other.kanji and self.ruby == other.ruby
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.kanji, self.ruby))
+
+    def __repr__(self) -> str:
+        return f"SharedRubyPair(kanji={self.kanji!r}, ruby={self.ruby!r})"
+
+
+@lru_cache(maxsize=RUBY_POOL_SIZE)
+def shared_ruby_pair(kanji: str, ruby: str) -> SharedRubyPair:
+    """取得共用的假名物件（相同組合回傳同一實例）"""
+    return SharedRubyPair(kanji, ruby)
+
+
+class CompactWord:
+    """精簡版 LrcWord"""
+
+    __slots__ = ('text', 'start_time', 'end_time', 'ruby_pair', 'ruby_pending')
+
+    def __init__(
+        self,
+        text: str,
+        start_time: float,
+        end_time: float,
+        ruby_pair=None,
+        ruby_pending: bool = False,
+    ):
+        # 文字內容（intern）
+        self.text = sys.intern(text)
+        # 開始 / 結束時間（秒）
+        self.start_time = start_time
+        self.end_time = end_time
+        # 假名對應（共用實例，可為空）
+        self.ruby_pair = (
+            shared_ruby_pair(ruby_pair.kanji, ruby_pair.ruby) if ruby_pair is not None else None
+        )
+        # 假名等待背景產生
+        self.ruby_pending = ruby_pending
+
+    @classmethod
+    def from_word(cls, word) -> 'CompactWord':
+        """由 LrcWord（或相容物件）建立"""
+        return cls(word.text, word.start_time, word.end_time, word.ruby_pair, word.ruby_pending)
+
+    def __eq__(self, other) -> bool:
+        if all(hasattr(other, name) for name in ('text', 'start_time', 'end_time', 'ruby_pair')):
+            return (
+                self.text == other.text
+                and self.start_time == other.start_time
+                and self.end_time == other.end_time
+                and self.ruby_pair == other.ruby_pair
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return (
+            f"CompactWord(text={self.text!r}, start_time={self.start_time}, "
+            f"end_time={self.end_time}, ruby_pair={self.ruby_pair!r})"
+        )
+
+
+class CompactLine:
+    """精簡版 LrcLine"""
+
+    __slots__ = ('words', 'group_id')
+
+    def __init__(self, words: Optional[List[CompactWord]] = None, group_id: str = 'A'):
+        # 詞列表
+        self.words = words if words is not None else []
+        # 顏色群組（intern）
+        self.group_id = sys.intern(group_id)
+
+    @classmethod
+    def from_line(cls, line) -> 'CompactLine':
+        """由 LrcLine（或相容物件）建立"""
+        return cls([CompactWord.from_word(word) for word in line.words], line.group_id)
+
+    @property
+    def text(self) -> str:
+        """整行純文字內容（不含假名）"""
+        return ''.join(word.text for word in self.words)
+
+    @property
+    def ruby_pending(self) -> bool:
+        """是否有詞的假名尚未產生"""
+        return any(word.ruby_pending for word in self.words)
+
+    @property
+    def start_time(self) -> float:
+        """這一行的開始時間"""
+        if not self.words:
+            return 0.0
+        return self.words[0].start_time
+
+    @property
+    def end_time(self) -> float:
+        """這一行的結束時間"""
+        if not self.words:
+            return 0.0
+        return self.words[-1].end_time
+
+    def __eq__(self, other) -> bool:
+        if hasattr(other, 'words') and hasattr(other, 'group_id'):
+            return self.group_id == other.group_id and list(self.words) == list(other.words)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactLine(words={self.words!r}, group_id={self.group_id!r})"
+
+
+def compact_timeline(timeline: LrcTimeline) -> LrcTimeline:
+    """建立精簡版時間軸（行與詞改為 CompactLine / CompactWord）"""
+    compact = LrcTimeline()
+    compact.offset = timeline.offset
+    compact.metadata = dict(timeline.metadata)
+    compact.lines = [CompactLine.from_line(line) for line in timeline.lines]
+    return compact
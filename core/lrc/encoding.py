@@ -0,0 +1,254 @@
+"""
+歌詞文字檔編碼判斷
+
+作用：
+- 檔案只讀取一次，由位元組判斷編碼後只解碼一次
+- 依序判斷 BOM（UTF-8 / UTF-16 / UTF-32）、UTF-8（嚴格解碼成功即直接使用結果）
+- 非 UTF-8 時依位元組結構為 Shift_JIS（cp932）、EUC-JP、GBK、Big5（cp950）評分：
+  不合法序列越少越好；日文編碼另計全形假名數量（日文歌詞假名比例高，中文幾乎沒有）；
+  沒有假名時比較各編碼「常用字區」的比例（JIS 第一水準、GB2312、Big5 常用字）
+- 結構相同的編碼（例如只有漢字的 EUC-JP 與 GBK）無法可靠區分，差距過小或有不合法序列時記錄警告
+"""
+
+import codecs
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# BOM 與對應編碼（UTF-32 需先於 UTF-16 判斷）
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# 評分時最多檢查的位元組數
+SNIFF_BYTES = 64 * 1024
+# 假名佔多位元組字元的最低比例（達到時視為日文）
+KANA_RATIO = 0.1
+# 無法判斷時的編碼（以替代字元解碼）
+FALLBACK_ENCODING = 'utf-8'
+# 常用字比例差距低於此值時視為無法確定（記錄警告）
+CONFIDENCE_MARGIN = 0.1
+
+
+@dataclass
+class ByteScan:
+    """位元組結構檢查結果"""
+
+    invalid: int = 0  # 不合法序列數
+    multibyte: int = 0  # 多位元組字元數
+    kana: int = 0  # 全形平假名 / 片假名數
+    common: int = 0  # 落在該編碼常用字區的字元數（符號、假名、常用漢字）
+
+    @property
+    def common_ratio(self) -> float:
+        """常用字佔多位元組字元的比例"""
+        return self.common / self.multibyte if self.multibyte else 0.0
+
+
+def read_text_file(file_path: str) -> str:
+    """讀取文字檔（讀取一次、判斷編碼、解碼一次）"""
+    with open(file_path, 'rb') as file_handle:
+        data = file_handle.read()
+    text, encoding = decode_bytes(data, source=file_path)
+    logger.debug("%s 以 %s 解碼", file_path, encoding)
+    return text
+
+
+def decode_bytes(data: bytes, source: str = '') -> Tuple[str, str]:
+    """
+    判斷編碼並解碼
+
+    Args:
+        source: 記錄警告時顯示的來源（檔案路徑）
+
+    Returns:
+        (文字, 編碼名稱)
+    """
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return data.decode(encoding, errors='replace'), encoding
+    try:
+        # 說明：UTF-8 最常見，嚴格解碼成功時結果直接使用，不需再解碼
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    encoding, margin = guess_legacy_encoding(data[:SNIFF_BYTES])
+    text = data.decode(encoding, errors='replace')
+    label = source or '<bytes>'
+    if '\ufffd' in text:
+        logger.warning("%s: undecodable bytes replaced while decoding as %s", label, encoding)
+    elif margin < CONFIDENCE_MARGIN:
+        logger.warning("%s: ambiguous encoding, using %s (margin %.2f)", label, encoding, margin)
+    return text, encoding
+
+
+def detect_legacy_encoding(data: bytes) -> str:
+    """判斷非 UTF-8 位元組的編碼（cp932 / euc_jp / gbk / cp950）"""
+    return guess_legacy_encoding(data)[0]
+
+
+def guess_legacy_encoding(data: bytes) -> Tuple[str, float]:
+    """
+    判斷非 UTF-8 位元組的編碼
+
+    Returns:
+        (編碼名稱, 信心差距)；差距為最佳與次佳候選常用字比例的差（以假名判斷為日文時為 1.0）
+    """
+    scans: Dict[str, ByteScan] = {
+        'cp932': scan_shift_jis(data),
+        'euc_jp': scan_euc_jp(data),
+        'gbk': scan_gbk(data),
+        'cp950': scan_big5(data),
+    }
+    fewest_invalid = min(scan.invalid for scan in scans.values())
+    # 說明：日文編碼以（不合法少、假名多）取最佳；假名比例夠高且不比其他編碼更不合法時直接採用
+    japanese = min(('cp932', 'euc_jp'), key=lambda name: (scans[name].invalid, -scans[name].kana))
+    best_japanese = scans[japanese]
+    if (
+        best_japanese.multibyte
+        and best_japanese.kana >= best_japanese.multibyte * KANA_RATIO
+        and best_japanese.invalid <= fewest_invalid
+    ):
+        return japanese, 1.0
+
+    # 說明：其餘依（不合法少、常用字比例高）排序；中文編碼結構相近，常用字區是主要差異
+    ranked: List[Tuple[str, ByteScan]] = sorted(
+        ((name, scan) for name, scan in scans.items() if scan.multibyte),
+        key=lambda item: (item[1].invalid, -item[1].common_ratio),
+    )
+    if not ranked:
+        return FALLBACK_ENCODING, 1.0
+    name, best = ranked[0]
+    rivals = [scan for _name, scan in ranked[1:] if scan.invalid == best.invalid]
+    margin = best.common_ratio - max((scan.common_ratio for scan in rivals), default=0.0)
+    return name, margin
+
+
+def scan_shift_jis(data: bytes) -> ByteScan:
+    """以 Shift_JIS（cp932）結構檢查位元組"""
+    scan = ByteScan()
+    index = 0
+    size = len(data)
+    while index < size:
+        lead = data[index]
+        if lead < 0x80 or 0xA1 <= lead <= 0xDF:
+            # ASCII 或半形片假名
+            index += 1
+            continue
+        if 0x81 <= lead <= 0x9F or 0xE0 <= lead <= 0xFC:
+            if index + 1 >= size:
+                break
+            trail = data[index + 1]
+            if 0x40 <= trail <= 0xFC and trail != 0x7F:
+                scan.multibyte += 1
+                if (lead == 0x82 and 0x9F <= trail <= 0xF1) or (lead == 0x83 and trail <= 0x96):
+                    scan.kana += 1
+                if lead <= 0x98:
+                    # 符號、假名與 JIS 第一水準漢字
+                    scan.common += 1
+                index += 2
+                continue
+        scan.invalid += 1
+        index += 1
+    return scan
+
+
+def scan_euc_jp(data: bytes) -> ByteScan:
+    """以 EUC-JP 結構檢查位元組"""
+    scan = ByteScan()
+    index = 0
+    size = len(data)
+    while index < size:
+        lead = data[index]
+        if lead < 0x80:
+            index += 1
+            continue
+        if lead == 0x8E:
+            # 半形片假名
+            if index + 1 >= size:
+                break
+            if 0xA1 <= data[index + 1] <= 0xDF:
+                scan.multibyte += 1
+                index += 2
+                continue
+        elif lead == 0x8F:
+            # JIS X 0212 補助漢字（3 位元組）
+            if index + 2 >= size:
+                break
+            if 0xA1 <= data[index + 1] <= 0xFE and 0xA1 <= data[index + 2] <= 0xFE:
+                scan.multibyte += 1
+                index += 3
+                continue
+        elif 0xA1 <= lead <= 0xFE:
+            if index + 1 >= size:
+                break
+            trail = data[index + 1]
+            if 0xA1 <= trail <= 0xFE:
+                scan.multibyte += 1
+                if lead in (0xA4, 0xA5) and trail <= 0xF6:
+                    scan.kana += 1
+                if lead <= 0xCF:
+                    # 符號、假名與 JIS 第一水準漢字
+                    scan.common += 1
+                index += 2
+                continue
+        scan.invalid += 1
+        index += 1
+    return scan
+
+
+def scan_gbk(data: bytes) -> ByteScan:
+    """以 GBK 結構檢查位元組（不計假名）"""
+    scan = ByteScan()
+    index = 0
+    size = len(data)
+    while index < size:
+        lead = data[index]
+        if lead < 0x80:
+            index += 1
+            continue
+        if 0x81 <= lead <= 0xFE:
+            if index + 1 >= size:
+                break
+            trail = data[index + 1]
+            if 0x40 <= trail <= 0xFE and trail != 0x7F:
+                scan.multibyte += 1
+                if lead <= 0xD7 and trail >= 0xA1:
+                    # GB2312 符號與一級漢字
+                    scan.common += 1
+                index += 2
+                continue
+        scan.invalid += 1
+        index += 1
+    return scan
+
+
+def scan_big5(data: bytes) -> ByteScan:
+    """以 Big5（cp950）結構檢查位元組（不計假名）"""
+    scan = ByteScan()
+    index = 0
+    size = len(data)
+    while index < size:
+        lead = data[index]
+        if lead < 0x80:
+            index += 1
+            continue
+        if 0x81 <= lead <= 0xFE:
+            if index + 1 >= size:
+                break
+            trail = data[index + 1]
+            if 0x40 <= trail <= 0x7E or 0xA1 <= trail <= 0xFE:
+                scan.multibyte += 1
+                if 0xA1 <= lead <= 0xC6:
+                    # 符號與常用國字
+                    scan.common += 1
+                index += 2
+                continue
+        scan.invalid += 1
+        index += 1
+    return scan
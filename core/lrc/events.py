@@ -0,0 +1,101 @@
+"""
+時間軸變更通知
+
+作用：
+- 定義時間軸變更事件（行插入 / 刪除 / 替換 / 內容更新、詞時間變更）與受影響的行範圍
+- 提供依行快取的輔助類別，訂閱變更後只讓受影響的行失效，插入 / 刪除時同步位移
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Tuple
+
+# 插入行（start:stop 為插入後的位置）
+LINES_INSERTED = 'lines_inserted'
+# 刪除行（start:stop 為刪除前的位置）
+LINES_REMOVED = 'lines_removed'
+# 整行詞列表替換（詞數可能改變）
+LINES_REPLACED = 'lines_replaced'
+# 文字 / 假名 / 群組變更（詞數與時間不變）
+LINES_UPDATED = 'lines_updated'
+# 詞時間變更
+WORD_TIMES = 'word_times'
+# 整份時間軸重設（所有快取失效）
+RESET = 'reset'
+
+# 會改變行或詞結構的事件
+STRUCTURAL_KINDS = (LINES_INSERTED, LINES_REMOVED, LINES_REPLACED, RESET)
+
+
+@dataclass(frozen=True)
+class TimelineChange:
+    """時間軸變更事件"""
+
+    kind: str  # 事件類型
+    start: int = 0  # 受影響行範圍起點
+    stop: int = 0  # 受影響行範圍終點（不含）
+    words: Optional[Tuple[Tuple[int, int], ...]] = None  # 時間變更的詞（None 表示範圍內所有詞）
+
+    @property
+    def structural(self) -> bool:
+        """是否改變行或詞結構（詞位置需重新計算）"""
+        return self.kind in STRUCTURAL_KINDS
+
+    @property
+    def lines(self) -> range:
+        """受影響的行索引"""
+        return range(self.start, self.stop)
+
+
+# 快取未計算的標記
+_MISSING = object()
+
+
+class LineCache:
+    """依行快取計算結果（訂閱時間軸變更，只讓受影響的行失效）"""
+
+    def __init__(self, timeline=None):
+        # 訂閱中的時間軸
+        self.timeline = None
+        # 各行快取值
+        self._values: List[Any] = []
+        if timeline is not None:
+            self.attach(timeline)
+
+    def attach(self, timeline):
+        """改為快取指定時間軸"""
+        self.detach()
+        self.timeline = timeline
+        self._values = [_MISSING] * len(timeline.lines)
+        timeline.subscribe(self._on_change)
+
+    def detach(self):
+        """取消訂閱並清空快取"""
+        if self.timeline is not None:
+            self.timeline.unsubscribe(self._on_change)
+        self.timeline = None
+        self._values = []
+
+    def get(self, line_idx: int, compute: Callable[[Any], Any]) -> Any:
+        """取得行的快取值（未快取時以 compute(line) 計算）"""
+        lines = self.timeline.lines
+        if len(self._values) != len(lines):
+            # 說明：有人直接修改 lines 而未通知時，全部重新計算
+            self._values = [_MISSING] * len(lines)
+        value = self._values[line_idx]
+        if value is _MISSING:
+            value = compute(lines[line_idx])
+            self._values[line_idx] = value
+        return value
+
+    def _on_change(self, change: TimelineChange):
+        """依變更事件讓快取失效或位移"""
+        if change.kind == LINES_INSERTED:
+            self._values[change.start:change.start] = [_MISSING] * (change.stop - change.start)
+        elif change.kind == LINES_REMOVED:
+            del self._values[change.start:change.stop]
+        elif change.kind == RESET:
+            self._values = [_MISSING] * len(self.timeline.lines)
+        else:
+            for line_idx in change.lines:
+                if line_idx < len(self._values):
+                    self._values[line_idx] = _MISSING
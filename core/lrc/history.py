@@ -0,0 +1,382 @@
+"""
+時間軸編輯紀錄（復原 / 重做）
+
+作用：
+- 記錄每次編輯的差異（詞時間、整行詞替換、行插入 / 刪除、群組、假名、文字），不保存整份快照
+- 一組編輯可合併為一個步驟；連續的打點標記在時間間隔內合併為同一步驟
+- 同一步驟內重複修改同一個詞的時間只保留最初與最後的值
+- 以步驟數與差異總量限制記憶體，超過時捨棄最舊的步驟
+"""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+# 預設保留步驟數
+DEFAULT_MAX_STEPS = 200
+# 預設差異總量上限（約等於詞數）
+DEFAULT_MAX_COST = 200_000
+# 預設合併間隔（秒）
+DEFAULT_COALESCE_WINDOW = 3.0
+
+
+class WordTimeDelta:
+    """單一詞時間變更"""
+
+    __slots__ = ('line_idx', 'word_idx', 'old', 'new')
+
+    def __init__(
+        self,
+        line_idx: int,
+        word_idx: int,
+        old: Tuple[float, float],
+        new: Tuple[float, float],
+    ):
+        self.line_idx = line_idx
+        self.word_idx = word_idx
+        self.old = old  # (開始, 結束)
+        self.new = new
+
+    cost = 1
+
+    def apply(self, timeline):
+        timeline.update_word_time(self.line_idx, self.word_idx, *self.new)
+
+    def revert(self, timeline):
+        timeline.update_word_time(self.line_idx, self.word_idx, *self.old)
+
+
+class WordTimesDelta:
+    """多個詞時間變更（批次調整）"""
+
+    __slots__ = ('refs', 'old', 'new')
+
+    def __init__(
+        self,
+        refs: List[Tuple[int, int]],
+        old: List[Tuple[float, float]],
+        new: List[Tuple[float, float]],
+    ):
+        self.refs = refs  # (行索引, 詞索引)
+        self.old = old
+        self.new = new
+
+    @property
+    def cost(self) -> int:
+        return 1 + len(self.refs)
+
+    def apply(self, timeline):
+        timeline.set_word_times(self.refs, self.new)
+
+    def revert(self, timeline):
+        timeline.set_word_times(self.refs, self.old)
+
+
+class LineInsertDelta:
+    """插入一行"""
+
+    __slots__ = ('index', 'line')
+
+    def __init__(self, index: int, line):
+        self.index = index
+        self.line = line
+
+    @property
+    def cost(self) -> int:
+        return 1 + len(self.line.words)
+
+    def apply(self, timeline):
+        timeline.insert_line(self.index, self.line)
+
+    def revert(self, timeline):
+        timeline.remove_line(self.index)
+
+
+class LineRemoveDelta:
+    """刪除一行"""
+
+    __slots__ = ('index', 'line')
+
+    def __init__(self, index: int, line):
+        self.index = index
+        self.line = line
+
+    @property
+    def cost(self) -> int:
+        return 1 + len(self.line.words)
+
+    def apply(self, timeline):
+        timeline.remove_line(self.index)
+
+    def revert(self, timeline):
+        timeline.insert_line(self.index, self.line)
+
+
+class LineWordsDelta:
+    """整行詞列表替換（例如修改句子文字）"""
+
+    __slots__ = ('line_idx', 'old', 'new')
+
+    def __init__(self, line_idx: int, old: list, new: list):
+        self.line_idx = line_idx
+        self.old = old
+        self.new = new
+
+    @property
+    def cost(self) -> int:
+        return 1 + len(self.old) + len(self.new)
+
+    def apply(self, timeline):
+        timeline.replace_line_words(self.line_idx, self.new)
+
+    def revert(self, timeline):
+        timeline.replace_line_words(self.line_idx, self.old)
+
+
+class LineGroupDelta:
+    """行顏色群組變更"""
+
+    __slots__ = ('line_idx', 'old', 'new')
+
+    def __init__(self, line_idx: int, old: str, new: str):
+        self.line_idx = line_idx
+        self.old = old
+        self.new = new
+
+    cost = 1
+
+    def apply(self, timeline):
+        timeline.set_line_group(self.line_idx, self.new)
+
+    def revert(self, timeline):
+        timeline.set_line_group(self.line_idx, self.old)
+
+
+class WordRubyDelta:
+    """詞假名變更"""
+
+    __slots__ = ('line_idx', 'word_idx', 'old', 'new')
+
+    def __init__(self, line_idx: int, word_idx: int, old, new):
+        self.line_idx = line_idx
+        self.word_idx = word_idx
+        self.old = old
+        self.new = new
+
+    cost = 1
+
+    def apply(self, timeline):
+        timeline.set_word_ruby(self.line_idx, self.word_idx, self.new)
+
+    def revert(self, timeline):
+        timeline.set_word_ruby(self.line_idx, self.word_idx, self.old)
+
+
+class WordTextDelta:
+    """詞文字變更"""
+
+    __slots__ = ('line_idx', 'word_idx', 'old', 'new')
+
+    def __init__(self, line_idx: int, word_idx: int, old: str, new: str):
+        self.line_idx = line_idx
+        self.word_idx = word_idx
+        self.old = old
+        self.new = new
+
+    cost = 1
+
+    def apply(self, timeline):
+        timeline.set_word_text(self.line_idx, self.word_idx, self.new)
+
+    def revert(self, timeline):
+        timeline.set_word_text(self.line_idx, self.word_idx, self.old)
+
+
+class EditStep:
+    """一個復原步驟（一或多個差異）"""
+
+    __slots__ = ('label', 'merge_key', 'deltas', 'cost', 'updated_at', '_word_times')
+
+    def __init__(self, label: str, merge_key: Optional[str] = None):
+        # 顯示名稱
+        self.label = label
+        # 合併鍵（相同且在間隔內的步驟合併）
+        self.merge_key = merge_key
+        # 差異列表（依發生順序）
+        self.deltas: list = []
+        # 差異總量
+        self.cost = 0
+        # 最後更新時間
+        self.updated_at = time.monotonic()
+        # 本步驟內詞時間差異（行結構未變時可合併同一個詞）
+        self._word_times = {}
+
+    def add(self, delta):
+        """加入差異（同一個詞的時間變更合併為一筆）"""
+        self.updated_at = time.monotonic()
+        if isinstance(delta, WordTimeDelta):
+            key = (delta.line_idx, delta.word_idx)
+            existing = self._word_times.get(key)
+            if existing is not None:
+                existing.new = delta.new
+                return
+            self._word_times[key] = delta
+        else:
+            # 說明：其他變更之後再合併會打亂重做順序（行結構變更後索引也可能指向不同的詞）
+            self._word_times = {}
+        self.deltas.append(delta)
+        self.cost += delta.cost
+
+    def apply(self, timeline):
+        for delta in self.deltas:
+            delta.apply(timeline)
+
+    def revert(self, timeline):
+        for delta in reversed(self.deltas):
+            delta.revert(timeline)
+
+    def word_refs(self) -> List[Tuple[int, int]]:
+        """本步驟變更時間的詞位置（依發生順序）"""
+        refs = []
+        for delta in self.deltas:
+            if isinstance(delta, WordTimeDelta):
+                refs.append((delta.line_idx, delta.word_idx))
+            elif isinstance(delta, WordTimesDelta):
+                refs.extend(delta.refs)
+        return refs
+
+
+class EditJournal:
+    """時間軸編輯紀錄"""
+
+    def __init__(
+        self,
+        timeline,
+        max_steps: int = DEFAULT_MAX_STEPS,
+        max_cost: int = DEFAULT_MAX_COST,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+    ):
+        # 來源時間軸（掛上後其編輯方法會自動記錄）
+        self.timeline = timeline
+        timeline.journal = self
+        # 差異總量上限
+        self.max_cost = max_cost
+        # 合併間隔（秒）
+        self.coalesce_window = coalesce_window
+        # 復原 / 重做堆疊
+        self._undo: deque = deque(maxlen=max(1, max_steps))
+        self._redo: List[EditStep] = []
+        # 復原堆疊差異總量
+        self._cost = 0
+        # 進行中的群組
+        self._open_step: Optional[EditStep] = None
+        self._group_depth = 0
+        # 復原 / 重做執行中（不記錄）
+        self._replaying = False
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_label(self) -> str:
+        return self._undo[-1].label if self._undo else ''
+
+    def redo_label(self) -> str:
+        return self._redo[-1].label if self._redo else ''
+
+    def detach(self):
+        """停止記錄"""
+        if getattr(self.timeline, 'journal', None) is self:
+            self.timeline.journal = None
+
+    def clear(self):
+        """清空所有紀錄"""
+        self._undo.clear()
+        self._redo.clear()
+        self._cost = 0
+
+    def record(self, delta, label: str = '編輯'):
+        """記錄一筆差異（群組中加入群組步驟，否則自成一步）"""
+        if self._replaying:
+            return
+        self._redo.clear()
+        if self._open_step is not None:
+            self._open_step.add(delta)
+            return
+        step = EditStep(label)
+        step.add(delta)
+        self._push(step)
+
+    @contextmanager
+    def group(self, label: str, merge_key: Optional[str] = None) -> Iterator[None]:
+        """
+        區塊內的編輯合併為一步
+
+        Args:
+            merge_key: 與上一步相同且在合併間隔內時，直接併入上一步（例如連續打點）
+        """
+        if self._group_depth == 0:
+            previous = self._undo[-1] if self._undo else None
+            if (
+                merge_key is not None
+                and previous is not None
+                and previous.merge_key == merge_key
+                and not self._redo
+                and time.monotonic() - previous.updated_at <= self.coalesce_window
+            ):
+                self._undo.pop()
+                self._cost -= previous.cost
+                self._open_step = previous
+            else:
+                self._open_step = EditStep(label, merge_key)
+        self._group_depth += 1
+        try:
+            yield
+        finally:
+            self._group_depth -= 1
+            if self._group_depth == 0:
+                step, self._open_step = self._open_step, None
+                if step.deltas:
+                    self._push(step)
+
+    def undo(self) -> Optional[EditStep]:
+        """復原一步（回傳該步驟）"""
+        if not self._undo or self._group_depth:
+            return None
+        step = self._undo.pop()
+        self._cost -= step.cost
+        self._replaying = True
+        try:
+            step.revert(self.timeline)
+        finally:
+            self._replaying = False
+        self._redo.append(step)
+        return step
+
+    def redo(self) -> Optional[EditStep]:
+        """重做一步（回傳該步驟）"""
+        if not self._redo or self._group_depth:
+            return None
+        step = self._redo.pop()
+        self._replaying = True
+        try:
+            step.apply(self.timeline)
+        finally:
+            self._replaying = False
+        self._undo.append(step)
+        self._cost += step.cost
+        return step
+
+    def _push(self, step: EditStep):
+        """加入復原堆疊並維持上限"""
+        if len(self._undo) == self._undo.maxlen:
+            self._cost -= self._undo[0].cost
+        self._undo.append(step)
+        self._cost += step.cost
+        while self._cost > self.max_cost and len(self._undo) > 1:
+            self._cost -= self._undo.popleft().cost
@@ -0,0 +1,258 @@
+"""
+時間軸區間索引
+
+作用：
+- 將所有詞依開始時間排序，建立開始/結束時間陣列
+- 以 bisect 在 O(log n) 內查詢目前的詞、行、範圍內的詞與前後邊界
+- 詞時間變更時可局部修補，結構變更時整體失效後再延遲重建
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import List, Optional, Tuple
+
+from .events import LINES_UPDATED, WORD_TIMES, TimelineChange
+from .model import LrcTimeline, LrcWord
+
+# 詞位置（行索引, 詞索引）
+WordRef = Tuple[int, int]
+
+# 詞時間變更通知中逐一修補的詞數上限（超過時整體重建較快）
+PATCH_LIMIT = 32
+
+
+class TimelineIndex:
+    """時間軸查詢索引"""
+
+    def __init__(self, timeline: LrcTimeline):
+        # 來源時間軸
+        self.timeline = timeline
+        # 依開始時間排序的詞位置
+        self._refs: List[WordRef] = []
+        # 詞位置 -> 排序陣列索引
+        self._positions = {}
+        # 對應的開始 / 結束時間
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        # 結束時間前綴最大值（單調遞增，可 bisect 找出仍未結束的最早候選）
+        self._max_ends: List[float] = []
+        # 各行（非空行）依開始時間排序
+        self._line_refs: List[int] = []
+        self._line_positions = {}
+        self._line_starts: List[float] = []
+        self._line_ends: List[float] = []
+        self._line_max_ends: List[float] = []
+        # 所有開始 / 結束時間（排序，可重複）
+        self._boundaries: List[float] = []
+        # 是否需要重建
+        self._dirty = True
+
+    def invalidate(self):
+        """標記索引失效（下次查詢時重建）"""
+        self._dirty = True
+
+    def apply_change(self, change: TimelineChange):
+        """依時間軸變更通知修補或失效"""
+        if self._dirty or change.kind == LINES_UPDATED:
+            return
+        if (
+            change.kind == WORD_TIMES
+            and change.words is not None
+            and len(change.words) <= PATCH_LIMIT
+        ):
+            for line_idx, word_idx in change.words:
+                if not self.update_word(line_idx, word_idx):
+                    return
+            return
+        self.invalidate()
+
+    def update_word(self, line_idx: int, word_idx: int) -> bool:
+        """
+        修補單一詞的時間（詞數與排序位置不變時就地更新）
+
+        Returns:
+            是否成功就地修補（否則改為整體失效）
+        """
+        if self._dirty:
+            return False
+        try:
+            word = self.timeline.lines[line_idx].words[word_idx]
+        except IndexError:
+            self.invalidate()
+            return False
+        ref = (line_idx, word_idx)
+        pos = self._positions.get(ref)
+        if pos is None or word.start_time is None or word.end_time is None:
+            self.invalidate()
+            return False
+        previous_start = self._starts[pos - 1] if pos > 0 else float('-inf')
+        next_start = self._starts[pos + 1] if pos + 1 < len(self._starts) else float('inf')
+        if not previous_start <= word.start_time <= next_start:
+            self.invalidate()
+            return False
+
+        _replace_sorted(self._boundaries, self._starts[pos], word.start_time)
+        _replace_sorted(self._boundaries, self._ends[pos], word.end_time)
+        self._starts[pos] = word.start_time
+        self._ends[pos] = word.end_time
+        _update_running_max(self._ends, self._max_ends, pos)
+
+        line = self.timeline.lines[line_idx]
+        line_pos = self._line_positions.get(line_idx)
+        previous_line = self._line_starts[line_pos - 1] if line_pos else float('-inf')
+        next_line = (
+            self._line_starts[line_pos + 1]
+            if line_pos is not None and line_pos + 1 < len(self._line_starts)
+            else float('inf')
+        )
+        if line_pos is None or not previous_line <= line.start_time <= next_line:
+            self._build_lines()
+            return True
+        self._line_starts[line_pos] = line.start_time
+        self._line_ends[line_pos] = line.end_time
+        _update_running_max(self._line_ends, self._line_max_ends, line_pos)
+        return True
+
+    def word_at(self, time_seconds: float) -> Optional[LrcWord]:
+        """指定時間正在播放的詞（重疊時取最晚開始者）"""
+        ref = self.locate(time_seconds)
+        if ref is None:
+            return None
+        return self._word(ref)
+
+    def locate(self, time_seconds: float) -> Optional[WordRef]:
+        """指定時間正在播放的詞位置（行索引, 詞索引）"""
+        self._ensure()
+        pos = self._last_active(self._starts, self._ends, self._max_ends, time_seconds)
+        return self._refs[pos] if pos is not None else None
+
+    def line_at(
+        self,
+        time_seconds: float,
+        lead_in: float = 0.0,
+        tail_hold: float = 0.0,
+    ) -> Optional[int]:
+        """
+        指定時間應顯示的行索引
+
+        Args:
+            lead_in: 行首提早顯示秒數
+            tail_hold: 行尾延後消失秒數
+        """
+        self._ensure()
+        # 說明：所有行的前後延伸相同，等同把查詢時間平移後比對原始區間
+        pos = self._last_active(
+            self._line_starts,
+            self._line_ends,
+            self._line_max_ends,
+            time_seconds + max(0.0, lead_in),
+            end_shift=max(0.0, lead_in) + max(0.0, tail_hold),
+        )
+        return self._line_refs[pos] if pos is not None else None
+
+    def words_in_range(self, start: float, end: float) -> List[WordRef]:
+        """與 [start, end) 重疊的詞位置（依開始時間排序）"""
+        self._ensure()
+        if end <= start:
+            return []
+        low = bisect_right(self._max_ends, start)
+        high = bisect_left(self._starts, end)
+        return [self._refs[i] for i in range(low, high) if self._ends[i] > start]
+
+    def next_boundary(self, time_seconds: float) -> Optional[float]:
+        """下一個詞開始或結束時間（嚴格大於指定時間）"""
+        self._ensure()
+        pos = bisect_right(self._boundaries, time_seconds)
+        return self._boundaries[pos] if pos < len(self._boundaries) else None
+
+    def previous_boundary(self, time_seconds: float) -> Optional[float]:
+        """上一個詞開始或結束時間（嚴格小於指定時間）"""
+        self._ensure()
+        pos = bisect_left(self._boundaries, time_seconds)
+        return self._boundaries[pos - 1] if pos > 0 else None
+
+    def _ensure(self):
+        """需要時重建索引"""
+        if self._dirty:
+            self._rebuild()
+
+    def _rebuild(self):
+        """依目前時間軸重建索引"""
+        entries = []
+        for line_idx, line in enumerate(self.timeline.lines):
+            for word_idx, word in enumerate(line.words):
+                if word.start_time is None or word.end_time is None:
+                    continue
+                entries.append((word.start_time, word.end_time, line_idx, word_idx))
+        entries.sort()
+
+        self._refs = [(line_idx, word_idx) for _, _, line_idx, word_idx in entries]
+        self._positions = {ref: pos for pos, ref in enumerate(self._refs)}
+        self._starts = [entry[0] for entry in entries]
+        self._ends = [entry[1] for entry in entries]
+        self._max_ends = _running_max(self._ends)
+        self._boundaries = sorted(self._starts + self._ends)
+        self._build_lines()
+        self._dirty = False
+
+    def _build_lines(self):
+        """重建行區間"""
+        lines = []
+        for line_idx, line in enumerate(self.timeline.lines):
+            if line.words:
+                lines.append((line.start_time, line.end_time, line_idx))
+        lines.sort()
+        self._line_refs = [line_idx for _, _, line_idx in lines]
+        self._line_positions = {line_idx: pos for pos, line_idx in enumerate(self._line_refs)}
+        self._line_starts = [entry[0] for entry in lines]
+        self._line_ends = [entry[1] for entry in lines]
+        self._line_max_ends = _running_max(self._line_ends)
+
+    def _word(self, ref: WordRef) -> LrcWord:
+        """依位置取得詞"""
+        line_idx, word_idx = ref
+        return self.timeline.lines[line_idx].words[word_idx]
+
+    @staticmethod
+    def _last_active(
+        starts: List[float],
+        ends: List[float],
+        max_ends: List[float],
+        time_seconds: float,
+        end_shift: float = 0.0,
+    ) -> Optional[int]:
+        """開始 <= t < 結束（+ end_shift）的最晚開始項目"""
+        low = bisect_right(max_ends, time_seconds - end_shift)
+        pos = bisect_right(starts, time_seconds) - 1
+        while pos >= low:
+            if ends[pos] + end_shift > time_seconds:
+                return pos
+            pos -= 1
+        return None
+
+
+def _running_max(values: List[float]) -> List[float]:
+    """前綴最大值"""
+    result = []
+    running = float('-inf')
+    for value in values:
+        running = max(running, value)
+        result.append(running)
+    return result
+
+
+def _update_running_max(values: List[float], max_values: List[float], start: int):
+    """自指定位置起重算前綴最大值"""
+    running = max_values[start - 1] if start > 0 else float('-inf')
+    for i in range(start, len(values)):
+        running = max(running, values[i])
+        max_values[i] = running
+
+
+def _replace_sorted(values: List[float], old: float, new: float):
+    """在排序陣列中以新值取代舊值"""
+    if old == new:
+        return
+    pos = bisect_left(values, old)
+    if pos < len(values) and values[pos] == old:
+        del values[pos]
+    insort(values, new)
@@ -3,11 +3,33 @@ LRC 資料結構定義
 
 作用：
 - 定義 LRC 的核心資料結構
-- 提供時間軸查詢能力
+- 提供時間軸查詢能力（透過區間索引）
+- 編輯方法可記錄差異供復原 / 重做
+- 編輯方法發出變更通知（含受影響的行範圍），索引與訂閱者可局部更新
+- 詞可標記為假名待產生，由背景填入（手動設定的假名不會被覆蓋）
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
+
+from .events import (
+    LINES_INSERTED,
+    LINES_REMOVED,
+    LINES_REPLACED,
+    LINES_UPDATED,
+    WORD_TIMES,
+    TimelineChange,
+)
+from .history import (
+    LineGroupDelta,
+    LineInsertDelta,
+    LineRemoveDelta,
+    LineWordsDelta,
+    WordRubyDelta,
+    WordTextDelta,
+    WordTimeDelta,
+    WordTimesDelta,
+)
 
 
 @dataclass
@@ -26,6 +48,7 @@ class LrcWord:
     start_time: float  # 開始時間（秒）
     end_time: float  # 結束時間（秒）
     ruby_pair: Optional[RubyPair] = None  # 假名對應（可為空）
+    ruby_pending: bool = False  # 假名等待背景產生
 
 
 @dataclass
@@ -40,6 +63,11 @@ class LrcLine:
         """整行純文字內容（不含假名）"""
         return ''.join(word.text for word in self.words)
 
+    @property
+    def ruby_pending(self) -> bool:
+        """是否有詞的假名尚未產生"""
+        return any(word.ruby_pending for word in self.words)
+
     @property
     def start_time(self) -> float:
         """這一行的開始時間"""
@@ -69,19 +97,217 @@ class LrcTimeline:
             'title': '',
             'album': '',
         }
+        # 時間查詢索引（延遲建立）
+        self._index = None
+        # 編輯紀錄（EditJournal，掛上後編輯方法會記錄差異）
+        self.journal = None
+        # 變更通知訂閱者
+        self._listeners: List[Callable[[TimelineChange], None]] = []
+
+    @property
+    def index(self):
+        """時間查詢索引（TimelineIndex）"""
+        if self._index is None:
+            from .index import TimelineIndex
+
+            self._index = TimelineIndex(self)
+        return self._index
+
+    def invalidate_index(self):
+        """行或詞增刪、文字重新切分後呼叫，下次查詢時重建索引"""
+        if self._index is not None:
+            self._index.invalidate()
+
+    def subscribe(self, callback: Callable[[TimelineChange], None]):
+        """訂閱變更通知（callback 收到 TimelineChange）"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[TimelineChange], None]):
+        """取消訂閱"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def notify(
+        self,
+        kind: str,
+        start: int = 0,
+        stop: Optional[int] = None,
+        words: Optional[List[Tuple[int, int]]] = None,
+    ):
+        """
+        發出變更通知（直接修改 lines 或詞屬性後呼叫）
+
+        Args:
+            kind: 事件類型（見 events 模組）
+            start / stop: 受影響行範圍（stop 預設為最後一行之後）
+            words: 時間變更的詞位置（None 表示範圍內所有詞）
+        """
+        if stop is None:
+            stop = len(self.lines)
+        change = TimelineChange(kind, start, stop, tuple(words) if words is not None else None)
+        # 說明：索引先更新，訂閱者在通知中查詢時間時拿到的是新結果
+        if self._index is not None:
+            self._index.apply_change(change)
+        for callback in list(self._listeners):
+            callback(change)
+
+    def update_word_time(self, line_idx: int, word_idx: int, start_time: float, end_time: float):
+        """修改單一詞的時間並修補索引"""
+        word = self.lines[line_idx].words[word_idx]
+        old = (word.start_time, word.end_time)
+        word.start_time = start_time
+        word.end_time = end_time
+        self._record(WordTimeDelta(line_idx, word_idx, old, (start_time, end_time)), '調整時間')
+        self.notify(WORD_TIMES, line_idx, line_idx + 1, [(line_idx, word_idx)])
+
+    def set_word_times(self, refs: List[Tuple[int, int]], times: List[Tuple[float, float]]):
+        """批次設定多個詞的時間（refs 與 times 一一對應）"""
+        old = []
+        for (line_idx, word_idx), (start_time, end_time) in zip(refs, times):
+            word = self.lines[line_idx].words[word_idx]
+            old.append((word.start_time, word.end_time))
+            word.start_time = start_time
+            word.end_time = end_time
+        self._record(WordTimesDelta(list(refs), old, list(times)), '批次調整時間')
+        if refs:
+            line_indices = [line_idx for line_idx, _word_idx in refs]
+            self.notify(WORD_TIMES, min(line_indices), max(line_indices) + 1, refs)
+
+    def set_word_text(self, line_idx: int, word_idx: int, text: str):
+        """修改詞文字"""
+        word = self.lines[line_idx].words[word_idx]
+        old = word.text
+        word.text = text
+        self._record(WordTextDelta(line_idx, word_idx, old, text), '修改文字')
+        self.notify(LINES_UPDATED, line_idx, line_idx + 1)
+
+    def set_word_ruby(self, line_idx: int, word_idx: int, ruby_pair: Optional[RubyPair]):
+        """修改詞假名（手動設定後不再由背景產生）"""
+        word = self.lines[line_idx].words[word_idx]
+        old = word.ruby_pair
+        word.ruby_pair = ruby_pair
+        word.ruby_pending = False
+        self._record(WordRubyDelta(line_idx, word_idx, old, ruby_pair), '修改假名')
+        self.notify(LINES_UPDATED, line_idx, line_idx + 1)
+
+    def fill_ruby(self, line_idx: int, readings: List[Tuple[int, str, str]]) -> bool:
+        """
+        填入背景產生的假名（不列入復原紀錄）
+
+        Args:
+            readings: (詞索引, 產生時的文字, 假名)；文字可跨越多個連續詞（熟字訓），
+                這些詞仍在等待、時間相同（未計時的 TXT）且沒有編輯紀錄時合併為一個詞；
+                詞各有時間或已有編輯紀錄時不合併，也不把整段讀音標在單一字上（維持無假名）。
+                詞已不再等待或文字已改變時略過。
+
+        Returns:
+            是否有詞被更新
+        """
+        words = self.lines[line_idx].words
+        changed = False
+        merged = False
+        # 說明：由後往前處理，合併詞時前面的索引不變
+        for word_idx, text, ruby in sorted(readings, key=lambda item: item[0], reverse=True):
+            stop = word_idx
+            joined = ''
+            while stop < len(words) and len(joined) < len(text):
+                joined += words[stop].text
+                stop += 1
+            span = words[word_idx:stop]
+            if joined != text or not span or not all(word.ruby_pending for word in span):
+                continue
+            ruby_pair = RubyPair(kanji=text, ruby=ruby) if ruby else None
+            if len(span) == 1:
+                span[0].ruby_pair = ruby_pair
+                span[0].ruby_pending = False
+            elif ruby_pair is not None and self._can_merge_words(span):
+                words[word_idx:stop] = [
+                    LrcWord(text, span[0].start_time, span[-1].end_time, ruby_pair)
+                ]
+                merged = True
+            else:
+                # 說明：合併會遺失各詞時間或使編輯紀錄的詞索引錯位，讀音又無法拆到各字，
+                # 這段維持無假名（可手動設定），不再重複產生
+                for word in span:
+                    word.ruby_pending = False
+            changed = True
+        if merged:
+            self.notify(LINES_REPLACED, line_idx, line_idx + 1)
+        elif changed:
+            self.notify(LINES_UPDATED, line_idx, line_idx + 1)
+        return changed
+
+    def _can_merge_words(self, span: List[LrcWord]) -> bool:
+        """
+        背景填入時可否將 span 合併為一個詞
+
+        需沒有可復原 / 重做的紀錄（改變詞數會使紀錄中的詞索引錯位），
+        且各詞時間相同（未計時的 TXT；合併不會遺失任何時間）。
+        """
+        if self.journal is not None and (self.journal.can_undo or self.journal.can_redo):
+            return False
+        first = span[0]
+        return all(
+            word.start_time == first.start_time and word.end_time == first.end_time
+            for word in span
+        )
+
+    def set_line_group(self, line_idx: int, group_id: str):
+        """修改行顏色群組"""
+        line = self.lines[line_idx]
+        old = line.group_id
+        line.group_id = group_id
+        self._record(LineGroupDelta(line_idx, old, group_id), '修改群組')
+        self.notify(LINES_UPDATED, line_idx, line_idx + 1)
+
+    def replace_line_words(self, line_idx: int, words: List[LrcWord]):
+        """以新詞列表取代整行（例如修改句子文字）"""
+        old = self._replace_line_words(line_idx, words)
+        self._record(LineWordsDelta(line_idx, old, list(words)), '修改句子')
+        self.notify(LINES_REPLACED, line_idx, line_idx + 1)
 
     def add_line(self, line: LrcLine):
         """新增一行歌詞"""
-        self.lines.append(line)
+        self.insert_line(len(self.lines), line)
+
+    def insert_line(self, index: int, line: LrcLine):
+        """在指定索引插入一行歌詞"""
+        count = len(self.lines)
+        index = max(0, count + index) if index < 0 else min(index, count)
+        inserted = self._insert_line(index, line)
+        self._record(LineInsertDelta(index, inserted), '新增行')
+        self.notify(LINES_INSERTED, index, index + 1)
 
     def remove_line(self, index: int):
         """刪除指定索引的歌詞行"""
-        self.lines.pop(index)
+        if index < 0:
+            index += len(self.lines)
+        line = self._remove_line(index)
+        self._record(LineRemoveDelta(index, line), '刪除行')
+        self.notify(LINES_REMOVED, index, index + 1)
 
     def get_word_at_time(self, time_seconds: float) -> Optional[LrcWord]:
         """在指定時間找到正在播放的詞（或字）"""
-        for line in self.lines:
-            for word in line.words:
-                if word.start_time <= time_seconds < word.end_time:
-                    return word
-        return None
+        return self.index.word_at(time_seconds)
+
+    def _insert_line(self, index: int, line: LrcLine) -> LrcLine:
+        """插入行並回傳實際保存的行（不記錄）"""
+        self.lines.insert(index, line)
+        return line
+
+    def _remove_line(self, index: int) -> LrcLine:
+        """刪除行並回傳被刪除的行（不記錄）"""
+        return self.lines.pop(index)
+
+    def _replace_line_words(self, line_idx: int, words: List[LrcWord]) -> list:
+        """替換整行詞列表並回傳舊列表（不記錄）"""
+        line = self.lines[line_idx]
+        old = line.words
+        line.words = list(words)
+        return old
+
+    def _record(self, delta, label: str):
+        """有掛上編輯紀錄時記錄差異"""
+        if self.journal is not None:
+            self.journal.record(delta, label)
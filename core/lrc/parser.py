@@ -4,29 +4,68 @@ LRC 解析器
 作用：
 - 解析 LRC 文字或檔案內容
 - 支援 .txt 歌詞載入
+- 支援增強格式（行內 <mm:ss.xx> 詞時間標記，保留每個詞的開始 / 結束時間）
+- 可由檔案物件逐行串流解析；一行多個時間標記時展開為多行並依時間排序
+- TXT 可延遲產生假名（詞標記為待產生，由背景填入）
 - 轉換為 LrcTimeline 結構
 """
 
 import os
 import re
-from typing import List, Optional, Tuple
+from typing import Callable, Iterable, List, Optional, TextIO, Tuple
 
+from .encoding import read_text_file
 from .model import LrcLine, LrcTimeline, LrcWord, RubyPair
-from .ruby_generator import RubyGenerator
+from .ruby_generator import RubyGenerator, needs_ruby
+from .tokenizer import TOKEN_LYRIC, tokenize, to_seconds
+
+# 增強格式的詞時間標記 <mm:ss.xx>（小數可省略或 1～3 位）
+WORD_TIMESTAMP_PATTERN = re.compile(r'<(\d{2,}):(\d{2})(?:\.(\d{1,3}))?>')
+# 逐字解析文字與假名：文字{假名} 或單一字元
+TEXT_RUBY_PATTERN = re.compile(r'([^\{\}]+)\{([^}]*)\}|([^{}])')
+# 元資訊標記 -> metadata 鍵（其他標記以原鍵名保存）
+METADATA_KEYS = {
+    'ar': 'artist',
+    'ti': 'title',
+    'al': 'album',
+}
+# 詞文字與假名 文字{假名}
+WORD_RUBY_PATTERN = re.compile(r'^(.*)\{([^{}]*)\}$', re.DOTALL)
 
 
 class LrcParser:
     """歌詞解析器"""
 
-    def __init__(self, default_word_duration: float = 0.5):
+    def __init__(
+        self,
+        default_word_duration: float = 0.5,
+        ruby_generator: Optional[RubyGenerator] = None,
+        timeline_factory: Callable[[], LrcTimeline] = LrcTimeline,
+    ):
         # 預設詞時長（秒）
         self.default_word_duration = default_word_duration
+        # 建立時間軸的類別（例如 ColumnarTimeline；解析完成後一次設定 lines）
+        self.timeline_factory = timeline_factory
+        # 假名生成器（第一次需要時才建立，之後重複使用同一個 kakasi 轉換器）
+        self._ruby_generator = ruby_generator
 
-    def parse_file(self, file_path: str, auto_ruby: bool = True) -> LrcTimeline:
+    @property
+    def ruby_generator(self) -> RubyGenerator:
+        """取得共用的假名生成器"""
+        if self._ruby_generator is None:
+            self._ruby_generator = RubyGenerator()
+        return self._ruby_generator
+
+    def parse_file(
+        self,
+        file_path: str,
+        auto_ruby: bool = True,
+        defer_ruby: bool = False,
+    ) -> LrcTimeline:
         """依副檔名自動解析檔案"""
         ext = os.path.splitext(file_path)[1].lower()
         if ext == '.txt':
-            return self.parse_txt_file(file_path, auto_ruby=auto_ruby)
+            return self.parse_txt_file(file_path, auto_ruby=auto_ruby, defer_ruby=defer_ruby)
         if ext == '.lrc':
             return self.parse_lrc_file(file_path)
         if ext == '.bookara':
@@ -38,49 +77,77 @@ class LrcParser:
         content = self._read_text_file(file_path)
         return self.parse_string(content)
 
-    def parse_txt_file(self, file_path: str, auto_ruby: bool = True) -> LrcTimeline:
+    def parse_txt_file(
+        self,
+        file_path: str,
+        auto_ruby: bool = True,
+        defer_ruby: bool = False,
+    ) -> LrcTimeline:
         """解析 TXT 歌詞檔案"""
         content = self._read_text_file(file_path)
-        return self.parse_txt_string(content, auto_ruby=auto_ruby)
+        return self.parse_txt_string(content, auto_ruby=auto_ruby, defer_ruby=defer_ruby)
 
     def parse_string(self, content: str) -> LrcTimeline:
         """解析 LRC 字串內容"""
-        timeline = LrcTimeline()  # 時間軸物件
+        return self.parse_lines(content.splitlines())
 
-        for raw_line in content.splitlines():
-            line = raw_line.strip()
-            if not line:
-                continue
+    def parse_stream(self, file_handle: TextIO) -> LrcTimeline:
+        """由已開啟的文字檔案物件逐行解析（不一次讀入整份內容）"""
+        return self.parse_lines(file_handle)
 
-            # 元資訊
-            if line.startswith('[ar:') and line.endswith(']'):
-                timeline.metadata['artist'] = line[4:-1]
-                continue
-            if line.startswith('[ti:') and line.endswith(']'):
-                timeline.metadata['title'] = line[4:-1]
-                continue
-            if line.startswith('[al:') and line.endswith(']'):
-                timeline.metadata['album'] = line[4:-1]
-                continue
-            if line.startswith('[offset:') and line.endswith(']'):
-                offset_ms_str = line[8:-1]
-                if offset_ms_str:
-                    timeline.offset = float(offset_ms_str) / 1000.0
+    def parse_lines(self, lines: Iterable[str]) -> LrcTimeline:
+        """解析逐行的 LRC 內容"""
+        timeline = self.timeline_factory()  # 時間軸物件
+        lrc_lines: List[LrcLine] = []
+        repeated = False  # 是否有一行多個時間標記
+
+        for token in tokenize(lines):
+            if token.kind == TOKEN_LYRIC:
+                if WORD_TIMESTAMP_PATTERN.search(token.text) is not None:
+                    # 說明：詞時間標記以第一個時間標記為準，重複段落依各自的行時間平移
+                    first = self._parse_enhanced_content(token.times[0], token.text)
+                    lrc_lines.append(first)
+                    for timestamp in token.times[1:]:
+                        lrc_lines.append(self._shift_line(first, timestamp - token.times[0]))
+                else:
+                    # 說明：重複段落的文字只解析一次
+                    pairs = list(self._iter_text_with_ruby(token.text))
+                    for timestamp in token.times:
+                        lrc_lines.append(self._build_line(timestamp, pairs))
+                repeated = repeated or len(token.times) > 1
                 continue
 
-            # 歌詞行
-            timestamp, text = self._parse_lrc_line(line)
-            if timestamp is None:
+            # 元資訊
+            if token.key == 'offset':
+                try:
+                    timeline.offset = float(token.text) / 1000.0 if token.text else 0.0
+                except ValueError:
+                    pass
                 continue
-            lrc_line = self._parse_content(timestamp, text)
-            timeline.add_line(lrc_line)
+            timeline.metadata[METADATA_KEYS.get(token.key, token.key)] = token.text
 
+        if repeated:
+            # 說明：重複段落展開後依時間排序（穩定排序，同時間保持檔案順序）
+            lrc_lines.sort(key=lambda line: line.start_time)
+        timeline.lines = lrc_lines
         return timeline
 
-    def parse_txt_string(self, content: str, auto_ruby: bool = True) -> LrcTimeline:
-        """解析 TXT 字串內容（每行一句）"""
-        timeline = LrcTimeline()  # 時間軸物件
-        ruby_generator = RubyGenerator() if auto_ruby else None
+    def parse_txt_string(
+        self,
+        content: str,
+        auto_ruby: bool = True,
+        defer_ruby: bool = False,
+    ) -> LrcTimeline:
+        """
+        解析 TXT 字串內容（每行一句）
+
+        defer_ruby 為 True 時不呼叫假名生成器，需要假名的詞標記為 ruby_pending，
+        由背景工作（RubyFillWorker）之後填入。
+        """
+        timeline = self.timeline_factory()  # 時間軸物件
+        lrc_lines: List[LrcLine] = []
+        defer = auto_ruby and defer_ruby  # 是否延遲產生假名
+        ruby_generator = self.ruby_generator if auto_ruby and not defer else None
 
         for raw_line in content.splitlines():
             line = raw_line.strip()
@@ -94,16 +161,18 @@ class LrcParser:
                     start_time=0.0,
                     end_time=self.default_word_duration,
                     ruby_pair=RubyPair(kanji=word_text, ruby=ruby_text) if ruby_text else None,
+                    ruby_pending=defer and not ruby_text and needs_ruby(word_text),
                 )
                 words.append(word)
 
-            timeline.add_line(LrcLine(words=words))
+            lrc_lines.append(LrcLine(words=words))
 
+        timeline.lines = lrc_lines
         return timeline
 
     def parse_txt_line(self, line: str, auto_ruby: bool = True) -> List[LrcWord]:
         """解析單行 TXT 句子"""
-        ruby_generator = RubyGenerator() if auto_ruby else None
+        ruby_generator = self.ruby_generator if auto_ruby else None
         words: List[LrcWord] = []
         for word_text, ruby_text in self._iter_text_with_ruby(line, ruby_generator):
             word = LrcWord(
@@ -115,73 +184,110 @@ class LrcParser:
             words.append(word)
         return words
 
-    def _parse_lrc_line(self, line: str) -> Tuple[Optional[float], str]:
-        """
-        解析單行 LRC：
-        格式：[mm:ss.xx]內容
-        """
-        pattern = r'^\[(\d{2}):(\d{2})\.(\d{2})\](.*)$'
-        match = re.match(pattern, line)
-        if not match:
-            return None, ''
-
-        minutes_str, seconds_str, centisecs_str, content = match.groups()
-        # 轉為秒數
-        timestamp = int(minutes_str) * 60 + int(seconds_str) + int(centisecs_str) / 100.0
-        return timestamp, content
-
     def _parse_content(self, start_time: float, content: str) -> LrcLine:
         """解析 LRC 歌詞內容並建立 LrcLine"""
+        return self._build_line(start_time, self._iter_text_with_ruby(content))
+
+    def _build_line(self, start_time: float, pairs) -> LrcLine:
+        """由（文字, 假名）依序配置預設時長並建立 LrcLine"""
         words: List[LrcWord] = []  # 詞列表
         current_time = start_time  # 時間游標
+        duration = self.default_word_duration
 
-        for word_text, ruby_text in self._iter_text_with_ruby(content):
+        for word_text, ruby_text in pairs:
             ruby_pair = RubyPair(kanji=word_text, ruby=ruby_text) if ruby_text else None
-            word = LrcWord(
-                text=word_text,
-                start_time=current_time,
-                end_time=current_time + self.default_word_duration,
-                ruby_pair=ruby_pair,
-            )
-            words.append(word)
-            current_time += self.default_word_duration
+            words.append(LrcWord(word_text, current_time, current_time + duration, ruby_pair))
+            current_time += duration
 
         return LrcLine(words=words)
 
+    def _parse_enhanced_content(self, start_time: float, content: str) -> LrcLine:
+        """
+        解析增強格式內容：<詞開始>詞{假名}<詞開始>詞...<結束>
+
+        每個詞結束於下一個標記；不帶文字的標記只表示前一個詞的結束（詞間間隔）。
+        最後一個詞沒有結束標記時使用預設時長。
+        """
+        parts = WORD_TIMESTAMP_PATTERN.split(content)
+        # 說明：split 結果為 [開頭文字, 分, 秒, 小數, 文字, 分, 秒, 小數, 文字, ...]
+        tokens: List[Tuple[float, str]] = []
+        if parts[0]:
+            tokens.append((start_time, parts[0]))
+        for index in range(1, len(parts), 4):
+            time = to_seconds(parts[index], parts[index + 1], parts[index + 2])
+            tokens.append((time, parts[index + 3]))
+
+        words: List[LrcWord] = []
+        for index, (time, text) in enumerate(tokens):
+            if not text:
+                continue
+            if index + 1 < len(tokens):
+                end_time = tokens[index + 1][0]
+            else:
+                end_time = time + self.default_word_duration
+            match = WORD_RUBY_PATTERN.match(text)
+            if match and match.group(1) and match.group(2):
+                word_text, ruby_text = match.group(1), match.group(2)
+            else:
+                word_text, ruby_text = text, ''
+            ruby_pair = RubyPair(kanji=word_text, ruby=ruby_text) if ruby_text else None
+            words.append(LrcWord(word_text, time, end_time, ruby_pair))
+
+        return LrcLine(words=words)
+
+    def _shift_line(self, line: LrcLine, delta: float) -> LrcLine:
+        """複製一行並平移所有詞時間"""
+        return LrcLine(
+            words=[
+                LrcWord(word.text, word.start_time + delta, word.end_time + delta, word.ruby_pair)
+                for word in line.words
+            ]
+        )
+
     def _iter_text_with_ruby(
         self,
         content: str,
         ruby_generator: Optional[RubyGenerator] = None,
     ):
-        """逐字解析文字與假名"""
-        pattern = re.compile(r'([^\{\}]+)\{([^}]*)\}|([^{}])')
-        for match in pattern.finditer(content):
+        """
+        逐字解析文字與假名
+
+        有假名生成器時，連續的未標注文字整段轉換一次再對齊回各字
+        （熟字訓如 今日 會合併為一個詞）。
+        """
+        plain: List[str] = []  # 尚未轉換的連續單字
+        for match in TEXT_RUBY_PATTERN.finditer(content):
             text_with_ruby = match.group(1)
             ruby_text = match.group(2)
             plain_text = match.group(3)
 
-            word_text = text_with_ruby if text_with_ruby is not None else plain_text
-            if word_text is None:
+            if plain_text is not None:
+                plain.append(plain_text)
                 continue
-
-            if ruby_text is not None and ruby_text != '':
-                yield word_text, ruby_text
+            if text_with_ruby is None:
                 continue
 
-            if ruby_generator:
-                generated = ruby_generator.generate_ruby(word_text)
-                yield word_text, generated if generated else ''
+            yield from self._iter_plain_text(''.join(plain), ruby_generator)
+            plain.clear()
+            if ruby_text != '':
+                yield text_with_ruby, ruby_text
+            elif ruby_generator:
+                yield text_with_ruby, ruby_generator.generate_ruby(text_with_ruby)
             else:
-                yield word_text, ''
+                yield text_with_ruby, ''
+
+        yield from self._iter_plain_text(''.join(plain), ruby_generator)
+
+    def _iter_plain_text(self, text: str, ruby_generator: Optional[RubyGenerator]):
+        """未標注文字：有假名生成器時整段對齊，否則逐字"""
+        if not text:
+            return
+        if ruby_generator:
+            yield from ruby_generator.segment_ruby(text)
+        else:
+            for char in text:
+                yield char, ''
 
     def _read_text_file(self, file_path: str) -> str:
-        """讀取文字檔案並嘗試編碼"""
-        encodings = ['utf-8-sig', 'utf-8', 'gbk']
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as file_handle:
-                    return file_handle.read()
-            except UnicodeDecodeError:
-                continue
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as file_handle:
-            return file_handle.read()
+        """讀取文字檔案（讀取一次，判斷 BOM / UTF-8 / Shift_JIS / EUC-JP / GBK / Big5 後解碼一次）"""
+        return read_text_file(file_path)
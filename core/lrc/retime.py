@@ -0,0 +1,161 @@
+"""
+批次調整時間
+
+作用：
+- 對整首或選取行套用平移、以錨點伸縮、速度比例與對齊格線
+- 將 LRC 的 [offset:] 寫入各詞時間
+- 欄式時間軸（ColumnarTimeline）以向量化運算執行，一般時間軸逐詞處理
+- 時間軸掛有編輯紀錄時，每次調整記錄為一個復原步驟
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .columnar import ColumnarTimeline
+from .events import WORD_TIMES
+from .history import WordTimesDelta
+from .model import LrcTimeline, LrcWord
+
+
+@dataclass
+class TimingSnapshot:
+    """選取詞的時間快照"""
+
+    refs: List[Tuple[int, int]] = field(default_factory=list)  # (行索引, 詞索引)
+    times: List[Tuple[float, float]] = field(default_factory=list)  # (開始, 結束)
+
+
+def shift_times(timeline: LrcTimeline, seconds: float, lines: Optional[Iterable[int]] = None):
+    """平移時間（負值提前，結果夾在 0 以上）"""
+    lines = _normalize_lines(lines)
+    with _recording(timeline, lines, '平移時間'):
+        if isinstance(timeline, ColumnarTimeline):
+            timeline.shift_times(seconds, lines)
+            timeline.clamp_times(0.0, lines)
+            return
+        for word in _iter_words(timeline, lines):
+            word.start_time = max(0.0, word.start_time + seconds)
+            word.end_time = max(0.0, word.end_time + seconds)
+        _notify_times(timeline, lines)
+
+
+def stretch_times(
+    timeline: LrcTimeline,
+    factor: float,
+    anchor: float = 0.0,
+    lines: Optional[Iterable[int]] = None,
+):
+    """以 anchor 為中心線性伸縮（factor > 1 拉長）"""
+    if factor <= 0:
+        raise ValueError('stretch factor must be positive')
+    lines = _normalize_lines(lines)
+    with _recording(timeline, lines, '伸縮時間'):
+        if isinstance(timeline, ColumnarTimeline):
+            timeline.scale_times(factor, anchor, lines)
+            timeline.clamp_times(0.0, lines)
+            return
+        for word in _iter_words(timeline, lines):
+            word.start_time = max(0.0, anchor + (word.start_time - anchor) * factor)
+            word.end_time = max(0.0, anchor + (word.end_time - anchor) * factor)
+        _notify_times(timeline, lines)
+
+
+def change_tempo(
+    timeline: LrcTimeline,
+    ratio: float,
+    anchor: float = 0.0,
+    lines: Optional[Iterable[int]] = None,
+):
+    """依速度比例調整（ratio = 新速度 / 原速度，例如 1.05 表示快 5%）"""
+    if ratio <= 0:
+        raise ValueError('tempo ratio must be positive')
+    stretch_times(timeline, 1.0 / ratio, anchor, lines)
+
+
+def quantize_times(
+    timeline: LrcTimeline,
+    step: float,
+    origin: float = 0.0,
+    lines: Optional[Iterable[int]] = None,
+):
+    """對齊到 origin + step 的整數倍（例如節拍格線）"""
+    if step <= 0:
+        raise ValueError('quantize step must be positive')
+    lines = _normalize_lines(lines)
+    with _recording(timeline, lines, '對齊格線'):
+        if isinstance(timeline, ColumnarTimeline):
+            timeline.quantize_times(step, origin, lines)
+            return
+        for word in _iter_words(timeline, lines):
+            start = origin + round((word.start_time - origin) / step) * step
+            end = origin + round((word.end_time - origin) / step) * step
+            word.start_time = start
+            word.end_time = max(end, start + step)
+        _notify_times(timeline, lines)
+
+
+def apply_offset(timeline: LrcTimeline) -> bool:
+    """
+    將 [offset:] 寫入各詞時間並歸零
+
+    LRC 的 offset 為正時歌詞提早顯示，因此時間減去 offset。
+
+    Returns:
+        是否有調整
+    """
+    if not timeline.offset:
+        return False
+    shift_times(timeline, -timeline.offset)
+    timeline.offset = 0.0
+    return True
+
+
+def capture_times(timeline: LrcTimeline, lines: Optional[Iterable[int]] = None) -> TimingSnapshot:
+    """擷取選取行（預設全部）的時間快照"""
+    lines = _normalize_lines(lines)
+    snapshot = TimingSnapshot()
+    line_indices = range(len(timeline.lines)) if lines is None else lines
+    for line_idx in line_indices:
+        if not 0 <= line_idx < len(timeline.lines):
+            continue
+        for word_idx, word in enumerate(timeline.lines[line_idx].words):
+            snapshot.refs.append((line_idx, word_idx))
+            snapshot.times.append((word.start_time, word.end_time))
+    return snapshot
+
+
+@contextmanager
+def _recording(timeline: LrcTimeline, lines: Optional[List[int]], label: str) -> Iterator[None]:
+    """時間軸掛有編輯紀錄時，將區塊內的時間變更記錄為一步"""
+    journal = getattr(timeline, 'journal', None)
+    before = capture_times(timeline, lines) if journal is not None else None
+    yield
+    if before is not None and before.refs:
+        after = capture_times(timeline, lines)
+        journal.record(WordTimesDelta(before.refs, before.times, after.times), label)
+
+
+def _normalize_lines(lines: Optional[Iterable[int]]) -> Optional[List[int]]:
+    """整理行索引（排序去重，None 表示全部）"""
+    if lines is None:
+        return None
+    return sorted(set(lines))
+
+
+def _notify_times(timeline: LrcTimeline, lines: Optional[List[int]]):
+    """發出選取行（None 表示全部）的詞時間變更通知"""
+    if lines is None:
+        timeline.notify(WORD_TIMES)
+        return
+    lines = [line_idx for line_idx in lines if 0 <= line_idx < len(timeline.lines)]
+    if lines:
+        timeline.notify(WORD_TIMES, lines[0], lines[-1] + 1)
+
+
+def _iter_words(timeline: LrcTimeline, lines: Optional[List[int]]) -> Iterable[LrcWord]:
+    """選取行的所有詞"""
+    line_indices = range(len(timeline.lines)) if lines is None else lines
+    for line_idx in line_indices:
+        if 0 <= line_idx < len(timeline.lines):
+            yield from timeline.lines[line_idx].words
@@ -0,0 +1,180 @@
+"""
+背景假名填入排程
+
+作用：
+- 收集時間軸中假名待產生的詞，每行建立一個工作（行物件 + 詞文字快照）
+- 執行緒安全的佇列：同一行只排一次，可見行可提到最前面
+- 假名在背景執行緒產生：行內連續的未標注詞整段轉換一次並對齊回各詞，
+  結果交回 GUI 執行緒以 LrcTimeline.fill_ruby 套用（詞已手動設定假名或文字已改變時略過）
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .ruby_generator import RubyGenerator
+
+
+@dataclass
+class RubyTask:
+    """一行的假名產生工作"""
+
+    line: object  # 行識別（見 line_identity，以身分比對，行插入 / 刪除後仍可找回）
+    line_idx: int  # 建立時的行索引（找行時先檢查此位置）
+    words: List[Tuple[int, str]]  # 待產生的 (詞索引, 詞文字)
+    # 連續未標注假名的詞 (第一個詞索引, 各詞文字)，每段轉換一次
+    runs: List[Tuple[int, List[str]]] = field(default_factory=list)
+
+
+def line_identity(line) -> object:
+    """
+    行的識別物件（以 is 比對）
+
+    一般行即行物件本身；欄式時間軸每次取行都建立新的視圖，改用其 identity。
+    """
+    return getattr(line, 'identity', line)
+
+
+def build_task(timeline, line_idx: int) -> Optional[RubyTask]:
+    """建立一行的工作（沒有待產生的詞時為 None）"""
+    line = timeline.lines[line_idx]
+    words = [
+        (word_idx, word.text)
+        for word_idx, word in enumerate(line.words)
+        if word.ruby_pending
+    ]
+    if not words:
+        return None
+    # 說明：以已標注假名的詞分段，段內文字一起轉換（送假名可作為對齊錨點）
+    runs: List[Tuple[int, List[str]]] = []
+    start = None
+    for word_idx, word in enumerate(list(line.words) + [None]):
+        if word is not None and word.ruby_pair is None:
+            if start is None:
+                start = word_idx
+            continue
+        if start is not None:
+            segment = line.words[start:word_idx]
+            if any(item.ruby_pending for item in segment):
+                runs.append((start, [item.text for item in segment]))
+            start = None
+    return RubyTask(line_identity(line), line_idx, words, runs)
+
+
+def pending_tasks(timeline, first_lines: Sequence[int] = ()) -> List[RubyTask]:
+    """所有待產生的行工作（first_lines 優先，其餘依行序）"""
+    count = len(timeline.lines)
+    order = [line_idx for line_idx in first_lines if 0 <= line_idx < count]
+    seen = set(order)
+    order.extend(line_idx for line_idx in range(count) if line_idx not in seen)
+    tasks = []
+    for line_idx in order:
+        task = build_task(timeline, line_idx)
+        if task is not None:
+            tasks.append(task)
+    return tasks
+
+
+def generate_readings(generator: RubyGenerator, task: RubyTask) -> List[Tuple[int, str, str]]:
+    """
+    產生一行的假名（可在背景執行緒呼叫，只讀取工作內的文字快照）
+
+    Returns:
+        (詞索引, 文字, 假名)；熟字訓跨越多個詞時文字為這些詞的合併文字
+    """
+    readings = []
+    for first_idx, texts in task.runs:
+        readings.extend(_align_words(generator.segment_ruby(''.join(texts)), first_idx, texts))
+    return readings
+
+
+def _align_words(
+    segments: List[Tuple[str, str]],
+    first_idx: int,
+    texts: List[str],
+) -> List[Tuple[int, str, str]]:
+    """將對齊結果對應回詞（段落與詞邊界不一致時合併到下一個共同邊界）"""
+    readings = []
+    word_idx = 0  # 段內詞索引
+    word_end = len(texts[0]) if texts else 0  # 目前詞的結束位置（字元）
+    position = 0  # 目前段落的結束位置（字元）
+    start_idx = 0  # 目前累積的第一個詞
+    parts: List[Tuple[str, str]] = []
+    for text, ruby in segments:
+        parts.append((text, ruby))
+        position += len(text)
+        while word_idx < len(texts) and word_end < position:
+            word_idx += 1
+            word_end += len(texts[word_idx])
+        if position != word_end:
+            continue
+        if any(ruby for _text, ruby in parts):
+            # 說明：一個詞含多段時，假名為各段讀音（無讀音的段落以原文補上）
+            combined = ''.join(ruby or text for text, ruby in parts)
+            readings.append((first_idx + start_idx, ''.join(texts[start_idx:word_idx + 1]), combined))
+        else:
+            readings.extend(
+                (first_idx + index, texts[index], '') for index in range(start_idx, word_idx + 1)
+            )
+        parts = []
+        word_idx += 1
+        start_idx = word_idx
+        word_end += len(texts[word_idx]) if word_idx < len(texts) else 0
+    return readings
+
+
+def locate_line(timeline, task: RubyTask) -> Optional[int]:
+    """找出工作對應的行目前的索引（行已刪除時為 None）"""
+    lines = timeline.lines
+    if task.line_idx < len(lines) and line_identity(lines[task.line_idx]) is task.line:
+        return task.line_idx
+    # 說明：之前有插入 / 刪除行時，以身分比對找回（不可用 ==，內容相同的行會誤判）
+    for line_idx, line in enumerate(lines):
+        if line_identity(line) is task.line:
+            return line_idx
+    return None
+
+
+class RubyFillQueue:
+    """執行緒安全的假名工作佇列"""
+
+    def __init__(self):
+        # 行物件 id -> 工作（依處理順序）
+        self._tasks: 'OrderedDict[int, RubyTask]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 關閉後 get() 一律回傳 None
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def put(self, tasks: Iterable[RubyTask], front: bool = False):
+        """
+        加入工作（同一行已在佇列中時以新快照取代）
+
+        Args:
+            front: 是否排到最前面（依傳入順序）
+        """
+        tasks = list(tasks)
+        with self._lock:
+            for task in tasks:
+                self._tasks[id(task.line)] = task
+            if front:
+                for task in reversed(tasks):
+                    self._tasks.move_to_end(id(task.line), last=False)
+
+    def get(self) -> Optional[RubyTask]:
+        """取出下一個工作（佇列為空或已關閉時為 None）"""
+        with self._lock:
+            if self._closed or not self._tasks:
+                return None
+            _key, task = self._tasks.popitem(last=False)
+            return task
+
+    def close(self):
+        """關閉佇列並丟棄剩餘工作"""
+        with self._lock:
+            self._closed = True
+            self._tasks.clear()
@@ -4,10 +4,13 @@
 作用：
 - 將文字轉為平假名
 - 提供自動假名標注能力
+- 不需初始化 kakasi 即可判斷文字是否需要假名（延遲產生時使用）
+- 整句一次轉換後以假名為錨點對齊回各漢字（逐字標注；熟字訓如 今日 整段標注）
+- 拆分漢字段所需的單字讀音每句批次轉換一次並快取
 """
 
 import re
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 try:
     from pykakasi import kakasi
@@ -15,12 +18,48 @@ except ImportError:
     kakasi = None
 
 
+# 純平假名 / 純片假名 / 英數與符號
+HIRAGANA_PATTERN = re.compile(r'[\u3040-\u309F]+')
+KATAKANA_PATTERN = re.compile(r'[\u30A0-\u30FF]+')
+ASCII_OR_SYMBOL_PATTERN = re.compile(r'[0-9A-Za-z\s\W]+')
+# 需要讀音的字元（漢字與々〆）
+KANJI_CHARS = '\u3400-\u4DBF\u4E00-\u9FFF\uF900-\uFAFF\u3005\u3006'
+# 漢字段 / 非漢字段
+RUN_PATTERN = re.compile(f'([{KANJI_CHARS}]+)|([^{KANJI_CHARS}]+)')
+# 合法的讀音（平假名與長音）
+READING_PATTERN = re.compile(r'[\u3041-\u3096\u30FC]+')
+# 重複符號（讀音同前一字，可連濁）
+ITERATION_MARK = '々'
+# 連濁：清音 -> 濁音 / 半濁音
+RENDAKU = {
+    'か': 'が', 'き': 'ぎ', 'く': 'ぐ', 'け': 'げ', 'こ': 'ご',
+    'さ': 'ざ', 'し': 'じ', 'す': 'ず', 'せ': 'ぜ', 'そ': 'ぞ',
+    'た': 'だ', 'ち': 'ぢじ', 'つ': 'づず', 'て': 'で', 'と': 'ど',
+    'は': 'ばぱ', 'ひ': 'びぴ', 'ふ': 'ぶぷ', 'へ': 'べぺ', 'ほ': 'ぼぽ',
+}
+# 促音化：字尾為這些假名時，後面接字可讀作「っ」（学校 -> がっこう）
+SOKUON_ENDINGS = 'つちくき'
+# 批次轉換單字讀音時的分隔字元（轉換器原樣保留，且會切斷詞典的最長比對）
+READING_SEPARATOR = '\n'
+
+
+def needs_ruby(text: str) -> bool:
+    """判斷文字是否需要自動產生假名（純假名、英數與符號不需要）"""
+    if not text:
+        return False
+    if HIRAGANA_PATTERN.fullmatch(text) or KATAKANA_PATTERN.fullmatch(text):
+        return False
+    return ASCII_OR_SYMBOL_PATTERN.fullmatch(text) is None
+
+
 class RubyGenerator:
     """假名生成器"""
 
     def __init__(self):
         # kakasi 轉換器（可能為 None）
         self._converter = None
+        # 單一漢字的讀音快取（拆分漢字段時使用）
+        self._char_readings: Dict[str, str] = {}
         if kakasi:
             converter = kakasi()
             converter.setMode('J', 'H')  # 日文轉平假名
@@ -30,17 +69,8 @@ class RubyGenerator:
 
     def generate_ruby(self, text: str) -> str:
         """產生平假名（若無法生成則回傳空字串）"""
-        if not text:
-            return ''
-
-        # 純平假名/片假名不自動標注
-        if self._is_hiragana(text):
-            return ''
-        if self._is_katakana(text):
-            return ''
-
-        # 英數與符號不自動生成
-        if self._is_ascii_or_symbol(text):
+        # 純假名、英數與符號不自動標注
+        if not needs_ruby(text):
             return ''
 
         # 有 kakasi 則使用自動轉換
@@ -49,17 +79,130 @@ class RubyGenerator:
 
         return ''
 
-    def _is_hiragana(self, text: str) -> bool:
-        """判斷是否為平假名"""
-        return bool(re.fullmatch(r'[\u3040-\u309F]+', text))
+    def segment_ruby(self, text: str) -> List[Tuple[str, str]]:
+        """
+        整段文字一次轉換並對齊回各字，回傳 (文字, 假名) 列表
+
+        非漢字逐字回傳（假名為空字串）；漢字段的讀音能依單字讀音（含連濁、促音化）拆開時
+        逐字標注，否則整段為一組（熟字訓，例如 今日 -> きょう）。
+        """
+        runs = [(bool(kanji), kanji or other) for kanji, other in RUN_PATTERN.findall(text)]
+        if not self._converter or not any(is_kanji for is_kanji, _run in runs):
+            return [(char, '') for char in text]
+
+        readings = self._align_runs(runs, self._convert(text))
+        if readings is None:
+            # 說明：整句結果無法對齊（轉換改動了非漢字）時，改為每個漢字段各轉換一次
+            readings = [self._convert(run) if is_kanji else '' for is_kanji, run in runs]
 
-    def _is_katakana(self, text: str) -> bool:
-        """判斷是否為片假名"""
-        return bool(re.fullmatch(r'[\u30A0-\u30FF]+', text))
+        # 說明：多字漢字段拆分需要單字讀音，整句尚未快取的漢字以一次轉換取得
+        self._prefetch_char_readings(
+            run for (is_kanji, run), reading in zip(runs, readings)
+            if is_kanji and len(run) > 1 and READING_PATTERN.fullmatch(reading)
+        )
+
+        segments: List[Tuple[str, str]] = []
+        for (is_kanji, run), reading in zip(runs, readings):
+            if not is_kanji:
+                segments.extend((char, '') for char in run)
+            elif READING_PATTERN.fullmatch(reading):
+                segments.extend(self._split_run(run, reading))
+            else:
+                # 說明：無法轉換的漢字（轉換結果仍含漢字或為空）不標注
+                segments.extend((char, '') for char in run)
+        return segments
+
+    def _convert(self, text: str) -> str:
+        """以 kakasi 轉為平假名（片假名一併轉為平假名）"""
+        return self._katakana_to_hiragana(self._converter.do(text))
+
+    def _align_runs(self, runs: List[Tuple[bool, str]], reading: str) -> Optional[List[str]]:
+        """
+        以非漢字段為錨點，將整句讀音分配到各漢字段（無法對齊時為 None）
+
+        例如 泣かない / なかない：「かない」為錨點，漢字段「泣」分到「な」。
+        """
+        parts = []
+        for is_kanji, run in runs:
+            if is_kanji:
+                parts.append('(.+?)')
+                continue
+            for char in self._katakana_to_hiragana(run):
+                if HIRAGANA_PATTERN.fullmatch(char) or char == 'ー':
+                    parts.append(re.escape(char))
+                else:
+                    # 說明：英數與符號可能被轉換器保留或省略
+                    parts.append(f'(?:{re.escape(char)})?')
+        match = re.fullmatch(''.join(parts), reading, re.DOTALL)
+        if match is None:
+            return None
+        groups = iter(match.groups())
+        aligned = [next(groups) if is_kanji else '' for is_kanji, _run in runs]
+        for value, (is_kanji, _run) in zip(aligned, runs):
+            if is_kanji and not READING_PATTERN.fullmatch(value):
+                return None
+        return aligned
+
+    def _split_run(self, run: str, reading: str) -> List[Tuple[str, str]]:
+        """將漢字段的讀音拆到各字（無法拆開時整段為一組）"""
+        if len(run) == 1:
+            return [(run, reading)]
+        pattern = []
+        for variants in self._char_variants(run):
+            if not variants:
+                return [(run, reading)]
+            pattern.append('(' + '|'.join(re.escape(variant) for variant in variants) + ')')
+        match = re.fullmatch(''.join(pattern), reading)
+        if match is None:
+            return [(run, reading)]
+        return list(zip(run, match.groups()))
+
+    def _char_variants(self, run: str) -> List[List[str]]:
+        """漢字段中每個字可能的讀音（單字讀音 + 連濁 + 促音化）"""
+        result = []
+        previous = ''
+        for index, char in enumerate(run):
+            base = previous if char == ITERATION_MARK else self._char_reading(char)
+            previous = base
+            if not base:
+                result.append([])
+                continue
+            variants = [base]
+            if index > 0:
+                variants.extend(voiced + base[1:] for voiced in RENDAKU.get(base[0], ''))
+            if index + 1 < len(run) and len(base) > 1 and base[-1] in SOKUON_ENDINGS:
+                variants.extend(variant[:-1] + 'っ' for variant in list(variants))
+            result.append(variants)
+        return result
+
+    def _prefetch_char_readings(self, runs: Iterable[str]):
+        """
+        將多個漢字段中尚未快取的漢字以分隔字元串接後一次轉換，存入單字讀音快取
+
+        分隔後的段數與字數不符時不寫入快取（之後由 _char_reading 逐字轉換）。
+        """
+        chars = []
+        for run in runs:
+            for char in run:
+                if char != ITERATION_MARK and char not in self._char_readings and char not in chars:
+                    chars.append(char)
+        if not chars:
+            return
+        if len(chars) == 1:
+            self._char_reading(chars[0])
+            return
+        readings = self._convert(READING_SEPARATOR.join(chars)).split(READING_SEPARATOR)
+        if len(readings) != len(chars):
+            return
+        for char, reading in zip(chars, readings):
+            self._char_readings[char] = reading if READING_PATTERN.fullmatch(reading) else ''
 
-    def _is_ascii_or_symbol(self, text: str) -> bool:
-        """判斷是否為英數或符號"""
-        return bool(re.fullmatch(r'[0-9A-Za-z\s\W]+', text))
+    def _char_reading(self, char: str) -> str:
+        """單一漢字的讀音（同一字只轉換一次）"""
+        if char not in self._char_readings:
+            reading = self._convert(char)
+            self._char_readings[char] = reading if READING_PATTERN.fullmatch(reading) else ''
+        return self._char_readings[char]
 
     def _katakana_to_hiragana(self, text: str) -> str:
         """片假名轉平假名"""
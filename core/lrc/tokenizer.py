@@ -0,0 +1,78 @@
+"""
+LRC 逐行標記化
+
+作用：
+- 以預先編譯的單一正規表示式分派每一行：歌詞行（一或多個時間標記）或元資訊標記
+- 時間標記支援 [mm:ss]、[mm:ss.x]、[mm:ss.xx]、[mm:ss.xxx]，同一行可有多個（重複段落）
+- 輸入為任意可迭代的文字行（檔案物件、splitlines() 結果），不需一次讀入整份內容
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Tuple
+
+# 歌詞行
+TOKEN_LYRIC = 'lyric'
+# 元資訊（[ar:...]、[offset:...] 等）
+TOKEN_META = 'meta'
+
+# 小數位數 -> 除數
+FRACTION_SCALES = (1.0, 10.0, 100.0, 1000.0)
+
+# 單一時間標記（分, 秒, 小數）
+TIME_TAG_PATTERN = re.compile(r'\[(\d{2,}):(\d{2})(?:\.(\d{1,3}))?\]')
+# 整行分派：第一個時間標記 + 其餘時間標記 + 內容，或 [鍵:值]
+LINE_PATTERN = re.compile(
+    r'\[(\d{2,}):(\d{2})(?:\.(\d{1,3}))?\]'
+    r'((?:\[\d{2,}:\d{2}(?:\.\d{1,3})?\])*)(.*)'
+    r'|\[([A-Za-z#]+):(.*)\]'
+)
+
+
+@dataclass
+class LrcToken:
+    """一行 LRC 的標記結果"""
+
+    kind: str  # TOKEN_LYRIC / TOKEN_META
+    times: Tuple[float, ...] = ()  # 歌詞行的時間（秒，依出現順序）
+    text: str = ''  # 歌詞內容或元資訊值
+    key: str = ''  # 元資訊鍵（小寫）
+
+
+def tokenize(lines: Iterable[str]) -> Iterator[LrcToken]:
+    """逐行標記化（略過空行與無法辨識的行）"""
+    match_line = LINE_PATTERN.fullmatch
+    find_times = TIME_TAG_PATTERN.findall
+    for raw_line in lines:
+        line = raw_line.strip()
+        if line[:1] == '\ufeff':
+            # 說明：以非 utf-8-sig 開啟的檔案，第一行會帶 BOM
+            line = line[1:].lstrip()
+        if not line or line[0] != '[':
+            continue
+        match = match_line(line)
+        if match is None:
+            continue
+        minutes, seconds, fraction, more_tags, text, key, value = match.groups()
+        if key is not None:
+            yield LrcToken(TOKEN_META, text=value, key=key.lower())
+            continue
+        # 說明：多數行只有一個時間標記，直接換算；其餘標記才另外 findall
+        first = int(minutes) * 60 + int(seconds)
+        if fraction:
+            first += int(fraction) / FRACTION_SCALES[len(fraction)]
+        else:
+            first = float(first)
+        if more_tags:
+            times = (first,) + tuple(to_seconds(*fields) for fields in find_times(more_tags))
+        else:
+            times = (first,)
+        yield LrcToken(TOKEN_LYRIC, times, text)
+
+
+def to_seconds(minutes_str: str, seconds_str: str, fraction_str: str = '') -> float:
+    """時間欄位轉為秒數（小數 1 / 2 / 3 位分別為十分之一秒 / 百分之一秒 / 毫秒）"""
+    seconds = int(minutes_str) * 60 + int(seconds_str)
+    if fraction_str:
+        return seconds + int(fraction_str) / FRACTION_SCALES[len(fraction_str)]
+    return float(seconds)
@@ -4,11 +4,13 @@ LRC 驗證器
 作用：
 - 驗證時間軸順序
 - 驗證文字與假名對應
+- 掛上時間軸後依變更通知快取各行結果，只重新檢查變更的行
 """
 
-from dataclasses import dataclass
-from typing import List, Tuple
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
 
+from .events import LineCache
 from .model import LrcTimeline
 
 
@@ -22,95 +24,109 @@ class ValidationError:
     message: str  # 錯誤訊息
 
 
+@dataclass
+class _LineCheck:
+    """單行檢查結果（不含與前一行比較的時間順序）"""
+
+    issues: List[Tuple[int, str, str]] = field(default_factory=list)  # (詞索引, 類型, 訊息)
+    first_word: int = -1  # 第一個有開始時間的詞
+    first_start: Optional[float] = None  # 其開始時間
+    order_slot: int = 0  # 跨行時間順序錯誤在 issues 中的插入位置
+    last_start: Optional[float] = None  # 最後一個有開始時間的詞的開始時間
+
+
 class LrcValidator:
     """LRC 驗證器"""
 
+    def __init__(self):
+        # 各行檢查結果快取（attach 後啟用）
+        self._cache: Optional[LineCache] = None
+
+    def attach(self, timeline: LrcTimeline):
+        """訂閱時間軸變更，之後驗證同一時間軸只重新檢查變更的行"""
+        self.detach()
+        self._cache = LineCache(timeline)
+
+    def detach(self):
+        """取消訂閱並清空快取"""
+        if self._cache is not None:
+            self._cache.detach()
+        self._cache = None
+
     def validate(self, timeline: LrcTimeline) -> Tuple[bool, List[ValidationError]]:
         """驗證 LRC 時間軸內容"""
         errors: List[ValidationError] = []
         previous_start_time = None  # 前一個詞的開始時間
+        cache = self._cache if self._cache is not None and self._cache.timeline is timeline else None
+
+        for line_idx in range(len(timeline.lines)):
+            if cache is not None:
+                check = cache.get(line_idx, self._check_line)
+            else:
+                check = self._check_line(timeline.lines[line_idx])
 
-        for line_idx, line in enumerate(timeline.lines):
-            # 檢查空行
-            if not line.words:
-                errors.append(
-                    ValidationError(
-                        line_index=line_idx,
-                        word_index=-1,
-                        error_type='EMPTY_LINE',
-                        message='歌詞行為空',
-                    )
+            issues = check.issues
+            # 檢查時間順序（跨行全域遞增）
+            if (
+                previous_start_time is not None
+                and check.first_start is not None
+                and check.first_start < previous_start_time
+            ):
+                issues = list(issues)
+                issues.insert(
+                    check.order_slot,
+                    (check.first_word, 'TIME_ORDER', '時間戳倒序或重疊'),
                 )
-                continue
-
-            for word_idx, word in enumerate(line.words):
-                # 檢查文字是否為空
-                if not word.text:
-                    errors.append(
-                        ValidationError(
-                            line_index=line_idx,
-                            word_index=word_idx,
-                            error_type='EMPTY_TEXT',
-                            message='文字內容為空',
-                        )
-                    )
-
-                # 檢查時間有效性
-                if word.start_time is None or word.end_time is None:
-                    errors.append(
-                        ValidationError(
-                            line_index=line_idx,
-                            word_index=word_idx,
-                            error_type='TIME_MISSING',
-                            message='時間戳缺失',
-                        )
-                    )
-                else:
-                    if word.start_time < 0 or word.end_time < 0:
-                        errors.append(
-                            ValidationError(
-                                line_index=line_idx,
-                                word_index=word_idx,
-                                error_type='TIME_NEGATIVE',
-                                message='時間戳不可為負數',
-                            )
-                        )
-                    if word.end_time <= word.start_time:
-                        errors.append(
-                            ValidationError(
-                                line_index=line_idx,
-                                word_index=word_idx,
-                                error_type='TIME_RANGE',
-                                message='結束時間必須大於開始時間',
-                            )
-                        )
-
-                # 檢查時間順序（跨行全域遞增）
-                if (
-                    previous_start_time is not None
-                    and word.start_time is not None
-                    and word.start_time < previous_start_time
-                ):
-                    errors.append(
-                        ValidationError(
-                            line_index=line_idx,
-                            word_index=word_idx,
-                            error_type='TIME_ORDER',
-                            message='時間戳倒序或重疊',
-                        )
-                    )
-                if word.start_time is not None:
-                    previous_start_time = word.start_time
-
-                # 檢查漢字與假名對應
-                if word.ruby_pair and word.text != word.ruby_pair.kanji:
-                    errors.append(
-                        ValidationError(
-                            line_index=line_idx,
-                            word_index=word_idx,
-                            error_type='KANJI_RUBY_MISMATCH',
-                            message='漢字與假名對應不一致',
-                        )
-                    )
+            errors.extend(
+                ValidationError(
+                    line_index=line_idx,
+                    word_index=word_idx,
+                    error_type=error_type,
+                    message=message,
+                )
+                for word_idx, error_type, message in issues
+            )
+            if check.last_start is not None:
+                previous_start_time = check.last_start
 
         return len(errors) == 0, errors
+
+    def _check_line(self, line) -> _LineCheck:
+        """檢查單行（行內時間順序一併檢查）"""
+        check = _LineCheck()
+        issues = check.issues
+
+        # 檢查空行
+        if not line.words:
+            issues.append((-1, 'EMPTY_LINE', '歌詞行為空'))
+            return check
+
+        for word_idx, word in enumerate(line.words):
+            # 檢查文字是否為空
+            if not word.text:
+                issues.append((word_idx, 'EMPTY_TEXT', '文字內容為空'))
+
+            # 檢查時間有效性
+            if word.start_time is None or word.end_time is None:
+                issues.append((word_idx, 'TIME_MISSING', '時間戳缺失'))
+            else:
+                if word.start_time < 0 or word.end_time < 0:
+                    issues.append((word_idx, 'TIME_NEGATIVE', '時間戳不可為負數'))
+                if word.end_time <= word.start_time:
+                    issues.append((word_idx, 'TIME_RANGE', '結束時間必須大於開始時間'))
+
+            # 檢查時間順序（行內第一個詞留待與前一行比較）
+            if word.start_time is not None:
+                if check.first_start is None:
+                    check.first_word = word_idx
+                    check.first_start = word.start_time
+                    check.order_slot = len(issues)
+                elif word.start_time < check.last_start:
+                    issues.append((word_idx, 'TIME_ORDER', '時間戳倒序或重疊'))
+                check.last_start = word.start_time
+
+            # 檢查漢字與假名對應
+            if word.ruby_pair and word.text != word.ruby_pair.kanji:
+                issues.append((word_idx, 'KANJI_RUBY_MISMATCH', '漢字與假名對應不一致'))
+
+        return check
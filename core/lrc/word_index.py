@@ -0,0 +1,134 @@
+"""
+扁平詞索引
+
+作用：
+- 以 Fenwick tree（樹狀陣列）保存各行詞數，扁平序號與（行索引, 詞索引）互相轉換皆為 O(log n)
+- 單行詞數改變時 O(log n) 更新；行插入 / 刪除時以 O(n) 線性建樹（不再為每個詞建立 tuple 與 dict）
+- 可掛上時間軸，依變更通知自動更新
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from .events import LINES_INSERTED, LINES_REMOVED, LINES_REPLACED, RESET, TimelineChange
+
+
+class FlatWordIndex:
+    """扁平詞序號 <-> (行索引, 詞索引)"""
+
+    def __init__(self, timeline=None):
+        # 訂閱中的時間軸
+        self.timeline = None
+        # 各行詞數
+        self._counts: List[int] = []
+        # Fenwick tree（1-based，tree[i] 為 (i - lowbit(i), i] 行的詞數和）
+        self._tree: List[int] = [0]
+        # 總詞數
+        self._total = 0
+        if timeline is not None:
+            self.attach(timeline)
+
+    def attach(self, timeline):
+        """改為索引指定時間軸並訂閱變更"""
+        self.detach()
+        self.timeline = timeline
+        self.rebuild([len(line.words) for line in timeline.lines])
+        timeline.subscribe(self._on_change)
+
+    def detach(self):
+        """取消訂閱並清空"""
+        if self.timeline is not None:
+            self.timeline.unsubscribe(self._on_change)
+        self.timeline = None
+        self.rebuild([])
+
+    def rebuild(self, counts: Sequence[int]):
+        """由各行詞數重新建樹（O(n)）"""
+        self._counts = list(counts)
+        size = len(self._counts)
+        tree = [0] + self._counts
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._total = sum(self._counts)
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def line_count(self) -> int:
+        return len(self._counts)
+
+    def word_count(self, line_idx: int) -> int:
+        """行的詞數"""
+        return self._counts[line_idx]
+
+    def line_offset(self, line_idx: int) -> int:
+        """行第一個詞的扁平序號（= 前面各行詞數和）"""
+        total = 0
+        i = min(line_idx, len(self._counts))
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def to_flat(self, line_idx: int, word_idx: int) -> Optional[int]:
+        """（行索引, 詞索引）-> 扁平序號（不存在時為 None）"""
+        if not 0 <= line_idx < len(self._counts) or not 0 <= word_idx < self._counts[line_idx]:
+            return None
+        return self.line_offset(line_idx) + word_idx
+
+    def to_ref(self, flat: int) -> Optional[Tuple[int, int]]:
+        """扁平序號 -> （行索引, 詞索引）（超出範圍時為 None）"""
+        if not 0 <= flat < self._total:
+            return None
+        # 說明：由最高位往下逐位決定，找出前綴和 <= flat 的最後一行（空行自然被略過）
+        size = len(self._counts)
+        position = 0
+        remaining = flat
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            candidate = position + step
+            if candidate <= size and self._tree[candidate] <= remaining:
+                position = candidate
+                remaining -= self._tree[candidate]
+            step >>= 1
+        return position, remaining
+
+    def set_count(self, line_idx: int, count: int):
+        """修改單行詞數（O(log n)）"""
+        delta = count - self._counts[line_idx]
+        if not delta:
+            return
+        self._counts[line_idx] = count
+        self._total += delta
+        i = line_idx + 1
+        size = len(self._counts)
+        while i <= size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def insert_lines(self, index: int, counts: Sequence[int]):
+        """插入行（重新建樹）"""
+        self.rebuild(self._counts[:index] + list(counts) + self._counts[index:])
+
+    def remove_lines(self, start: int, stop: int):
+        """刪除 start:stop 的行（重新建樹）"""
+        self.rebuild(self._counts[:start] + self._counts[stop:])
+
+    def _on_change(self, change: TimelineChange):
+        """依時間軸變更通知更新"""
+        lines = self.timeline.lines
+        if change.kind == LINES_INSERTED:
+            self.insert_lines(change.start, [len(lines[i].words) for i in change.lines])
+        elif change.kind == LINES_REMOVED:
+            self.remove_lines(change.start, change.stop)
+        elif change.kind == LINES_REPLACED:
+            for line_idx in change.lines:
+                self.set_count(line_idx, len(lines[line_idx].words))
+        elif change.kind == RESET:
+            self.rebuild([len(line.words) for line in lines])
+        if len(self._counts) != len(lines):
+            # 說明：有人直接修改 lines 而未通知時，整體重建
+            self.rebuild([len(line.words) for line in lines])
@@ -3,7 +3,9 @@ LRC 寫入器
 
 作用：
 - 將 LrcTimeline 轉為 LRC 字串
+- 預設輸出增強格式（每句一行，行內以 <mm:ss.xx> 標記每個詞的開始與結束）
 - 寫入 LRC 檔案（UTF-8-SIG）
+- 尚未打點的歌詞可輸出為 TXT（每句一行，漢字以 {假名} 標注）
 """
 
 from .model import LrcTimeline
@@ -12,6 +14,10 @@ from .model import LrcTimeline
 class LrcWriter:
     """LRC 文件寫入器"""
 
+    def __init__(self, enhanced: bool = True):
+        # 是否輸出增強格式（False 時每個詞輸出一行，不含結束時間）
+        self.enhanced = enhanced
+
     def write_file(self, timeline: LrcTimeline, file_path: str):
         """寫入 LRC 檔案（UTF-8-SIG）"""
         content = self.to_string(timeline)
@@ -19,6 +25,38 @@ class LrcWriter:
         with open(file_path, 'w', encoding='utf-8-sig') as file_handle:
             file_handle.write(content)
 
+    def write_txt_file(self, timeline: LrcTimeline, file_path: str):
+        """寫入 TXT 歌詞檔案（UTF-8-SIG，不含時間）"""
+        with open(file_path, 'w', encoding='utf-8-sig') as file_handle:
+            file_handle.write(self.to_txt_string(timeline))
+
+    def to_txt_string(self, timeline: LrcTimeline) -> str:
+        """將時間軸轉為 TXT 字串（每句一行，文字{假名}，可由 LrcParser.parse_txt_string 載入）"""
+        return '\n'.join(
+            self._format_txt_line(line)
+            for line in timeline.lines
+            if line.words
+        )
+
+    def _format_txt_line(self, line) -> str:
+        """
+        輸出 TXT 的一句
+
+        {假名} 標注的是前一個 } 之後的所有文字，有假名的詞之前的無假名詞各自以空的 {} 結束
+        （否則載入時假名會標在整段上，或多個無假名詞合併為一個詞）。
+        """
+        words = line.words
+        last_ruby = max(
+            (index for index, word in enumerate(words) if self._format_ruby(word)), default=-1
+        )
+        parts = []
+        for index, word in enumerate(words):
+            ruby = self._format_ruby(word)
+            if not ruby and index < last_ruby:
+                ruby = '{}'
+            parts.append(f"{word.text}{ruby}")
+        return ''.join(parts)
+
     def to_string(self, timeline: LrcTimeline) -> str:
         """將時間軸轉為 LRC 字串"""
         lines = []
@@ -34,6 +72,10 @@ class LrcWriter:
             lines.append(f"[ti:{title}]")
         if album:
             lines.append(f"[al:{album}]")
+        # 其他元資訊標記（例如 [by:]、[length:]）原樣輸出
+        for key, value in timeline.metadata.items():
+            if key not in ('artist', 'title', 'album') and value:
+                lines.append(f"[{key}:{value}]")
         if timeline.offset:
             offset_ms = int(round(timeline.offset * 1000))
             lines.append(f"[offset:{offset_ms}]")
@@ -41,20 +83,52 @@ class LrcWriter:
         # 空行分隔
         lines.append('')
 
+        if self.enhanced:
+            # 歌詞行（以句為單位輸出）
+            for line in timeline.lines:
+                if line.words:
+                    lines.append(self._format_enhanced_line(line))
+            return '\n'.join(lines)
+
         # 歌詞行（以詞為單位輸出）
         for line in timeline.lines:
             for word in line.words:
                 timestamp = self._format_timestamp(word.start_time)
-                ruby_text = ''
-                if word.ruby_pair and word.ruby_pair.ruby != '':
-                    ruby_text = f"{{{word.ruby_pair.ruby}}}"
-                lines.append(f"[{timestamp}]{word.text}{ruby_text}")
+                lines.append(f"[{timestamp}]{word.text}{self._format_ruby(word)}")
 
         return '\n'.join(lines)
 
+    def _format_enhanced_line(self, line) -> str:
+        """
+        輸出增強格式的一句：[行開始]詞{假名}<詞開始>詞...<結束>
+
+        第一個詞的開始即行開始，不重複標記；詞的結束時間與下一個詞的開始時間不同時
+        （間隔或重疊），在詞後補一個不帶文字的 <結束> 標記；最後一個詞一律補上結束標記。
+        """
+        words = line.words
+        parts = [f"[{self._format_timestamp(words[0].start_time)}]"]
+        for index, word in enumerate(words):
+            if index > 0:
+                parts.append(f"<{self._format_timestamp(word.start_time)}>")
+            parts.append(f"{word.text}{self._format_ruby(word)}")
+            end_stamp = self._format_timestamp(word.end_time)
+            if index + 1 == len(words) or end_stamp != self._format_timestamp(
+                words[index + 1].start_time
+            ):
+                parts.append(f"<{end_stamp}>")
+        return ''.join(parts)
+
+    def _format_ruby(self, word) -> str:
+        """詞的假名標注 {假名}（無假名時為空字串）"""
+        if word.ruby_pair and word.ruby_pair.ruby != '':
+            return f"{{{word.ruby_pair.ruby}}}"
+        return ''
+
     def _format_timestamp(self, seconds: float) -> str:
-        """將秒數格式化為 mm:ss.xx"""
-        minutes = int(seconds) // 60
-        secs = int(seconds) % 60
-        centisecs = int(round((seconds % 1) * 100))
-        return f"{minutes:02d}:{secs:02d}.{centisecs:02d}"
+        """將秒數格式化為 mm:ss.xx（非整百分之一秒時為 mm:ss.xxx）"""
+        total_ms = int(round(max(0.0, seconds) * 1000))
+        minutes, rest_ms = divmod(total_ms, 60000)
+        secs, millis = divmod(rest_ms, 1000)
+        if millis % 10 == 0:
+            return f"{minutes:02d}:{secs:02d}.{millis // 10:02d}"
+        return f"{minutes:02d}:{secs:02d}.{millis:03d}"
@@ -1,10 +1,13 @@
 """
 LRC -> ASS 轉換器
+
+掛上時間軸後依變更通知快取各行的 karaoke 文字，只重新組合變更的行。
 """
 
 from typing import Dict, Optional
 
 from core.lrc import LrcTimeline
+from core.lrc.events import LineCache
 from .config import SubtitleConfig
 
 
@@ -13,6 +16,19 @@ class LrcToAssConverter:
 
     def __init__(self, config: Optional[Dict] = None):
         self.config = SubtitleConfig.from_dict(config) if config else SubtitleConfig()
+        # 各行事件內容快取（attach 後啟用）
+        self._cache: Optional[LineCache] = None
+
+    def attach(self, timeline: LrcTimeline):
+        """訂閱時間軸變更，之後轉換同一時間軸只重新組合變更的行"""
+        self.detach()
+        self._cache = LineCache(timeline)
+
+    def detach(self):
+        """取消訂閱並清空快取"""
+        if self._cache is not None:
+            self._cache.detach()
+        self._cache = None
 
     def convert(self, timeline: LrcTimeline) -> str:
         """轉換為 ASS 內容"""
@@ -122,21 +138,20 @@ class LrcToAssConverter:
         ]
 
         enabled_groups = self._get_enabled_groups()
+        cache = self._cache if self._cache is not None and self._cache.timeline is timeline else None
 
-        for line_idx, line in enumerate(timeline.lines):
-            if not line.words:
+        for line_idx in range(len(timeline.lines)):
+            if cache is not None:
+                parts = cache.get(line_idx, self._build_line_parts)
+            else:
+                parts = self._build_line_parts(timeline.lines[line_idx])
+            if parts is None:
                 continue
 
-            group_id = line.group_id if line.group_id in enabled_groups else enabled_groups[0]
+            line_group, line_start, end_time, karaoke_text, ruby_text, has_ruby = parts
+            group_id = line_group if line_group in enabled_groups else enabled_groups[0]
             position = 'Top' if line_idx % 2 == 0 else 'Bottom'
             style_name = f"{group_id}_{position}"
-            start_time = line.words[0].start_time
-            end_time = line.words[-1].end_time + self.config.tail_hold_sec
-
-            lead_in = max(0.0, self.config.lead_in_sec)
-            line_start = max(0.0, start_time - lead_in)
-
-            karaoke_text = self._build_karaoke_text(line, line_start)
             dialogue = (
                 f"Dialogue: 0,{self._format_ass_time(line_start)},"
                 f"{self._format_ass_time(end_time)},{style_name},,0,0,0,,"
@@ -144,7 +159,6 @@ class LrcToAssConverter:
             )
             lines.append(dialogue)
 
-            ruby_text, has_ruby = self._build_ruby_text(line, line_start)
             if has_ruby:
                 ruby_style = f"{group_id}_Ruby{position}"
                 ruby_dialogue = (
@@ -156,6 +170,20 @@ class LrcToAssConverter:
 
         return '\n'.join(lines)
 
+    def _build_line_parts(self, line) -> Optional[tuple]:
+        """組合單行與位置無關的內容（群組, 開始, 結束, karaoke 文字, Ruby 文字, 是否有 Ruby）"""
+        if not line.words:
+            return None
+        start_time = line.words[0].start_time
+        end_time = line.words[-1].end_time + self.config.tail_hold_sec
+
+        lead_in = max(0.0, self.config.lead_in_sec)
+        line_start = max(0.0, start_time - lead_in)
+
+        karaoke_text = self._build_karaoke_text(line, line_start)
+        ruby_text, has_ruby = self._build_ruby_text(line, line_start)
+        return line.group_id, line_start, end_time, karaoke_text, ruby_text, has_ruby
+
     def _rgb_to_ass(self, rgb_hex: str) -> str:
         """RGB #RRGGBB -> ASS &H00BBGGRR"""
         rgb = rgb_hex.lstrip('#')
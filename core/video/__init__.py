@@ -2,8 +2,38 @@
 Video module exports
 """
 
+from .farm import FarmWorkerServer, RenderFarm
+from .history import RenderHistory, RenderRecord, get_render_history
+from .probe import MediaInfo, MediaProbe, get_media_probe
+from .profile import (
+    EncodeProfile,
+    RenderTarget,
+    PROFILE_MASTER,
+    PROFILE_WEB,
+    PROFILE_PREVIEW,
+    PROFILE_PROXY,
+)
+from .proxy import ProxyGenerator
+from .qa import QaFrame, QaFrameExtractor
 from .renderer import VideoRenderer
 
 __all__ = [
+    'FarmWorkerServer',
+    'RenderFarm',
+    'RenderHistory',
+    'RenderRecord',
+    'get_render_history',
+    'MediaInfo',
+    'MediaProbe',
+    'get_media_probe',
+    'EncodeProfile',
+    'RenderTarget',
+    'PROFILE_MASTER',
+    'PROFILE_WEB',
+    'PROFILE_PREVIEW',
+    'PROFILE_PROXY',
+    'ProxyGenerator',
+    'QaFrame',
+    'QaFrameExtractor',
     'VideoRenderer',
 ]
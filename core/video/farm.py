@@ -0,0 +1,440 @@
+"""
+區網分散式渲染（render farm）
+
+作用：
+- 將分段渲染中需要重新編碼的區段派送到區網內的渲染節點
+- 節點收到區段原始影像（串流複製切出）、ASS 與編碼設定，編碼後分塊回傳
+- 各節點自行從共用佇列取工作（快的節點自然分到較多區段），失敗重試、逾時放棄
+- 佇列清空後，閒置節點會重複執行拖太久的區段，先完成者採用
+
+通訊協定（TCP）：
+- 每則訊息為 4 bytes 大端序表頭長度 + JSON 表頭 + 表頭 size 指定長度的資料
+- 節點預設只監聽 127.0.0.1；開放區網需明確指定 --host（僅供信任的區網使用，節點會以收到的 ASS 執行 FFmpeg）
+- 設定共用金鑰（--token / BOOKARA_RENDER_FARM_TOKEN）時，表頭 token 不符的工作一律拒絕
+
+逾時：
+- 連線與傳輸使用固定逾時；等待節點編碼完成則依區段長度給予期限（長區段不會被誤判為失敗）
+
+本機測試：
+    python -m core.video.farm --port 9400
+    python -m core.video.farm --host 0.0.0.0 --token <共用金鑰>   # 開放區網
+"""
+
+import hmac
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, List, Optional, Tuple
+
+from core.cancellation import CancellationToken
+
+from .profile import EncodeProfile
+from .segments import Segment
+
+logger = logging.getLogger(__name__)
+
+# 預設節點連接埠
+DEFAULT_FARM_PORT = 9400
+# 預設監聽位址（只接受本機連線；開放區網需明確指定）
+DEFAULT_FARM_HOST = '127.0.0.1'
+# 資料傳輸分塊大小
+CHUNK_SIZE = 1024 * 1024
+# 表頭長度上限（避免讀到錯誤資料時配置過大記憶體）
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+# 節點端接收區段 / 回傳結果的讀寫逾時（秒；避免斷線的連線佔住編碼名額）
+WORKER_IO_TIMEOUT = 60.0
+
+
+def send_message(sock: socket.socket, header: dict, payload_path: Optional[str] = None):
+    """送出表頭與（選用的）檔案內容"""
+    header = dict(header)
+    header['size'] = os.path.getsize(payload_path) if payload_path else 0
+    encoded = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(encoded)) + encoded)
+    if payload_path:
+        with open(payload_path, 'rb') as file_handle:
+            while True:
+                chunk = file_handle.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sock.sendall(chunk)
+
+
+def recv_header(sock: socket.socket) -> dict:
+    """讀取表頭"""
+    (length,) = struct.unpack('>I', _recv_exact(sock, 4))
+    if length > MAX_HEADER_BYTES:
+        raise ConnectionError(f"Header too large: {length}")
+    return json.loads(_recv_exact(sock, length).decode('utf-8'))
+
+
+def recv_payload(sock: socket.socket, size: int, file_handle: BinaryIO):
+    """讀取指定長度的資料並寫入檔案"""
+    remaining = size
+    while remaining > 0:
+        chunk = sock.recv(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise ConnectionError("Connection closed during payload")
+        file_handle.write(chunk)
+        remaining -= len(chunk)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """讀取剛好 size bytes"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def parse_endpoint(endpoint: str) -> Tuple[str, int]:
+    """'host:port' -> (host, port)"""
+    host, _, port = endpoint.rpartition(':')
+    if not host:
+        return endpoint, DEFAULT_FARM_PORT
+    return host, int(port)
+
+
+def encode_with_ffmpeg(source_path: str, ass_path: str, segment: Segment, profile: EncodeProfile) -> bool:
+    """節點預設的編碼方式：燒入字幕並編碼到 segment.path"""
+    # 延遲載入避免循環匯入
+    from .renderer import VideoRenderer
+
+    return VideoRenderer()._encode_segment(source_path, ass_path, segment, profile, seek=False)
+
+
+class _EncodeHandler(socketserver.BaseRequestHandler):
+    """節點端：接收區段並回傳編碼結果"""
+
+    def handle(self):
+        server: 'FarmWorkerServer' = self.server
+        self.request.settimeout(WORKER_IO_TIMEOUT)
+        with server.slots:
+            with tempfile.TemporaryDirectory(prefix='farm_', dir=server.work_dir) as work_dir:
+                try:
+                    self._encode(work_dir)
+                except Exception as e:
+                    logger.error(f"Farm job failed: {e}")
+                    try:
+                        send_message(self.request, {'ok': False, 'error': str(e)})
+                    except OSError:
+                        pass
+
+    def _encode(self, work_dir: str):
+        server: 'FarmWorkerServer' = self.server
+        header = recv_header(self.request)
+        if server.token and not hmac.compare_digest(str(header.get('token', '')), server.token):
+            logger.warning(f"Farm job rejected from {self.client_address[0]}: bad token")
+            send_message(self.request, {'ok': False, 'error': 'unauthorized'})
+            return
+        source_path = os.path.join(work_dir, 'source.mkv')
+        with open(source_path, 'wb') as file_handle:
+            recv_payload(self.request, header['size'], file_handle)
+        ass_path = os.path.join(work_dir, 'subtitles.ass')
+        with open(ass_path, 'w', encoding='utf-8') as file_handle:
+            file_handle.write(header['ass'])
+
+        segment = Segment(
+            index=header['index'],
+            start=header['start'],
+            end=header['end'],
+            key=header.get('key', ''),
+            path=os.path.join(work_dir, 'encoded.mp4'),
+        )
+        profile = EncodeProfile.from_dict(header.get('profile'))
+        started = time.time()
+        if not server.encoder(source_path, ass_path, segment, profile):
+            send_message(self.request, {'ok': False, 'error': 'FFmpeg encode failed'})
+            return
+        logger.info(f"Farm segment {segment.index} encoded in {time.time() - started:.1f}s")
+        send_message(self.request, {'ok': True}, segment.path)
+
+
+class FarmWorkerServer(socketserver.ThreadingTCPServer):
+    """渲染節點（同時執行數量由 slots 限制；port 為 0 時由系統指定，見 server_address）"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host: str = DEFAULT_FARM_HOST, port: int = DEFAULT_FARM_PORT,
+                 slots: int = 1, work_dir: Optional[str] = None, token: str = '',
+                 encoder: Optional[Callable[[str, str, Segment, EncodeProfile], bool]] = None):
+        super().__init__((host, port), _EncodeHandler)
+        # 同時編碼數量（FFmpeg 本身會使用多核心，預設一次一個）
+        self.slots = threading.Semaphore(max(1, slots))
+        # 暫存資料夾
+        self.work_dir = work_dir
+        # 共用金鑰（空字串表示不檢查）
+        self.token = token
+        # 編碼方式（source_path, ass_path, segment, profile）-> 是否成功；結果寫到 segment.path
+        self.encoder = encoder or encode_with_ffmpeg
+
+
+@dataclass
+class _SegmentState:
+    """派送中的區段狀態"""
+
+    segment: Segment
+    attempts: int = 0  # 已失敗次數
+    failed_on: set = field(default_factory=set)  # 曾失敗的節點（重試時優先換節點）
+    running: List[float] = field(default_factory=list)  # 執行中副本的開始時間
+    done: bool = False
+    failed: bool = False
+
+
+class RenderFarm:
+    """將區段派送到多個渲染節點"""
+
+    def __init__(
+        self,
+        endpoints: List[str],
+        connect_timeout: float = 10.0,
+        io_timeout: float = 60.0,
+        job_timeout_base: float = 120.0,
+        job_timeout_per_sec: float = 30.0,
+        retries: int = 2,
+        straggler_factor: float = 2.0,
+        max_worker_failures: int = 3,
+        token: str = '',
+    ):
+        # 節點列表（host:port）
+        self.endpoints = [parse_endpoint(endpoint) for endpoint in endpoints]
+        # 連線逾時（秒）
+        self.connect_timeout = connect_timeout
+        # 傳送區段 / 接收結果時單次讀寫逾時（秒）
+        self.io_timeout = io_timeout
+        # 等待節點編碼完成的期限：基本秒數 + 每秒影片的秒數
+        self.job_timeout_base = job_timeout_base
+        self.job_timeout_per_sec = job_timeout_per_sec
+        # 共用金鑰（節點有設定時需一致）
+        self.token = token
+        # 每個區段的重試次數
+        self.retries = retries
+        # 執行時間超過已完成區段中位數的幾倍視為拖延，可重複派送
+        self.straggler_factor = straggler_factor
+        # 節點連續失敗幾次後停用
+        self.max_worker_failures = max_worker_failures
+
+    def job_timeout(self, segment: Segment) -> float:
+        """等待節點編碼一個區段的期限（秒，依區段長度）"""
+        return self.job_timeout_base + segment.duration * self.job_timeout_per_sec
+
+    def encode_segments(
+        self,
+        video_path: str,
+        subtitle_path: str,
+        segments: List[Segment],
+        profile: EncodeProfile,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[Segment]:
+        """
+        派送並等待所有區段完成（取消時中斷連線並立即返回）
+
+        Returns:
+            未能在節點上完成的區段（呼叫端可改為本機編碼）
+        """
+        if not segments or not self.endpoints:
+            return list(segments)
+
+        with open(subtitle_path, 'r', encoding='utf-8') as file_handle:
+            ass_content = file_handle.read()
+
+        states = [_SegmentState(segment) for segment in segments]
+        condition = threading.Condition()
+        durations: List[float] = []  # 已完成區段的耗時（判斷拖延用）
+        live = set(self.endpoints)  # 尚未停用的節點
+
+        def cancelled() -> bool:
+            return bool(cancel_token and cancel_token.is_cancelled)
+        total = sum(segment.duration for segment in segments) or 1.0
+
+        def report():
+            if progress_callback:
+                done = sum(state.segment.duration for state in states if state.done)
+                progress_callback(int(done / total * 100))
+
+        def next_state(endpoint: Tuple[str, int]) -> Optional[_SegmentState]:
+            """挑選下一個工作：先取未派送者，其次重複派送拖延者（需持有鎖）"""
+            for state in states:
+                if state.done or state.failed or state.running:
+                    continue
+                if endpoint in state.failed_on and live - state.failed_on:
+                    continue
+                return state
+            if not durations:
+                return None
+            median = sorted(durations)[len(durations) // 2]
+            now = time.time()
+            for state in states:
+                if state.done or state.failed or len(state.running) != 1:
+                    continue
+                if now - state.running[0] > median * self.straggler_factor:
+                    logger.info(f"Speculatively re-dispatching segment {state.segment.index}")
+                    return state
+            return None
+
+        def worker_loop(endpoint: Tuple[str, int]):
+            failures = 0
+            while failures < self.max_worker_failures:
+                with condition:
+                    state = next_state(endpoint)
+                    while state is None:
+                        if cancelled() or all(s.done or s.failed for s in states):
+                            return
+                        condition.wait(0.5)
+                        state = next_state(endpoint)
+                    if cancelled():
+                        return
+                    started = time.time()
+                    state.running.append(started)
+
+                ok = self._dispatch(
+                    endpoint, video_path, ass_content, state, profile, condition, cancel_token
+                )
+
+                with condition:
+                    state.running.remove(started)
+                    if ok:
+                        failures = 0
+                        durations.append(time.time() - started)
+                    elif not state.done:
+                        failures += 1
+                        state.attempts += 1
+                        state.failed_on.add(endpoint)
+                        if state.attempts > self.retries and not state.running:
+                            state.failed = True
+                    condition.notify_all()
+                report()
+            with condition:
+                live.discard(endpoint)
+                condition.notify_all()
+            logger.warning(f"Farm worker {endpoint[0]}:{endpoint[1]} disabled after repeated failures")
+
+        threads = [
+            threading.Thread(target=worker_loop, args=(endpoint,), daemon=True)
+            for endpoint in self.endpoints
+        ]
+        for thread in threads:
+            thread.start()
+        # 不等待被淘汰的重複副本（其結果會被丟棄）
+        with condition:
+            while any(thread.is_alive() for thread in threads):
+                if cancelled() or all(state.done or state.failed for state in states):
+                    break
+                condition.wait(0.5)
+
+        return [state.segment for state in states if not state.done]
+
+    def _dispatch(
+        self,
+        endpoint: Tuple[str, int],
+        video_path: str,
+        ass_content: str,
+        state: _SegmentState,
+        profile: EncodeProfile,
+        condition: threading.Condition,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """切出區段原始影像、送到節點並接收結果（先完成的副本寫入快取）"""
+        segment = state.segment
+        with tempfile.TemporaryDirectory(prefix='farm_send_') as work_dir:
+            source_path = os.path.join(work_dir, 'source.mkv')
+            if not self._cut_source(video_path, segment, source_path):
+                return False
+
+            result_path = os.path.join(work_dir, 'encoded.mp4')
+            header = {
+                'index': segment.index,
+                'start': segment.start,
+                'end': segment.end,
+                'key': segment.key,
+                'profile': profile.to_dict(),
+                'ass': ass_content,
+                'token': self.token,
+            }
+            try:
+                with socket.create_connection(endpoint, timeout=self.connect_timeout) as sock:
+                    unregister = cancel_token.on_cancel(sock.close) if cancel_token else None
+                    try:
+                        sock.settimeout(self.io_timeout)
+                        send_message(sock, header, source_path)
+                        # 說明：節點收完資料才開始編碼，回覆表頭要等編碼結束，期限依區段長度
+                        sock.settimeout(self.job_timeout(segment))
+                        reply = recv_header(sock)
+                        sock.settimeout(self.io_timeout)
+                        if not reply.get('ok'):
+                            logger.warning(
+                                f"Farm worker {endpoint[0]}:{endpoint[1]} failed segment "
+                                f"{segment.index}: {reply.get('error')}"
+                            )
+                            return False
+                        with open(result_path, 'wb') as file_handle:
+                            recv_payload(sock, reply['size'], file_handle)
+                    finally:
+                        if unregister:
+                            unregister()
+            except (OSError, ConnectionError, ValueError) as e:
+                logger.warning(f"Farm worker {endpoint[0]}:{endpoint[1]} error on segment {segment.index}: {e}")
+                return False
+
+            with condition:
+                if not state.done:
+                    os.replace(result_path, segment.path)
+                    state.done = True
+        return True
+
+    def _cut_source(self, video_path: str, segment: Segment, output_path: str) -> bool:
+        """以串流複製切出區段原始影像（區段起點已對齊關鍵影格）"""
+        cmd = [
+            'ffmpeg',
+            '-ss', f"{segment.start:.6f}",
+            '-i', video_path,
+            '-t', f"{segment.duration:.6f}",
+            '-map', '0:v:0',
+            '-c', 'copy',
+            '-an',
+            '-y',
+            output_path,
+        ]
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        return result.returncode == 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description='Render farm worker')
+    parser.add_argument('--host', default=DEFAULT_FARM_HOST, help='監聽位址（開放區網請指定 0.0.0.0 並設定 --token）')
+    parser.add_argument('--port', type=int, default=DEFAULT_FARM_PORT)
+    parser.add_argument('--slots', type=int, default=1)
+    parser.add_argument('--token', default=os.environ.get('BOOKARA_RENDER_FARM_TOKEN', ''), help='共用金鑰')
+    args = parser.parse_args()
+
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not args.token:
+        logger.warning("Render farm worker is reachable from the network without a token")
+    server = FarmWorkerServer(args.host, args.port, args.slots, token=args.token)
+    logger.info(f"Render farm worker listening on {args.host}:{args.port} ({args.slots} slots)")
+    server.serve_forever()
@@ -0,0 +1,243 @@
+"""
+渲染歷史與預估時間
+
+作用：
+- 每次輸出完成後記錄來源解析度、長度、影格率、編碼設定與實際耗時（SQLite）
+- 以歷史資料做最小平方法迴歸（耗時 = a + b × 工作量），在開始前預估輸出時間
+- 輸出進行中結合預估值與目前速度，推算剩餘時間
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+import config
+
+from .probe import MediaInfo
+from .profile import EncodeProfile
+
+logger = logging.getLogger(__name__)
+
+# 預設影格率（無法取得時）
+DEFAULT_FRAME_RATE = 30.0
+# 迴歸使用的最近紀錄數
+HISTORY_WINDOW = 200
+
+
+@dataclass
+class RenderRecord:
+    """單次輸出紀錄"""
+
+    source_width: int
+    source_height: int
+    frame_rate: float
+    duration: float  # 實際編碼的影片秒數（分段輸出時為重新編碼的區段總長）
+    profile_name: str
+    preset: str
+    output_height: int  # 輸出高度（0 表示與來源相同）
+    mode: str  # full / incremental
+    wall_time: float  # 實際耗時（秒）
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def workload(self) -> float:
+        """工作量（百萬像素 × 影格數）"""
+        return render_workload(
+            self.source_width, self.source_height, self.frame_rate, self.duration, self.output_height
+        )
+
+    @property
+    def encode_fps(self) -> float:
+        """實際編碼速度（影格 / 秒）"""
+        if self.wall_time <= 0:
+            return 0.0
+        return self.duration * self.frame_rate / self.wall_time
+
+
+def render_workload(
+    source_width: int,
+    source_height: int,
+    frame_rate: Optional[float],
+    duration: float,
+    output_height: int = 0,
+) -> float:
+    """以輸出解析度計算工作量（百萬像素 × 影格數）"""
+    width, height = source_width or 1920, source_height or 1080
+    if output_height and height:
+        width = width * output_height / height
+        height = output_height
+    frames = duration * (frame_rate or DEFAULT_FRAME_RATE)
+    return width * height * frames / 1_000_000
+
+
+def estimate_remaining(
+    predicted_total: Optional[float],
+    elapsed: float,
+    progress: int,
+) -> Optional[float]:
+    """
+    推算剩餘秒數
+
+    進度越高越相信目前速度，進度低時以歷史預估為主。
+    """
+    live = None
+    if progress > 0:
+        live = elapsed * (100 - progress) / progress
+    if predicted_total is None:
+        return live
+    predicted_left = max(0.0, predicted_total - elapsed)
+    if live is None:
+        return predicted_left
+    weight = min(1.0, progress / 100 * 2)  # 50% 後完全使用目前速度
+    return (1 - weight) * predicted_left + weight * live
+
+
+class RenderHistory:
+    """渲染歷史（SQLite）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        # 資料庫路徑
+        self.db_path = db_path or str(config.RENDER_HISTORY_PATH)
+        # 寫入鎖
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def record(self, record: RenderRecord):
+        """新增紀錄"""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    'INSERT INTO render_history ('
+                    'source_width, source_height, frame_rate, duration, profile_name, '
+                    'preset, output_height, mode, wall_time, created_at'
+                    ') VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        record.source_width,
+                        record.source_height,
+                        record.frame_rate,
+                        record.duration,
+                        record.profile_name,
+                        record.preset,
+                        record.output_height,
+                        record.mode,
+                        record.wall_time,
+                        record.created_at,
+                    ),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Render history write failed: {e}")
+
+    def records(self, limit: int = HISTORY_WINDOW) -> List[RenderRecord]:
+        """最近的紀錄（新到舊）"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    'SELECT source_width, source_height, frame_rate, duration, profile_name, '
+                    'preset, output_height, mode, wall_time, created_at '
+                    'FROM render_history ORDER BY created_at DESC LIMIT ?',
+                    (limit,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Render history read failed: {e}")
+            return []
+        return [RenderRecord(*row) for row in rows]
+
+    def predict(
+        self,
+        media_info: MediaInfo,
+        profile: EncodeProfile,
+        duration: Optional[float] = None,
+        mode: str = 'full',
+    ) -> Optional[float]:
+        """
+        預估輸出耗時（秒，無歷史資料時回傳 None）
+
+        Args:
+            duration: 需編碼的秒數（預設為整部影片）
+            mode: 輸出方式（相同方式與 preset 的紀錄足夠時只用這些紀錄）
+        """
+        duration = duration if duration is not None else media_info.duration
+        if not duration:
+            return None
+        workload = render_workload(
+            media_info.width, media_info.height, media_info.frame_rate, duration, profile.height
+        )
+
+        history = self.records()
+        preset = profile.preset or ''
+        similar = [r for r in history if r.preset == preset and r.mode == mode]
+        samples = similar if len(similar) >= 3 else history
+        fit = fit_linear([(r.workload, r.wall_time) for r in samples])
+        if fit is None:
+            return None
+        intercept, slope = fit
+        return max(0.0, intercept + slope * workload)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """建立資料庫連線（每次操作獨立連線，跨執行緒安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """建立資料表"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS render_history ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'source_width INTEGER, '
+                'source_height INTEGER, '
+                'frame_rate REAL, '
+                'duration REAL NOT NULL, '
+                'profile_name TEXT, '
+                'preset TEXT, '
+                'output_height INTEGER, '
+                'mode TEXT, '
+                'wall_time REAL NOT NULL, '
+                'created_at REAL NOT NULL)'
+            )
+
+
+def fit_linear(points: List[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """
+    最小平方法擬合 y = a + b·x
+
+    Returns:
+        (a, b)；只有一筆或 x 全相同時改用通過原點的比例（a = 0）
+    """
+    points = [(x, y) for x, y in points if x > 0 and y > 0]
+    if not points:
+        return None
+    count = len(points)
+    mean_x = sum(x for x, _ in points) / count
+    mean_y = sum(y for _, y in points) / count
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if count < 2 or variance <= 0:
+        return 0.0, mean_y / mean_x
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+    if slope <= 0:
+        return 0.0, mean_y / mean_x
+    return mean_y - slope * mean_x, slope
+
+
+_shared_history: Optional[RenderHistory] = None
+
+
+def get_render_history() -> RenderHistory:
+    """取得共用的渲染歷史"""
+    global _shared_history
+    if _shared_history is None:
+        _shared_history = RenderHistory()
+    return _shared_history
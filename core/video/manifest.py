@@ -0,0 +1,101 @@
+"""
+輸出紀錄（manifest）
+
+作用：
+- 在輸出影片旁記錄影像來源、字幕與影像編碼設定的雜湊
+- 下次輸出時若只有音訊改變，可直接沿用既有影像串流
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .probe import MediaInfo
+from .profile import EncodeProfile
+
+
+@dataclass
+class ExportManifest:
+    """單一輸出檔的紀錄"""
+
+    video_signature: str  # 影像內容雜湊（來源 + 字幕 + 影像編碼設定）
+    audio_signature: str  # 音訊來源雜湊
+    output_signature: str  # 輸出檔本身（確認未被替換）
+    created_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        """轉為字典"""
+        return {
+            'video_signature': self.video_signature,
+            'audio_signature': self.audio_signature,
+            'output_signature': self.output_signature,
+            'created_at': self.created_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ExportManifest':
+        """由字典建立紀錄"""
+        return cls(**data)
+
+
+def manifest_path_for(output_path: str) -> str:
+    """紀錄檔路徑（與輸出檔同目錄）"""
+    return f"{output_path}.render.json"
+
+
+def file_signature(path: str) -> str:
+    """檔案識別（路徑 + 大小 + 修改時間）"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ''
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}"
+
+
+def video_signature(
+    media_info: MediaInfo,
+    subtitle_content: str,
+    profile: EncodeProfile,
+    fragmented: bool = False,
+) -> str:
+    """影像內容雜湊（音訊相關設定不列入；fragmented MP4 與一般輸出的容器不同，需分開）"""
+    digest = hashlib.sha1()
+    digest.update(f"{media_info.path}|{media_info.size}|{media_info.mtime}".encode('utf-8'))
+    digest.update(subtitle_content.encode('utf-8'))
+    video_settings = {
+        'height': profile.height,
+        'video_codec': profile.video_codec,
+        'preset': profile.preset,
+        'crf': profile.crf,
+        'gop': profile.gop,
+        'fragmented': fragmented,
+    }
+    digest.update(json.dumps(video_settings, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_manifest(output_path: str) -> Optional[ExportManifest]:
+    """讀取紀錄（不存在或格式錯誤時回傳 None）"""
+    path = manifest_path_for(output_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as file_handle:
+            return ExportManifest.from_dict(json.load(file_handle))
+    except Exception:
+        return None
+
+
+def save_manifest(output_path: str, video_sig: str, audio_sig: str):
+    """輸出完成後寫入紀錄（audio_sig 為音訊來源識別字串）"""
+    manifest = ExportManifest(
+        video_signature=video_sig,
+        audio_signature=audio_sig,
+        output_signature=file_signature(output_path),
+        created_at=time.time(),
+    )
+    with open(manifest_path_for(output_path), 'w', encoding='utf-8') as file_handle:
+        json.dump(manifest.to_dict(), file_handle, indent=2, ensure_ascii=False)
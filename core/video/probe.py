@@ -0,0 +1,315 @@
+"""
+媒體資訊快取
+
+作用：
+- 以 ffprobe 取得影片長度、串流配置、編碼器、影格率與關鍵影格
+- 以（路徑, 大小, 修改時間）為鍵保存於 SQLite，避免重複呼叫 ffprobe
+- 供匯入驗證、渲染進度與分段渲染共用
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import subprocess
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MediaInfo:
+    """媒體檔案資訊"""
+
+    path: str
+    size: int
+    mtime: float
+    duration: Optional[float] = None  # 總長度（秒）
+    format_name: str = ''
+    streams: List[dict] = field(default_factory=list)  # 串流列表（codec_type/codec_name/...）
+    keyframes: Optional[List[float]] = None  # 影像關鍵影格時間（秒，尚未掃描為 None）
+
+    @property
+    def video_stream(self) -> Optional[dict]:
+        """第一條影像串流"""
+        return next((s for s in self.streams if s.get('codec_type') == 'video'), None)
+
+    @property
+    def audio_stream(self) -> Optional[dict]:
+        """第一條音訊串流"""
+        return next((s for s in self.streams if s.get('codec_type') == 'audio'), None)
+
+    @property
+    def has_video(self) -> bool:
+        """是否含影像"""
+        return self.video_stream is not None
+
+    @property
+    def has_audio(self) -> bool:
+        """是否含音訊"""
+        return self.audio_stream is not None
+
+    @property
+    def width(self) -> int:
+        """影像寬度"""
+        stream = self.video_stream
+        return int(stream.get('width') or 0) if stream else 0
+
+    @property
+    def height(self) -> int:
+        """影像高度"""
+        stream = self.video_stream
+        return int(stream.get('height') or 0) if stream else 0
+
+    @property
+    def frame_rate(self) -> Optional[float]:
+        """影格率"""
+        stream = self.video_stream
+        if not stream:
+            return None
+        return stream.get('frame_rate')
+
+    def to_dict(self) -> dict:
+        """轉為字典（不含關鍵影格）"""
+        return {
+            'path': self.path,
+            'size': self.size,
+            'mtime': self.mtime,
+            'duration': self.duration,
+            'format_name': self.format_name,
+            'streams': self.streams,
+        }
+
+
+class MediaProbe:
+    """ffprobe 結果快取（SQLite）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        # 資料庫路徑
+        self.db_path = db_path or str(config.MEDIA_CACHE_PATH)
+        # 行程內快取（路徑 -> MediaInfo）
+        self._memory: Dict[str, MediaInfo] = {}
+        # 寫入鎖
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def probe(self, path: str) -> Optional[MediaInfo]:
+        """取得媒體資訊（檔案未變更時直接使用快取）"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        path = os.path.abspath(path)
+
+        cached = self._memory.get(path)
+        if cached and self._is_fresh(cached, stat):
+            return cached
+
+        cached = self._load(path)
+        if cached and self._is_fresh(cached, stat):
+            self._memory[path] = cached
+            return cached
+
+        info = self._run_ffprobe(path, stat)
+        if info is None:
+            return None
+        self._store(info)
+        self._memory[path] = info
+        return info
+
+    def get_duration(self, path: str) -> Optional[float]:
+        """取得總長度（秒）"""
+        info = self.probe(path)
+        return info.duration if info else None
+
+    def get_keyframes(self, path: str) -> List[float]:
+        """取得影像關鍵影格時間（首次呼叫時掃描並寫入快取）"""
+        info = self.probe(path)
+        if info is None:
+            return []
+        if info.keyframes is None:
+            info.keyframes = self._scan_keyframes(info.path)
+            self._store(info)
+        return info.keyframes
+
+    def invalidate(self, path: str):
+        """移除指定檔案的快取"""
+        path = os.path.abspath(path)
+        self._memory.pop(path, None)
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM media_info WHERE path = ?', (path,))
+
+    def _is_fresh(self, info: MediaInfo, stat: os.stat_result) -> bool:
+        """檔案大小與修改時間是否一致"""
+        return info.size == stat.st_size and info.mtime == stat.st_mtime
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """建立資料庫連線（每次操作獨立連線，跨執行緒安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        """建立資料表"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS media_info ('
+                'path TEXT PRIMARY KEY, '
+                'size INTEGER NOT NULL, '
+                'mtime REAL NOT NULL, '
+                'info TEXT NOT NULL, '
+                'keyframes TEXT)'
+            )
+
+    def _load(self, path: str) -> Optional[MediaInfo]:
+        """從資料庫讀取"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT info, keyframes FROM media_info WHERE path = ?',
+                    (path,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Media cache read failed: {e}")
+            return None
+        if not row:
+            return None
+        data = json.loads(row[0])
+        info = MediaInfo(**data)
+        info.keyframes = json.loads(row[1]) if row[1] else None
+        return info
+
+    def _store(self, info: MediaInfo):
+        """寫入資料庫"""
+        keyframes = json.dumps(info.keyframes) if info.keyframes is not None else None
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO media_info (path, size, mtime, info, keyframes) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (info.path, info.size, info.mtime, json.dumps(info.to_dict()), keyframes),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Media cache write failed: {e}")
+
+    def _run_ffprobe(self, path: str, stat: os.stat_result) -> Optional[MediaInfo]:
+        """執行 ffprobe 取得格式與串流資訊"""
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe',
+                    '-v', 'error',
+                    '-print_format', 'json',
+                    '-show_format',
+                    '-show_streams',
+                    path,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+            if result.returncode != 0 or not result.stdout:
+                return None
+            data = json.loads(result.stdout)
+        except Exception as e:
+            logger.warning(f"ffprobe failed: {e}")
+            return None
+
+        format_data = data.get('format', {})
+        duration = format_data.get('duration')
+        streams = [self._summarize_stream(stream) for stream in data.get('streams', [])]
+        return MediaInfo(
+            path=path,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            duration=float(duration) if duration else None,
+            format_name=format_data.get('format_name', ''),
+            streams=streams,
+        )
+
+    def _summarize_stream(self, stream: dict) -> dict:
+        """保留需要的串流欄位"""
+        summary = {
+            'index': stream.get('index'),
+            'codec_type': stream.get('codec_type'),
+            'codec_name': stream.get('codec_name'),
+        }
+        if stream.get('codec_type') == 'video':
+            summary['width'] = stream.get('width')
+            summary['height'] = stream.get('height')
+            summary['pix_fmt'] = stream.get('pix_fmt')
+            summary['frame_rate'] = self._parse_rate(
+                stream.get('avg_frame_rate') or stream.get('r_frame_rate')
+            )
+        elif stream.get('codec_type') == 'audio':
+            sample_rate = stream.get('sample_rate')
+            summary['sample_rate'] = int(sample_rate) if sample_rate else None
+            summary['channels'] = stream.get('channels')
+        return summary
+
+    def _parse_rate(self, rate: Optional[str]) -> Optional[float]:
+        """解析 '30000/1001' 形式的影格率"""
+        if not rate:
+            return None
+        try:
+            numerator, _, denominator = rate.partition('/')
+            value = float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            return None
+        return value if value > 0 else None
+
+    def _scan_keyframes(self, path: str) -> List[float]:
+        """讀取封包旗標找出關鍵影格（不需解碼）"""
+        try:
+            result = subprocess.run(
+                [
+                    'ffprobe',
+                    '-v', 'error',
+                    '-select_streams', 'v:0',
+                    '-show_entries', 'packet=pts_time,flags',
+                    '-of', 'csv=p=0',
+                    path,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+        except Exception as e:
+            logger.warning(f"Keyframe scan failed: {e}")
+            return []
+
+        keyframes = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(',')
+            if 'K' not in flags:
+                continue
+            try:
+                keyframes.append(float(pts_time))
+            except ValueError:
+                continue
+        return sorted(keyframes)
+
+
+_shared_probe: Optional[MediaProbe] = None
+
+
+def get_media_probe() -> MediaProbe:
+    """取得共用的媒體資訊快取"""
+    global _shared_probe
+    if _shared_probe is None:
+        _shared_probe = MediaProbe()
+    return _shared_probe
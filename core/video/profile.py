@@ -0,0 +1,96 @@
+"""
+輸出編碼設定
+
+作用：
+- 定義單一輸出的編碼參數（解析度、編碼器、畫質）
+- 轉換為 FFmpeg 參數
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import config
+
+
+@dataclass
+class EncodeProfile:
+    """編碼設定"""
+
+    name: str = 'master'
+    height: int = 0  # 輸出高度（0 表示維持原始解析度）
+    video_codec: str = config.VIDEO_CODEC
+    audio_codec: str = config.AUDIO_CODEC
+    preset: Optional[str] = None  # x264 preset（None 表示使用編碼器預設）
+    crf: Optional[int] = None  # 畫質參數（None 表示使用編碼器預設）
+    audio_bitrate: Optional[str] = None  # 例如 '192k'
+    gop: Optional[int] = None  # 固定關鍵影格間隔（影格數，None 表示使用編碼器預設）
+
+    def video_args(self) -> List[str]:
+        """影像編碼參數"""
+        args = ['-c:v', self.video_codec]
+        if self.preset:
+            args.extend(['-preset', self.preset])
+        if self.crf is not None:
+            args.extend(['-crf', str(self.crf)])
+        if self.gop:
+            args.extend(['-g', str(self.gop), '-keyint_min', str(self.gop), '-sc_threshold', '0'])
+        return args
+
+    def audio_args(self) -> List[str]:
+        """音訊編碼參數"""
+        args = ['-c:a', self.audio_codec]
+        if self.audio_bitrate:
+            args.extend(['-b:a', self.audio_bitrate])
+        return args
+
+    def scale_filter(self) -> str:
+        """縮放濾鏡（不縮放時回傳 null）"""
+        if self.height and self.height > 0:
+            return f"scale=-2:{self.height}"
+        return 'null'
+
+    def to_dict(self) -> dict:
+        """轉為字典"""
+        return {
+            'name': self.name,
+            'height': self.height,
+            'video_codec': self.video_codec,
+            'audio_codec': self.audio_codec,
+            'preset': self.preset,
+            'crf': self.crf,
+            'audio_bitrate': self.audio_bitrate,
+            'gop': self.gop,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> 'EncodeProfile':
+        """由字典建立設定"""
+        if not data:
+            return cls()
+        default = cls().to_dict()
+        default.update(data)
+        return cls(**default)
+
+
+@dataclass
+class RenderTarget:
+    """單一輸出目標（名稱、路徑、編碼設定）"""
+
+    name: str
+    output_path: str
+    profile: EncodeProfile
+
+
+# 常用輸出設定：母帶 / 網路版 / 預覽
+PROFILE_MASTER = EncodeProfile(name='master', height=1080, preset='medium', crf=18)
+PROFILE_WEB = EncodeProfile(name='web', height=720, preset='medium', crf=23, audio_bitrate='160k')
+PROFILE_PREVIEW = EncodeProfile(name='preview', height=360, preset='veryfast', crf=30, audio_bitrate='96k')
+# 匯入時產生的代理檔：低解析度、短 GOP（拖動時只需解碼少量影格）
+PROFILE_PROXY = EncodeProfile(
+    name='proxy',
+    height=config.PROXY_HEIGHT,
+    preset='ultrafast',
+    crf=28,
+    audio_bitrate='128k',
+    gop=12,
+)
@@ -0,0 +1,106 @@
+"""
+代理檔（proxy）產生
+
+作用：
+- 匯入時在背景轉出低解析度、短 GOP 的代理檔
+- 預覽播放與草稿輸出改用代理檔，正式輸出仍使用原始影片
+- 代理檔以來源識別（路徑 + 大小 + 修改時間）命名，來源未變更時直接沿用
+"""
+
+import hashlib
+import logging
+import os
+from typing import Callable, Optional
+
+import config
+from core.cancellation import CancellationToken
+
+from .probe import MediaProbe, get_media_probe
+from .profile import EncodeProfile, PROFILE_PROXY
+from .renderer import VideoRenderer
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyGenerator:
+    """代理檔產生器"""
+
+    def __init__(
+        self,
+        proxy_dir: Optional[str] = None,
+        profile: EncodeProfile = PROFILE_PROXY,
+        probe: Optional[MediaProbe] = None,
+    ):
+        # 代理檔資料夾
+        self.proxy_dir = proxy_dir or str(config.PROXY_DIR)
+        # 代理檔編碼設定
+        self.profile = profile
+        # 媒體資訊快取
+        self.probe = probe or get_media_probe()
+        # 渲染器（共用 FFmpeg 執行與進度解析）
+        self.renderer = VideoRenderer(self.probe)
+
+    def proxy_path_for(self, source_path: str) -> Optional[str]:
+        """代理檔路徑（無法讀取來源時回傳 None）"""
+        info = self.probe.probe(source_path)
+        if info is None:
+            return None
+        digest = hashlib.sha1(
+            f"{info.path}|{info.size}|{info.mtime}|{self.profile.to_dict()}".encode('utf-8')
+        ).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(source_path))[0]
+        return os.path.join(self.proxy_dir, f"{stem}_{digest}.mp4")
+
+    def get_proxy(self, source_path: str) -> Optional[str]:
+        """已存在的代理檔（尚未產生時回傳 None）"""
+        proxy_path = self.proxy_path_for(source_path)
+        if proxy_path and os.path.exists(proxy_path) and os.path.getsize(proxy_path) > 0:
+            return proxy_path
+        return None
+
+    def generate(
+        self,
+        source_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[str]:
+        """產生代理檔並回傳路徑（已存在時直接回傳；取消時拋出 CancelledError）"""
+        existing = self.get_proxy(source_path)
+        if existing:
+            if progress_callback:
+                progress_callback(100)
+            return existing
+
+        proxy_path = self.proxy_path_for(source_path)
+        if not proxy_path:
+            return None
+        os.makedirs(self.proxy_dir, exist_ok=True)
+
+        temp_path = f"{proxy_path}.part.mp4"
+        cmd = [
+            'ffmpeg',
+            '-i', source_path,
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-vf', self.profile.scale_filter(),
+            *self.profile.video_args(),
+            *self.profile.audio_args(),
+            '-movflags', '+faststart',
+            '-y',
+            temp_path,
+        ]
+        duration = self.probe.get_duration(source_path)
+        success = False
+        try:
+            success = self.renderer._run_ffmpeg(
+                cmd, duration, progress_callback, cancel_token=cancel_token
+            )
+        finally:
+            if not success:
+                self.renderer._remove_partial(temp_path)
+        if not success:
+            logger.error(f"Proxy generation failed: {source_path}")
+            return None
+        os.replace(temp_path, proxy_path)
+        logger.info(f"Proxy generated: {proxy_path}")
+        return proxy_path
@@ -0,0 +1,195 @@
+"""
+輸出影片 QA 截圖
+
+作用：
+- 依 LRC 每行（或每 N 行）的開始時間，從輸出影片擷取單張畫面
+- 以多個 FFmpeg 行程並行擷取（輸入端 -ss 由最近的關鍵影格開始解碼）
+- 將截圖拼成一張總覽圖，快速檢查字幕位置與假名對齊
+"""
+
+import logging
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from core.cancellation import CancellationToken
+from core.lrc import LrcTimeline
+
+from .probe import MediaProbe, get_media_probe
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QaFrame:
+    """單張 QA 截圖"""
+
+    line_index: int  # 歌詞行索引
+    time: float  # 擷取時間（秒）
+    text: str  # 該行文字
+    path: str = ''  # 截圖路徑
+    ok: bool = False  # 是否擷取成功
+
+
+class QaFrameExtractor:
+    """依歌詞行擷取輸出影片畫面"""
+
+    def __init__(self, workers: Optional[int] = None, probe: Optional[MediaProbe] = None):
+        # 同時執行的 FFmpeg 行程數
+        self.workers = max(1, workers or min(8, os.cpu_count() or 1))
+        # 媒體資訊快取
+        self.probe = probe or get_media_probe()
+
+    def plan_frames(
+        self,
+        timeline: LrcTimeline,
+        every_n_lines: int = 1,
+        delay: float = 0.2,
+        duration: Optional[float] = None,
+    ) -> List[QaFrame]:
+        """
+        規劃擷取時間
+
+        Args:
+            every_n_lines: 每 N 行擷取一張
+            delay: 行開始後延遲（秒），確保第一個字已開始變色
+            duration: 影片長度（超出者夾在結尾前）
+        """
+        step = max(1, every_n_lines)
+        frames = []
+        for index in range(0, len(timeline.lines), step):
+            line = timeline.lines[index]
+            if not line.words:
+                continue
+            time = max(0.0, line.start_time + delay)
+            if duration:
+                time = min(time, max(0.0, duration - 0.1))
+            frames.append(QaFrame(line_index=index, time=time, text=line.text))
+        return frames
+
+    def extract(
+        self,
+        video_path: str,
+        timeline: LrcTimeline,
+        output_dir: str,
+        every_n_lines: int = 1,
+        width: int = 480,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[QaFrame]:
+        """並行擷取所有截圖（失敗的截圖 ok=False；取消時刪除截圖並拋出 CancelledError）"""
+        os.makedirs(output_dir, exist_ok=True)
+        duration = self.probe.get_duration(video_path)
+        frames = self.plan_frames(timeline, every_n_lines, duration=duration)
+        for order, frame in enumerate(frames):
+            frame.path = os.path.join(
+                output_dir,
+                f"qa_{order:04d}_line{frame.line_index + 1:03d}_{frame.time:.2f}s.jpg",
+            )
+
+        completed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self._extract_frame, video_path, frame, width, cancel_token): frame
+                for frame in frames
+            }
+            for future in as_completed(futures):
+                futures[future].ok = future.result()
+                completed += 1
+                if progress_callback:
+                    progress_callback(int(completed / len(frames) * 100))
+
+        if cancel_token and cancel_token.is_cancelled:
+            for frame in frames:
+                if os.path.exists(frame.path):
+                    os.remove(frame.path)
+            cancel_token.raise_if_cancelled()
+
+        failed = [frame for frame in frames if not frame.ok]
+        if failed:
+            logger.warning(f"QA frame extraction failed for {len(failed)} of {len(frames)} lines")
+        return frames
+
+    def build_contact_sheet(
+        self,
+        frames: List[QaFrame],
+        output_path: str,
+        columns: int = 4,
+    ) -> Optional[str]:
+        """將截圖依序拼成總覽圖"""
+        images = [frame.path for frame in frames if frame.ok]
+        if not images:
+            return None
+        columns = max(1, min(columns, len(images)))
+        rows = (len(images) + columns - 1) // columns
+
+        list_file = tempfile.NamedTemporaryFile(
+            'w', suffix='.txt', delete=False, encoding='utf-8'
+        )
+        try:
+            with list_file:
+                for path in images:
+                    escaped = os.path.abspath(path).replace("'", "'\\''")
+                    list_file.write(f"file '{escaped}'\n")
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', list_file.name,
+                '-vf', f"tile={columns}x{rows}:padding=4:margin=4",
+                '-frames:v', '1',
+                '-q:v', '3',
+                '-y',
+                output_path,
+            ]
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+        finally:
+            os.remove(list_file.name)
+
+        if result.returncode != 0:
+            logger.error(f"Contact sheet failed: {result.stderr[-500:]}")
+            return None
+        return output_path
+
+    def _extract_frame(
+        self,
+        video_path: str,
+        frame: QaFrame,
+        width: int,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """擷取單張畫面（-ss 置於 -i 前，由前一個關鍵影格開始解碼）"""
+        if cancel_token and cancel_token.is_cancelled:
+            return False
+        cmd = [
+            'ffmpeg',
+            '-ss', f"{frame.time:.3f}",
+            '-i', video_path,
+            '-frames:v', '1',
+            '-vf', f"scale={width}:-2",
+            '-q:v', '3',
+            '-an',
+            '-y',
+            frame.path,
+        ]
+        try:
+            result = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                check=False,
+            )
+        except Exception as e:
+            logger.error(f"QA frame extraction error: {e}")
+            return False
+        return result.returncode == 0 and os.path.exists(frame.path)
@@ -2,101 +2,699 @@
 FFmpeg 影片渲染器
 """
 
+import hashlib
+import os
 import re
 import subprocess
-from typing import Optional, Callable
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Callable
 from pathlib import Path
 
+import config
+from core.cancellation import CancellationToken, CancelledError
+
+from .farm import RenderFarm
+from .history import RenderHistory, RenderRecord, get_render_history
+from .manifest import file_signature, load_manifest, save_manifest, video_signature
+from .probe import MediaProbe, get_media_probe
+from .profile import EncodeProfile, RenderTarget
+from .segments import PARTIAL_SUFFIX, Segment, SegmentCache, assign_segment_keys, plan_segments
+
+# 沿用影像串流時允許的長度誤差（秒，音訊編碼的前後補白）
+REUSE_DURATION_TOLERANCE = 0.1
+
+
+@dataclass
+class AudioInput:
+    """渲染指令的音訊來源（單一音檔或多軌混音）"""
+
+    input_args: List[str]  # FFmpeg 輸入參數
+    map_spec: str  # -map 目標
+    signature: str  # 音訊內容識別（判斷能否沿用上次輸出）
+    filter_graph: str = ''  # 混音濾鏡（單一音檔時為空）
+    paths: List[str] = field(default_factory=list)  # 音訊來源檔（混音長度取最長者）
+
 
 class VideoRenderer:
     """使用 FFmpeg 渲染影片"""
 
+    def __init__(self, probe: Optional[MediaProbe] = None, history: Optional[RenderHistory] = None):
+        # 媒體資訊快取
+        self.probe = probe or get_media_probe()
+        # 輸出耗時紀錄
+        self.history = history or get_render_history()
+
+    def predict_render_time(
+        self,
+        video_path: str,
+        profile: Optional[EncodeProfile] = None,
+        duration: Optional[float] = None,
+        mode: str = 'full',
+    ) -> Optional[float]:
+        """依歷史紀錄預估輸出耗時（秒，無資料時回傳 None）"""
+        media_info = self.probe.probe(video_path)
+        if media_info is None:
+            return None
+        return self.history.predict(media_info, profile or EncodeProfile(), duration, mode)
+
     def render(
         self,
         video_path: str,
-        audio_path: str,
+        audio_path: Optional[str],
         subtitle_path: str,
         output_path: str,
         progress_callback: Optional[Callable[[int], None]] = None,
+        threads: Optional[int] = None,
+        profile: Optional[EncodeProfile] = None,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+        fragmented: bool = False,
+        time_callback: Optional[Callable[[float], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
     ) -> bool:
-        """渲染影片"""
+        """
+        渲染影片
+
+        Args:
+            threads: 編碼執行緒上限（None 表示由 FFmpeg 決定）
+            profile: 編碼設定
+            stems: 指定時直接在濾鏡圖內混音（不產生中間音檔），忽略 audio_path
+            stem_volumes: 各軌音量
+            fragmented: 輸出 fragmented MP4，編碼途中即可播放已完成的部分
+            time_callback: 已編碼到的影片時間（秒）
+            cancel_token: 取消旗標（取消時終止 FFmpeg、刪除未完成的輸出並拋出 CancelledError）
+        """
         try:
+            profile = profile or EncodeProfile()
+            audio = self._build_audio_input(audio_path, stems, stem_volumes)
+            video_sig = self._video_signature(video_path, subtitle_path, profile, fragmented)
+            if self._reuse_video_stream(
+                output_path, video_path, audio, video_sig, profile, progress_callback, cancel_token,
+                fragmented,
+            ):
+                return True
+
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
             total_duration = self._get_duration(video_path)
             subtitle_filter = self._build_subtitle_filter(subtitle_path)
+            video_filter = self._append_scale(subtitle_filter, profile)
 
             cmd = [
                 'ffmpeg',
                 '-i', video_path,
-                '-i', audio_path,
-                '-vf', subtitle_filter,
-                '-map', '0:v:0',
-                '-map', '1:a:0',
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
+                *audio.input_args,
+                *self._stream_args(video_filter, audio),
+                *profile.video_args(),
+                *profile.audio_args(),
+                *self._thread_args(threads),
+                *(self._fragment_args() if fragmented else []),
                 '-shortest',
                 '-y',
                 output_path,
             ]
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
+            started = time.time()
+            try:
+                success = self._run_ffmpeg(
+                    cmd, total_duration, progress_callback, time_callback, cancel_token
+                )
+            except CancelledError:
+                self._remove_partial(output_path)
+                raise
+            if success:
+                self._record_history(video_path, profile, total_duration, 'full', time.time() - started)
+            if success and video_sig:
+                save_manifest(output_path, video_sig, audio.signature)
+            if progress_callback:
+                progress_callback(100)
+
+            return success
+        except CancelledError:
+            raise
+        except Exception:
+            return False
+
+    def render_incremental(
+        self,
+        video_path: str,
+        audio_path: Optional[str],
+        subtitle_path: str,
+        output_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        profile: Optional[EncodeProfile] = None,
+        cache: Optional[SegmentCache] = None,
+        segment_length: float = config.SEGMENT_LENGTH_SEC,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+        farm: Optional[RenderFarm] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """
+        分段渲染：只重新編碼字幕有變更的區段，其餘沿用快取後串接
+
+        Args:
+            profile: 編碼設定（區段之間必須一致）
+            cache: 區段快取（預設使用 temp/segment_cache）
+            segment_length: 目標區段長度（秒，實際切點對齊關鍵影格）
+            stems / stem_volumes: 同 render()
+            farm: 區網渲染節點（預設依 config.RENDER_FARM_WORKERS；節點未完成的區段改由本機編碼）
+            cancel_token: 同 render()（已完成的區段保留在快取中）
+        """
+        try:
+            profile = profile or EncodeProfile()
+            media_info = self.probe.probe(video_path)
+            if media_info is None or not media_info.duration:
+                return self.render(
+                    video_path, audio_path, subtitle_path, output_path,
+                    progress_callback, profile=profile,
+                    stems=stems, stem_volumes=stem_volumes,
+                    cancel_token=cancel_token,
+                )
+
+            audio = self._build_audio_input(audio_path, stems, stem_volumes)
+            video_sig = self._video_signature(video_path, subtitle_path, profile)
+            if self._reuse_video_stream(
+                output_path, video_path, audio, video_sig, profile, progress_callback, cancel_token
+            ):
+                return True
+
+            cache = cache or SegmentCache()
+            keyframes = self.probe.get_keyframes(video_path)
+            segments = plan_segments(keyframes, media_info.duration, segment_length)
+            with open(subtitle_path, 'r', encoding='utf-8') as file_handle:
+                ass_content = file_handle.read()
+            assign_segment_keys(segments, media_info, profile, ass_content)
+
+            dirty = []
+            for segment in segments:
+                segment.path = cache.path_for(segment.key)
+                if not cache.has(segment.key):
+                    dirty.append(segment)
+
+            if farm is None and config.RENDER_FARM_WORKERS:
+                farm = RenderFarm(config.RENDER_FARM_WORKERS, token=config.RENDER_FARM_TOKEN)
+            if farm is not None and dirty:
+                def on_farm_progress(value: int):
+                    if progress_callback:
+                        progress_callback(int(value * 0.95))
+
+                dirty = farm.encode_segments(
+                    video_path, subtitle_path, dirty, profile, on_farm_progress, cancel_token
+                )
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
 
-            if process.stderr:
-                for line in process.stderr:
-                    progress = self._parse_progress(line, total_duration)
-                    if progress_callback and progress is not None:
-                        progress_callback(progress)
+            # 進度：重新編碼區段佔 95%，最後串接佔 5%
+            dirty_total = sum(segment.duration for segment in dirty) or 1.0
+            done_duration = 0.0
+            started = time.time()
+            for segment in dirty:
+                def on_segment_progress(value: int, offset=done_duration, length=segment.duration):
+                    if progress_callback:
+                        current = offset + length * value / 100
+                        progress_callback(int(current / dirty_total * 95))
 
-            process.wait()
+                if not self._encode_segment(
+                    video_path, subtitle_path, segment, profile, on_segment_progress,
+                    cancel_token=cancel_token,
+                ):
+                    return False
+                done_duration += segment.duration
+            if dirty:
+                self._record_history(video_path, profile, done_duration, 'incremental', time.time() - started)
+
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            success = self._concat_segments(segments, audio, output_path, profile, cancel_token)
+            if success and video_sig:
+                save_manifest(output_path, video_sig, audio.signature)
+            cache.prune()
             if progress_callback:
                 progress_callback(100)
-
-            return process.returncode == 0
+            return success
+        except CancelledError:
+            raise
         except Exception:
             return False
 
-    def _get_duration(self, video_path: str) -> Optional[float]:
-        """取得影片總長度（秒）"""
+    def _encode_segment(
+        self,
+        video_path: str,
+        subtitle_path: str,
+        segment: Segment,
+        profile: EncodeProfile,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        seek: bool = True,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """
+        編碼單一區段（僅影像，時間戳平移後燒錄字幕）
+
+        Args:
+            seek: 是否從 video_path 中跳到區段起點（False 表示輸入已是切好的區段）
+        """
+        temp_path = f"{segment.path}{PARTIAL_SUFFIX}"
+        subtitle_filter = self._build_subtitle_filter(subtitle_path)
+        filter_chain = (
+            f"setpts=PTS-STARTPTS+{segment.start:.6f}/TB,{subtitle_filter},"
+            f"setpts=PTS-STARTPTS,{profile.scale_filter()}"
+        )
+        seek_args = ['-ss', f"{segment.start:.6f}"] if seek else []
+        cmd = [
+            'ffmpeg',
+            *seek_args,
+            '-i', video_path,
+            '-t', f"{segment.duration:.6f}",
+            '-vf', filter_chain,
+            '-map', '0:v:0',
+            '-an',
+            *profile.video_args(),
+            '-video_track_timescale', '90000',
+            '-y',
+            temp_path,
+        ]
+        success = False
+        try:
+            success = self._run_ffmpeg(cmd, segment.duration, progress_callback, cancel_token=cancel_token)
+        finally:
+            if not success:
+                self._remove_partial(temp_path)
+        if not success:
+            return False
+        os.replace(temp_path, segment.path)
+        return True
+
+    def _concat_segments(
+        self,
+        segments: List[Segment],
+        audio: AudioInput,
+        output_path: str,
+        profile: EncodeProfile,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """串接區段（影像直接複製）並合併音訊"""
+        list_fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='segments_')
+        try:
+            with os.fdopen(list_fd, 'w', encoding='utf-8') as file_handle:
+                for segment in segments:
+                    escaped = segment.path.replace("'", "'\\''")
+                    file_handle.write(f"file '{escaped}'\n")
+
+            cmd = [
+                'ffmpeg',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', list_path,
+                *audio.input_args,
+                *self._stream_args(None, audio),
+                '-c:v', 'copy',
+                *profile.audio_args(),
+                '-shortest',
+                '-y',
+                output_path,
+            ]
+            try:
+                return self._run_ffmpeg(cmd, None, cancel_token=cancel_token)
+            except CancelledError:
+                self._remove_partial(output_path)
+                raise
+        finally:
+            if os.path.exists(list_path):
+                os.remove(list_path)
+
+    def _video_signature(
+        self,
+        video_path: str,
+        subtitle_path: str,
+        profile: EncodeProfile,
+        fragmented: bool = False,
+    ) -> Optional[str]:
+        """影像內容雜湊（無法取得媒體資訊時回傳 None）"""
+        media_info = self.probe.probe(video_path)
+        if media_info is None:
+            return None
+        with open(subtitle_path, 'r', encoding='utf-8') as file_handle:
+            subtitle_content = file_handle.read()
+        return video_signature(media_info, subtitle_content, profile, fragmented)
+
+    def _reuse_video_stream(
+        self,
+        output_path: str,
+        video_path: str,
+        audio: AudioInput,
+        video_sig: Optional[str],
+        profile: EncodeProfile,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        fragmented: bool = False,
+    ) -> bool:
+        """
+        字幕與影像設定未變更時，沿用上次輸出的影像串流只替換音訊
+
+        上次輸出的影像已依當時的音訊以 -shortest 截短，新音訊較長（且來源影片也較長）時
+        沿用會使輸出被截短，改為完整渲染。
+
+        Returns:
+            是否已完成輸出（False 表示需完整渲染）
+        """
+        if not video_sig or not os.path.exists(output_path):
+            return False
+        manifest = load_manifest(output_path)
+        if manifest is None:
+            return False
+        if manifest.video_signature != video_sig:
+            return False
+        if manifest.output_signature != file_signature(output_path):
+            return False
+
+        # 音訊也相同：上次的輸出即為結果
+        if manifest.audio_signature == audio.signature:
+            if progress_callback:
+                progress_callback(100)
+            return True
+
+        stored_duration = self._get_duration(output_path)
+        expected_duration = self._expected_duration(video_path, audio)
+        if (
+            stored_duration is None
+            or expected_duration is None
+            or stored_duration + REUSE_DURATION_TOLERANCE < expected_duration
+        ):
+            return False
+
+        root, ext = os.path.splitext(output_path)
+        temp_path = f"{root}.remux{ext or '.mp4'}"
+        cmd = [
+            'ffmpeg',
+            '-i', output_path,
+            *audio.input_args,
+            *self._stream_args(None, audio),
+            '-c:v', 'copy',
+            *profile.audio_args(),
+            *(self._fragment_args() if fragmented else []),
+            '-shortest',
+            '-y',
+            temp_path,
+        ]
+        success = False
         try:
-            result = subprocess.run(
-                [
-                    'ffprobe',
-                    '-v', 'error',
-                    '-show_entries', 'format=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1',
-                    video_path,
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
+            success = self._run_ffmpeg(
+                cmd, stored_duration, progress_callback, cancel_token=cancel_token
+            )
+        finally:
+            if not success:
+                self._remove_partial(temp_path)
+        if not success:
+            return False
+
+        os.replace(temp_path, output_path)
+        save_manifest(output_path, video_sig, audio.signature)
+        if progress_callback:
+            progress_callback(100)
+        return True
+
+    def _expected_duration(self, video_path: str, audio: AudioInput) -> Optional[float]:
+        """以 -shortest 輸出時的長度（影片與音訊較短者；無法取得時為 None）"""
+        durations = [self._get_duration(path) for path in [video_path, *audio.paths]]
+        if not audio.paths or any(duration is None for duration in durations):
+            return None
+        # 說明：多軌混音（amix）長度為最長的一軌
+        return min(durations[0], max(durations[1:]))
+
+    def _build_audio_input(
+        self,
+        audio_path: Optional[str],
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+        input_offset: int = 1,
+    ) -> AudioInput:
+        """建立音訊來源（有 stems 時在同一個濾鏡圖內混音）"""
+        if not stems:
+            if not audio_path:
+                raise ValueError('audio_path or stems is required')
+            return AudioInput(
+                input_args=['-i', audio_path],
+                map_spec=f'{input_offset}:a:0',
+                signature=file_signature(audio_path),
+                paths=[audio_path],
             )
-            if result.stdout:
-                return float(result.stdout.strip())
+
+        # 延遲匯入：core.audio 套件初始化會載入分離模型相依套件
+        from core.audio.mixer import AudioMixer
+
+        volumes = stem_volumes or {name: 1.0 for name in stems.keys()}
+        input_args, filter_graph = AudioMixer().build_mix_filter(
+            stems,
+            volumes,
+            input_offset=input_offset,
+            output_label='aout',
+            normalize=False,
+        )
+        digest = hashlib.sha1()
+        for name, path in stems.items():
+            digest.update(f"{name}|{file_signature(path)}|{volumes.get(name, 1.0)}\n".encode('utf-8'))
+        return AudioInput(
+            input_args=input_args,
+            map_spec='[aout]',
+            signature=f"stems:{digest.hexdigest()}",
+            filter_graph=filter_graph,
+            paths=list(stems.values()),
+        )
+
+    def _stream_args(self, video_filter: Optional[str], audio: AudioInput) -> List[str]:
+        """濾鏡與串流對應參數（影像固定為第 0 個輸入）"""
+        if audio.filter_graph:
+            if video_filter:
+                return [
+                    '-filter_complex', f"[0:v]{video_filter}[vout];{audio.filter_graph}",
+                    '-map', '[vout]',
+                    '-map', audio.map_spec,
+                ]
+            return [
+                '-filter_complex', audio.filter_graph,
+                '-map', '0:v:0',
+                '-map', audio.map_spec,
+            ]
+
+        args = ['-vf', video_filter] if video_filter else []
+        return [*args, '-map', '0:v:0', '-map', audio.map_spec]
+
+    def _append_scale(self, filter_chain: str, profile: EncodeProfile) -> str:
+        """依編碼設定附加縮放濾鏡"""
+        scale_filter = profile.scale_filter()
+        if scale_filter == 'null':
+            return filter_chain
+        return f"{filter_chain},{scale_filter}"
+
+    def render_multi(
+        self,
+        video_path: str,
+        audio_path: Optional[str],
+        subtitle_path: str,
+        targets: List[RenderTarget],
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Dict[str, bool]:
+        """
+        單次解碼、單次燒錄字幕，分流輸出多個版本
+
+        Args:
+            targets: 輸出目標列表（各自的解析度與編碼設定）
+            progress_callback: 進度回呼（target 名稱, 百分比）
+            stems / stem_volumes / cancel_token: 同 render()
+
+        Returns:
+            {target 名稱: 是否成功}
+        """
+        if not targets:
+            return {}
+        results = {target.name: False for target in targets}
+        try:
+            total_duration = self._get_duration(video_path)
+            audio = self._build_audio_input(audio_path, stems, stem_volumes)
+            filter_graph = self._build_split_filter(subtitle_path, targets)
+            audio_maps = [audio.map_spec] * len(targets)
+            if audio.filter_graph:
+                # 混音結果同樣以 asplit 分給各輸出
+                labels = [f'[am{index}]' for index in range(len(targets))]
+                filter_graph += f";{audio.filter_graph}"
+                if len(targets) > 1:
+                    filter_graph += f";{audio.map_spec}asplit={len(targets)}{''.join(labels)}"
+                    audio_maps = labels
+
+            cmd = [
+                'ffmpeg',
+                '-i', video_path,
+                *audio.input_args,
+                '-filter_complex', filter_graph,
+            ]
+            for index, target in enumerate(targets):
+                cmd.extend([
+                    '-map', f'[v{index}]',
+                    '-map', audio_maps[index],
+                    *target.profile.video_args(),
+                    *target.profile.audio_args(),
+                    '-shortest',
+                    '-y',
+                    target.output_path,
+                ])
+
+            def on_progress(value: int):
+                # 所有輸出共用同一條解碼時間軸，進度同步推進
+                if progress_callback:
+                    for target in targets:
+                        progress_callback(target.name, value)
+
+            try:
+                success = self._run_ffmpeg(cmd, total_duration, on_progress, cancel_token=cancel_token)
+            except CancelledError:
+                for target in targets:
+                    self._remove_partial(target.output_path)
+                raise
+            for target in targets:
+                produced = (
+                    success
+                    and os.path.exists(target.output_path)
+                    and os.path.getsize(target.output_path) > 0
+                )
+                results[target.name] = produced
+                if progress_callback:
+                    progress_callback(target.name, 100 if produced else 0)
+            return results
+        except CancelledError:
+            raise
+        except Exception:
+            return results
+
+    def _build_split_filter(self, subtitle_path: str, targets: List[RenderTarget]) -> str:
+        """建立「燒錄字幕 -> split -> 各自縮放」的濾鏡圖"""
+        subtitle_filter = self._build_subtitle_filter(subtitle_path)
+        if len(targets) == 1:
+            return f"[0:v]{subtitle_filter},{targets[0].profile.scale_filter()}[v0]"
+
+        split_labels = ''.join(f'[s{index}]' for index in range(len(targets)))
+        parts = [f"[0:v]{subtitle_filter},split={len(targets)}{split_labels}"]
+        for index, target in enumerate(targets):
+            parts.append(f"[s{index}]{target.profile.scale_filter()}[v{index}]")
+        return ';'.join(parts)
+
+    def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        total_duration: Optional[float],
+        progress_callback: Optional[Callable[[int], None]] = None,
+        time_callback: Optional[Callable[[float], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """執行 FFmpeg 並回報進度（取消時終止行程並拋出 CancelledError）"""
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        unregister = cancel_token.on_cancel(process.terminate) if cancel_token else None
+
+        if process.stderr:
+            for line in process.stderr:
+                current = self._parse_time(line)
+                if current is None:
+                    continue
+                if time_callback:
+                    time_callback(current)
+                progress = self._to_percent(current, total_duration)
+                if progress_callback and progress is not None:
+                    progress_callback(progress)
+
+        process.wait()
+        if unregister:
+            unregister()
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        return process.returncode == 0
+
+    def _record_history(
+        self,
+        video_path: str,
+        profile: EncodeProfile,
+        duration: Optional[float],
+        mode: str,
+        wall_time: float,
+    ):
+        """記錄輸出耗時（供之後預估）"""
+        media_info = self.probe.probe(video_path)
+        if media_info is None or not duration or wall_time <= 0:
+            return
+        self.history.record(RenderRecord(
+            source_width=media_info.width,
+            source_height=media_info.height,
+            frame_rate=media_info.frame_rate or 0.0,
+            duration=duration,
+            profile_name=profile.name,
+            preset=profile.preset or '',
+            output_height=profile.height,
+            mode=mode,
+            wall_time=wall_time,
+        ))
+
+    def _remove_partial(self, path: str):
+        """刪除未完成的輸出檔"""
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+    def _fragment_args(self) -> List[str]:
+        """fragmented MP4 參數（每 2 秒一個關鍵影格與 fragment）"""
+        return [
+            '-force_key_frames', 'expr:gte(t,n_forced*2)',
+            '-movflags', 'frag_keyframe+empty_moov+default_base_moof',
+        ]
+
+    def _thread_args(self, threads: Optional[int]) -> List[str]:
+        """執行緒限制參數"""
+        if not threads or threads <= 0:
+            return []
+        return ['-threads', str(threads), '-filter_threads', str(threads)]
+
+    def _get_duration(self, video_path: str) -> Optional[float]:
+        """取得影片總長度（秒，經由媒體資訊快取）"""
+        try:
+            return self.probe.get_duration(video_path)
         except Exception:
             return None
-        return None
 
     def _parse_progress(self, line: str, total_duration: Optional[float]) -> Optional[int]:
         """從 FFmpeg 輸出解析進度百分比"""
-        if total_duration is None:
+        current = self._parse_time(line)
+        if current is None:
             return None
+        return self._to_percent(current, total_duration)
+
+    def _parse_time(self, line: str) -> Optional[float]:
+        """從 FFmpeg 輸出解析目前編碼時間（秒）"""
         match = re.search(r'time=(\d+):(\d+):(\d+)\.(\d+)', line)
         if not match:
             return None
         hours, minutes, seconds, centisecs = match.groups()
-        current = (
+        return (
             int(hours) * 3600
             + int(minutes) * 60
             + int(seconds)
             + int(centisecs) / 100
         )
-        percent = int(min(1.0, current / total_duration) * 100)
-        return percent
+
+    def _to_percent(self, current: float, total_duration: Optional[float]) -> Optional[int]:
+        """編碼時間轉百分比"""
+        if not total_duration:
+            return None
+        return int(min(1.0, current / total_duration) * 100)
 
     def _build_subtitle_filter(self, subtitle_path: str) -> str:
         """建立字幕濾鏡參數"""
@@ -0,0 +1,170 @@
+"""
+分段渲染快取
+
+作用：
+- 依關鍵影格切分影片為固定長度區段
+- 以（來源影片, 編碼設定, 區段內 ASS 事件）計算區段雜湊
+- 保存已編碼區段，重新輸出時只重新編碼內容有變更的區段
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import config
+
+from .probe import MediaInfo
+from .profile import EncodeProfile
+
+# 編碼中區段的暫存檔後綴（完成後才改名為 <key>.mp4）
+PARTIAL_SUFFIX = '.part.mp4'
+
+
+@dataclass
+class Segment:
+    """單一渲染區段"""
+
+    index: int
+    start: float  # 起點（秒，對齊關鍵影格）
+    end: float  # 終點（秒）
+    key: str = ''  # 區段內容雜湊
+    path: str = ''  # 快取檔案路徑
+
+    @property
+    def duration(self) -> float:
+        """區段長度（秒）"""
+        return max(0.0, self.end - self.start)
+
+
+@dataclass
+class AssEvent:
+    """ASS Dialogue 事件（僅保留判斷重疊所需資訊）"""
+
+    start: float
+    end: float
+    raw: str  # 原始行內容
+
+
+def plan_segments(
+    keyframes: List[float],
+    duration: float,
+    target_length: float = 10.0,
+) -> List[Segment]:
+    """依關鍵影格切分區段（每段至少 target_length 秒，最後一段收尾）"""
+    if duration <= 0:
+        return []
+
+    boundaries = [0.0]
+    for keyframe in keyframes:
+        if keyframe >= duration:
+            break
+        if keyframe - boundaries[-1] >= target_length:
+            boundaries.append(keyframe)
+    boundaries.append(duration)
+
+    return [
+        Segment(index=index, start=start, end=end)
+        for index, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:]))
+    ]
+
+
+def parse_ass_events(content: str) -> Tuple[str, List[AssEvent]]:
+    """拆出 ASS 表頭（Script Info / Styles）與 Dialogue 事件"""
+    header_lines = []
+    events: List[AssEvent] = []
+    for line in content.splitlines():
+        if line.startswith('Dialogue:'):
+            fields = line[len('Dialogue:'):].split(',', 9)
+            if len(fields) < 10:
+                continue
+            start = _parse_ass_time(fields[1])
+            end = _parse_ass_time(fields[2])
+            if start is None or end is None:
+                continue
+            events.append(AssEvent(start=start, end=end, raw=line))
+        else:
+            header_lines.append(line)
+    return '\n'.join(header_lines), events
+
+
+def _parse_ass_time(value: str) -> Optional[float]:
+    """ASS 時間 h:mm:ss.xx -> 秒"""
+    try:
+        hours, minutes, seconds = value.strip().split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    except ValueError:
+        return None
+
+
+def assign_segment_keys(
+    segments: List[Segment],
+    media_info: MediaInfo,
+    profile: EncodeProfile,
+    ass_content: str,
+):
+    """計算每個區段的快取鍵（來源 + 編碼設定 + 表頭 + 重疊事件）"""
+    header, events = parse_ass_events(ass_content)
+    base = hashlib.sha1()
+    base.update(f"{media_info.path}|{media_info.size}|{media_info.mtime}".encode('utf-8'))
+    base.update(json.dumps(profile.to_dict(), sort_keys=True).encode('utf-8'))
+    base.update(header.encode('utf-8'))
+
+    for segment in segments:
+        digest = base.copy()
+        digest.update(f"{segment.start:.3f}-{segment.end:.3f}".encode('utf-8'))
+        for event in events:
+            if event.start < segment.end and event.end > segment.start:
+                digest.update(event.raw.encode('utf-8'))
+                digest.update(b'\n')
+        segment.key = digest.hexdigest()
+
+
+class SegmentCache:
+    """已編碼區段的檔案快取"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        # 快取資料夾
+        self.cache_dir = cache_dir or str(config.SEGMENT_CACHE_DIR)
+        # 容量上限（超過時刪除最久未使用的區段）
+        self.max_bytes = max_bytes if max_bytes is not None else config.SEGMENT_CACHE_MAX_BYTES
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path_for(self, key: str) -> str:
+        """區段快取檔案路徑"""
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def has(self, key: str) -> bool:
+        """是否已有可用的區段（命中時更新使用時間）"""
+        path = self.path_for(key)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return False
+        os.utime(path, None)
+        return True
+
+    def prune(self):
+        """依最後使用時間刪除超出容量的區段"""
+        if not self.max_bytes or self.max_bytes <= 0:
+            return
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            # 說明：<key>.mp4.part.mp4 是其他輸出正在寫入的區段，不可刪除
+            if not name.endswith('.mp4') or name.endswith(PARTIAL_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -11,22 +11,28 @@ from typing import Optional
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QMessageBox, QMenuBar, QMenu, QStatusBar, QTabWidget, QStackedWidget,
-    QFileDialog
+    QFileDialog, QInputDialog
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QFont
 
-from pipeline import KaraokeProject, KaraokeWorkflow
+import config
+from pipeline import KaraokeProject, KaraokeWorkflow, RenderQueue
+from pipeline.render_queue import launch_detached
 from gui.widgets.import_dialog import ImportVideoDialog
 from gui.widgets.output_options_dialog import OutputOptionsDialog
 from gui.widgets.progress_dialog import ProgressDialog
 from gui.widgets.lyrics_timing_panel import LyricsTimingPanel
 from gui.widgets.preview_player import PreviewPlayer
 from gui.widgets.color_group_panel import ColorGroupPanel
-from gui.workers import SeparationWorker, RenderWorker
+from core.video import PROFILE_PREVIEW, EncodeProfile
+from gui.workers import SeparationWorker, RenderWorker, QaSheetWorker, ProxyWorker
 
 logger = logging.getLogger(__name__)
 
+# 即時預覽：至少編碼完成一個 fragment（秒）後才開始播放
+PROGRESSIVE_PREVIEW_MIN_SEC = 2.0
+
 
 class MainWindow(QMainWindow):
     """主視窗 - Train Bookara Maker v2"""
@@ -35,6 +41,11 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.project = KaraokeProject()
         self.separation_worker = None
+        self.render_worker = None
+        self.proxy_worker = None
+        # 已取消、仍在結束中的代理檔工作（保留參照直到執行緒結束）
+        self._retired_proxy_workers = []
+        self.qa_worker = None
         self.init_ui()
         self.setup_menu()
         logger.info("MainWindow initialized")
@@ -156,6 +167,25 @@ class MainWindow(QMainWindow):
         save_action = file_menu.addAction('儲存專案')
         save_action.triggered.connect(self.on_save_project)
         
+        file_menu.addSeparator()
+
+        draft_action = file_menu.addAction('草稿輸出（代理檔）')
+        draft_action.triggered.connect(self.on_export_draft)
+
+        progressive_action = file_menu.addAction('匯出並即時預覽')
+        progressive_action.triggered.connect(self.on_export_progressive)
+
+        queue_action = file_menu.addAction('加入輸出佇列')
+        queue_action.triggered.connect(self.on_queue_export)
+
+        run_queue_action = file_menu.addAction('背景執行輸出佇列')
+        run_queue_action.triggered.connect(self.on_run_queue)
+
+        # 分段增量輸出（只重新編碼字幕有變更的區段，其餘沿用分段快取）
+        self.incremental_action = file_menu.addAction('分段增量輸出')
+        self.incremental_action.setCheckable(True)
+        self.incremental_action.setChecked(config.INCREMENTAL_RENDER)
+
         file_menu.addSeparator()
         
         exit_action = file_menu.addAction('離開')
@@ -170,6 +200,8 @@ class MainWindow(QMainWindow):
         view_menu = menubar.addMenu('檢視')
         preview_action = view_menu.addAction('預覽播放器')
         preview_action.triggered.connect(self.on_preview_player)
+        qa_action = view_menu.addAction('輸出 QA 總覽圖')
+        qa_action.triggered.connect(self.on_qa_sheet)
     
     def on_import_video(self):
         """導入影片"""
@@ -187,6 +219,7 @@ class MainWindow(QMainWindow):
             
             # 更新專案狀態
             self.project.video_path = file_path
+            self.project.proxy_path = None
             self.project.project_name = Path(file_path).stem
             
             # 建立輸出目錄
@@ -196,6 +229,8 @@ class MainWindow(QMainWindow):
             
             # 開始分離（背景執行）
             self._start_separation(file_path, output_options)
+            # 同時產生預覽用代理檔
+            self._start_proxy(file_path)
             
             logger.info(f"Import started: {file_path}")
 
@@ -218,10 +253,58 @@ class MainWindow(QMainWindow):
         self.preview_player.setFocus()
         self.statusBar().showMessage('已進入預覽播放器')
 
+    def on_qa_sheet(self):
+        """從輸出影片擷取每行開始畫面並拼成總覽圖"""
+        if not self.project.lrc_timeline:
+            QMessageBox.warning(self, '提醒', '請先載入字幕')
+            return
+        output_video = self.project.output_path
+        if not output_video or not os.path.exists(output_video):
+            output_video, _ = QFileDialog.getOpenFileName(
+                self,
+                "選擇輸出影片",
+                "",
+                "MP4 檔案 (*.mp4);;所有檔案 (*)",
+            )
+            if not output_video:
+                return
+        every_n_lines, ok = QInputDialog.getInt(self, 'QA 總覽圖', '每幾行擷取一張：', 1, 1, 20, 1)
+        if not ok:
+            return
+
+        progress_dialog = ProgressDialog(self, "正在擷取 QA 畫面...")
+        progress_dialog.show()
+        qa_dir = str(Path(output_video).with_suffix('')) + "_qa"
+        self.qa_worker = QaSheetWorker(output_video, self.project.lrc_timeline, qa_dir, every_n_lines)
+        self.qa_worker.progress.connect(progress_dialog.update)
+        self.qa_worker.finished.connect(
+            lambda sheet_path: self._on_qa_sheet_complete(sheet_path, progress_dialog)
+        )
+        self.qa_worker.error.connect(
+            lambda err: self._on_qa_sheet_error(err, progress_dialog)
+        )
+        progress_dialog.cancel_requested.connect(self.qa_worker.cancel)
+        self.qa_worker.cancelled.connect(
+            lambda: self.statusBar().showMessage('已取消 QA 總覽圖')
+        )
+        self.qa_worker.start()
+
+    def _on_qa_sheet_complete(self, sheet_path: str, progress_dialog):
+        """QA 總覽圖完成"""
+        progress_dialog.accept()
+        self.statusBar().showMessage('QA 總覽圖已產生')
+        QMessageBox.information(self, '完成', f'QA 總覽圖已輸出：\n{sheet_path}')
+
+    def _on_qa_sheet_error(self, error: str, progress_dialog):
+        """QA 總覽圖失敗"""
+        progress_dialog.reject()
+        QMessageBox.critical(self, '錯誤', f'QA 總覽圖產生失敗：\n{error}')
+
     def _sync_preview_player(self):
-        """同步預覽播放器資料"""
-        if self.project.video_path:
-            self.preview_player.set_media(self.project.video_path)
+        """同步預覽播放器資料（有代理檔時播放代理檔）"""
+        preview_video = self.project.get_preview_video()
+        if preview_video:
+            self.preview_player.set_media(preview_video)
         elif self.project.stems:
             audio_path = (
                 self.project.stems.get('music')
@@ -232,6 +315,41 @@ class MainWindow(QMainWindow):
         if self.project.lrc_timeline:
             self.preview_player.set_timeline(self.project.lrc_timeline)
 
+    def _start_proxy(self, video_path: str):
+        """背景產生代理檔（不顯示進度視窗；取消仍在進行的上一個代理檔）"""
+        self._retire_proxy_worker()
+        self.proxy_worker = ProxyWorker(video_path)
+        self.proxy_worker.finished.connect(self._on_proxy_ready)
+        self.proxy_worker.error.connect(
+            lambda err: logger.warning(f"Proxy generation failed: {err}")
+        )
+        self.proxy_worker.start()
+
+    def _retire_proxy_worker(self):
+        """取消目前的代理檔工作（結果不再處理）"""
+        self._retired_proxy_workers = [
+            worker for worker in self._retired_proxy_workers if worker.isRunning()
+        ]
+        worker, self.proxy_worker = self.proxy_worker, None
+        if worker is None or not worker.isRunning():
+            return
+        # 說明：上一部影片的代理檔晚到時不可覆蓋目前專案的 proxy_path
+        worker.finished.disconnect()
+        worker.error.disconnect()
+        worker.cancel()
+        # 說明：執行中的 QThread 被回收會使程式中止，保留參照直到結束
+        self._retired_proxy_workers.append(worker)
+
+    def _on_proxy_ready(self, proxy_path: str):
+        """代理檔完成：預覽改用代理檔"""
+        if self.sender() is not self.proxy_worker:
+            # 說明：已發出但尚未處理的舊結果（上一部影片）
+            return
+        self.project.proxy_path = proxy_path
+        if self.content_stack.currentWidget() is self.preview_player:
+            self._sync_preview_player()
+        logger.info(f"Proxy ready: {proxy_path}")
+
     def _on_subtitle_config_changed(self, config: dict):
         """字幕設定變更"""
         self.project.subtitle_config = config
@@ -257,6 +375,10 @@ class MainWindow(QMainWindow):
         self.separation_worker.error.connect(
             lambda err: self._on_separation_error(err, progress_dialog)
         )
+        progress_dialog.cancel_requested.connect(self.separation_worker.cancel)
+        self.separation_worker.cancelled.connect(
+            lambda: self.statusBar().showMessage('已取消音訊分離')
+        )
         self.separation_worker.start()
     
     def _on_separation_complete(self, stems: dict, progress_dialog):
@@ -296,33 +418,95 @@ class MainWindow(QMainWindow):
 
     def on_export_video(self):
         """匯出影片"""
+        export_args = self._prepare_export()
+        if not export_args:
+            return
+        audio, ass_path, output_path = export_args
+        self._start_render(self.project.video_path, audio, ass_path, output_path)
+
+    def on_export_draft(self):
+        """以代理檔快速輸出低解析度草稿（正式輸出仍使用原始影片）"""
+        if not self.project.proxy_path or not os.path.exists(self.project.proxy_path):
+            QMessageBox.warning(self, '提醒', '代理檔尚未產生完成，請稍候')
+            return
+        export_args = self._prepare_export('draft.mp4')
+        if not export_args:
+            return
+        audio, ass_path, output_path = export_args
+        self._start_render(self.project.proxy_path, audio, ass_path, output_path, profile=PROFILE_PREVIEW)
+
+    def on_export_progressive(self):
+        """匯出影片並在編碼途中開始預覽已完成的部分"""
+        export_args = self._prepare_export()
+        if not export_args:
+            return
+        audio, ass_path, output_path = export_args
+        self._start_progressive_render(self.project.video_path, audio, ass_path, output_path)
+
+    def on_queue_export(self):
+        """將匯出工作加入輸出佇列"""
+        export_args = self._prepare_export()
+        if not export_args:
+            return
+        audio, ass_path, output_path = export_args
+        queue = RenderQueue()
+        job = queue.add_job(
+            self.project.video_path,
+            audio['audio_path'],
+            ass_path,
+            output_path,
+            stems=audio['stems'],
+            stem_volumes=audio['stem_volumes'],
+        )
+        self.statusBar().showMessage(f'已加入輸出佇列：{job.job_id}')
+        estimate = queue.estimate_remaining()
+        estimate_text = (
+            f'\n預估全部完成約需 {int(estimate) // 60} 分 {int(estimate) % 60} 秒'
+            if estimate is not None else ''
+        )
+        QMessageBox.information(
+            self,
+            '完成',
+            f'已加入輸出佇列（待處理 {len(queue.pending_jobs())} 項）{estimate_text}\n\n'
+            f'可從「檔案 > 背景執行輸出佇列」開始輸出，關閉程式後仍會繼續。'
+        )
+
+    def on_run_queue(self):
+        """在獨立行程中執行輸出佇列"""
+        queue = RenderQueue()
+        pending = len(queue.pending_jobs())
+        if not pending:
+            QMessageBox.information(self, '提示', '輸出佇列中沒有待處理的工作')
+            return
+        if launch_detached(queue.queue_path) is None:
+            # 說明：已有執行器在跑，新加入的工作會由它接手，不再啟動第二個
+            self.statusBar().showMessage(f'輸出佇列已在執行中（待處理 {pending} 項）')
+            return
+        self.statusBar().showMessage(f'輸出佇列已在背景執行（{pending} 項）')
+        logger.info(f"Render queue launched: {pending} pending jobs")
+
+    def _prepare_export(self, default_name: str = 'export.mp4') -> Optional[tuple]:
+        """準備匯出參數（音訊、字幕、輸出路徑）"""
         if not self.project.video_path:
             QMessageBox.warning(self, '提醒', '請先匯入影片')
-            return
+            return None
         if not self.project.lrc_timeline:
             QMessageBox.warning(self, '提醒', '請先載入字幕')
-            return
+            return None
 
         workflow = KaraokeWorkflow(self.project.subtitle_config)
         ass_path = self._ensure_ass_file(workflow)
         if not ass_path:
             QMessageBox.warning(self, '提醒', '無法產生 ASS 字幕')
-            return
+            return None
 
-        audio_path = self._get_default_audio_path()
-        if not audio_path:
-            audio_path, _ = QFileDialog.getOpenFileName(
-                self,
-                "選擇音訊檔案",
-                "",
-                "音訊檔案 (*.wav *.mp3 *.flac *.m4a);;所有檔案 (*)",
-            )
-            if not audio_path:
-                return
+        audio = self._choose_audio_source()
+        if not audio:
+            return None
 
         default_output = ""
         if self.project.project_name:
-            default_output = f"output/{self.project.project_name}/export.mp4"
+            default_output = f"output/{self.project.project_name}/{default_name}"
 
         output_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -331,15 +515,12 @@ class MainWindow(QMainWindow):
             "MP4 檔案 (*.mp4);;所有檔案 (*)",
         )
         if not output_path:
-            return
+            return None
 
-        self._start_render(self.project.video_path, audio_path, ass_path, output_path)
+        return audio, ass_path, output_path
 
     def _ensure_ass_file(self, workflow: KaraokeWorkflow) -> str:
-        """確保 ASS 字幕存在"""
-        if self.project.ass_file_path and Path(self.project.ass_file_path).exists():
-            return self.project.ass_file_path
-
+        """依目前時間軸重新產生 ASS 字幕（分段渲染依內容判斷需重新編碼的區段）"""
         stems_dir = self.project.stems_dir
         if not stems_dir:
             stems_dir = f"output/{self.project.project_name or 'export'}/stems"
@@ -351,22 +532,82 @@ class MainWindow(QMainWindow):
         self.project.ass_content = ass_content
         return ass_path
 
-    def _get_default_audio_path(self) -> Optional[str]:
-        """取得預設音訊路徑"""
-        if not self.project.stems:
-            return None
-        return (
-            self.project.stems.get('music')
-            or self.project.stems.get('original')
-        )
+    def _choose_audio_source(self) -> Optional[dict]:
+        """
+        選擇輸出音訊：單一音軌，或以分軌直接混音（可調人聲音量，不產生中間檔）
+
+        Returns:
+            {'audio_path', 'stems', 'stem_volumes'}；取消時回傳 None
+        """
+        stems = self.project.stems or {}
+        options = {}  # 顯示文字 -> 音軌 key（None 表示自訂混音）
+        if stems.get('music'):
+            options['music（去人聲）'] = 'music'
+        if stems.get('original'):
+            options['original（原始音訊）'] = 'original'
+        mix_stems, _ = KaraokeWorkflow.select_mix_stems(stems, 1.0)
+        if 'vocal' in mix_stems and len(mix_stems) > 1:
+            options['自訂混音（調整人聲音量）'] = None
+
+        if not options:
+            audio_path, _ = QFileDialog.getOpenFileName(
+                self,
+                "選擇音訊檔案",
+                "",
+                "音訊檔案 (*.wav *.mp3 *.flac *.m4a);;所有檔案 (*)",
+            )
+            if not audio_path:
+                return None
+            return {'audio_path': audio_path, 'stems': None, 'stem_volumes': None}
+
+        labels = list(options.keys())
+        label = labels[0]
+        if len(labels) > 1:
+            label, ok = QInputDialog.getItem(
+                self,
+                '選擇音軌',
+                '輸出使用的音軌（字幕未變更時只替換音訊，不重新編碼影像）：',
+                labels,
+                0,
+                False,
+            )
+            if not ok:
+                return None
+
+        key = options[label]
+        if key is not None:
+            return {'audio_path': stems[key], 'stems': None, 'stem_volumes': None}
 
-    def _start_render(self, video_path: str, audio_path: str, subtitle_path: str, output_path: str):
+        level, ok = QInputDialog.getInt(self, '人聲音量', '人聲音量（%）：', 30, 0, 200, 5)
+        if not ok:
+            return None
+        mix_stems, volumes = KaraokeWorkflow.select_mix_stems(stems, level / 100.0)
+        return {'audio_path': None, 'stems': mix_stems, 'stem_volumes': volumes}
+
+    def _start_render(
+        self,
+        video_path: str,
+        audio: dict,
+        subtitle_path: str,
+        output_path: str,
+        profile: Optional[EncodeProfile] = None,
+    ):
         """開始影片輸出"""
         progress_dialog = ProgressDialog(self, "正在輸出影片...")
         progress_dialog.show()
 
-        self.render_worker = RenderWorker(video_path, audio_path, subtitle_path, output_path)
+        self.render_worker = RenderWorker(
+            video_path,
+            audio['audio_path'],
+            subtitle_path,
+            output_path,
+            stems=audio['stems'],
+            stem_volumes=audio['stem_volumes'],
+            incremental=self.incremental_action.isChecked(),
+            profile=profile,
+        )
         self.render_worker.progress.connect(progress_dialog.update)
+        self.render_worker.eta.connect(progress_dialog.set_eta)
         self.render_worker.message.connect(
             lambda msg: progress_dialog.update(progress_dialog.progress_bar.value(), msg)
         )
@@ -376,8 +617,53 @@ class MainWindow(QMainWindow):
         self.render_worker.error.connect(
             lambda err: self._on_render_error(err, progress_dialog)
         )
+        progress_dialog.cancel_requested.connect(self.render_worker.cancel)
+        self.render_worker.cancelled.connect(
+            lambda: self.statusBar().showMessage('已取消影片輸出')
+        )
+        self.render_worker.start()
+
+    def _start_progressive_render(self, video_path: str, audio: dict, subtitle_path: str, output_path: str):
+        """開始可即時預覽的影片輸出（不顯示模態進度視窗，進度顯示於狀態列）"""
+        self._progressive_started = False
+        self.render_worker = RenderWorker(
+            video_path,
+            audio['audio_path'],
+            subtitle_path,
+            output_path,
+            stems=audio['stems'],
+            stem_volumes=audio['stem_volumes'],
+            progressive=True,
+        )
+        self.render_worker.progress.connect(
+            lambda value: self.statusBar().showMessage(f'正在輸出影片... {value}%')
+        )
+        self.render_worker.encoded.connect(
+            lambda seconds: self._on_render_encoded(seconds, output_path)
+        )
+        self.render_worker.finished.connect(self._on_progressive_render_complete)
+        self.render_worker.error.connect(
+            lambda err: QMessageBox.critical(self, '錯誤', f'影片輸出失敗：\n{err}')
+        )
         self.render_worker.start()
 
+    def _on_render_encoded(self, seconds: float, output_path: str):
+        """已有可播放的 fragment 時開啟預覽，之後持續更新已編碼位置"""
+        if not self._progressive_started and seconds >= PROGRESSIVE_PREVIEW_MIN_SEC:
+            self._progressive_started = True
+            if self.project.lrc_timeline:
+                self.preview_player.set_timeline(self.project.lrc_timeline)
+            self.preview_player.set_progressive_media(output_path)
+            self.content_stack.setCurrentWidget(self.preview_player)
+        self.preview_player.set_encoded_position(seconds)
+
+    def _on_progressive_render_complete(self, output_path: str):
+        """即時預覽輸出完成"""
+        self.preview_player.finish_progressive(output_path)
+        self.project.output_path = output_path
+        self._update_status()
+        self.statusBar().showMessage('影片輸出完成')
+
     def _on_render_complete(self, output_path: str, progress_dialog):
         """輸出完成"""
         progress_dialog.accept()
@@ -493,6 +779,15 @@ class MainWindow(QMainWindow):
             event.accept()
         else:
             event.ignore()
+            return
+
+        # 結束前取消背景工作（終止 FFmpeg / 模型並清除未完成檔案）
+        self.lyrics_panel.stop_ruby_fill()
+        workers = [self.separation_worker, self.render_worker, self.proxy_worker, self.qa_worker]
+        for worker in workers + self._retired_proxy_workers:
+            if worker and worker.isRunning():
+                worker.cancel()
+                worker.wait(5000)
         
         logger.info("Application closed")
 
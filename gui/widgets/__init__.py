@@ -5,6 +5,7 @@ GUI 元件公開介面
 from .lrc_editor import LrcEditorDialog, LrcTimelineEditor
 from .lrc_line_editor import LrcLineEditor
 from .output_options_dialog import OutputOptionsDialog
+from .retime_dialog import RetimeDialog
 from .ruby_edit_dialog import RubyEditDialog
 from .lyrics_timing_panel import LyricsTimingPanel
 from .preview_player import PreviewPlayer
@@ -17,6 +18,7 @@ __all__ = [
     'LrcTimelineEditor',
     'LrcLineEditor',
     'OutputOptionsDialog',
+    'RetimeDialog',
     'RubyEditDialog',
     'LyricsTimingPanel',
     'PreviewPlayer',
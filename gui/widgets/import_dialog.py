@@ -12,9 +12,11 @@ from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
     QFileDialog, QProgressBar, QMessageBox, QLineEdit
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QCoreApplication
 from PyQt5.QtGui import QFont
 
+from gui.workers import MediaProbeWorker
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +30,7 @@ class ImportVideoDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.selected_file = None
+        self.probe_worker = None  # 媒體資訊讀取中的工作線程
         self.init_ui()
         self.setWindowTitle("匯入影片")
         self.resize(500, 200)
@@ -59,9 +62,9 @@ class ImportVideoDialog(QDialog):
         
         button_layout.addStretch()
         
-        ok_btn = QPushButton("確定")
-        ok_btn.clicked.connect(self.on_ok_clicked)
-        button_layout.addWidget(ok_btn)
+        self.ok_btn = QPushButton("確定")
+        self.ok_btn.clicked.connect(self.on_ok_clicked)
+        button_layout.addWidget(self.ok_btn)
         
         cancel_btn = QPushButton("取消")
         cancel_btn.clicked.connect(self.reject)
@@ -87,17 +90,58 @@ class ImportVideoDialog(QDialog):
         )
         
         if file_path:
+            self.selected_file = None
             if self.validate_file(file_path):
-                self.selected_file = file_path
                 self.file_path_label.setText(file_path)
-                logger.info(f"File selected: {file_path}")
+                self.start_probe(file_path)
             else:
-                self.selected_file = None
                 self.file_path_label.setText("")
-    
+
+    def start_probe(self, file_path: str):
+        """在背景讀取媒體資訊（完成前不可按確定）"""
+        self._release_probe_worker()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.ok_btn.setEnabled(False)
+
+        worker = MediaProbeWorker(file_path, self)
+        worker.probed.connect(self.on_probe_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.probe_worker = worker
+        worker.start()
+
+    def on_probe_finished(self, file_path: str, media_info):
+        """媒體資訊讀取完成"""
+        if self.sender() is not self.probe_worker:
+            return
+        self.probe_worker = None
+        self.progress_bar.setVisible(False)
+        self.ok_btn.setEnabled(True)
+
+        if self.validate_media(file_path, media_info):
+            self.selected_file = file_path
+            logger.info(f"File selected: {file_path}")
+        else:
+            self.file_path_label.setText("")
+
+    def done(self, result: int):
+        """關閉對話框（讀取中的工作線程交給應用程式，完成後自行釋放）"""
+        self._release_probe_worker()
+        super().done(result)
+
+    def _release_probe_worker(self):
+        """放棄目前的讀取（結果不再處理）"""
+        worker = self.probe_worker
+        self.probe_worker = None
+        if worker is None or not worker.isRunning():
+            return
+        worker.probed.disconnect(self.on_probe_finished)
+        # 說明：執行中的 QThread 不可隨對話框一起刪除
+        worker.setParent(QCoreApplication.instance())
+
     def validate_file(self, file_path: str) -> bool:
         """
-        驗證文件
+        驗證文件（不讀取媒體內容，可在 GUI 執行緒呼叫）
         
         檢查項目：
         - 文件存在性
@@ -128,8 +172,33 @@ class ImportVideoDialog(QDialog):
                 logger.error(error_msg)
                 self.validation_error.emit(error_msg)
                 return False
+
+            return True
+
+        except Exception as e:
+            error_msg = f"檔案驗證失敗：{e}"
+            logger.error(error_msg)
+            self.validation_error.emit(error_msg)
+            return False
+
+    def validate_media(self, file_path: str, media_info) -> bool:
+        """驗證媒體內容（需含影像與音訊串流；media_info 由 MediaProbeWorker 讀取）"""
+        try:
+            if media_info is None:
+                error_msg = f"無法讀取影片資訊（請確認已安裝 FFmpeg）：{file_path}"
+                logger.error(error_msg)
+                self.validation_error.emit(error_msg)
+                return False
+            if not media_info.has_video or not media_info.has_audio:
+                error_msg = "影片需同時包含影像與音訊串流"
+                logger.error(error_msg)
+                self.validation_error.emit(error_msg)
+                return False
             
-            logger.info(f"File validation passed: {file_path} ({file_size_mb:.1f}MB)")
+            logger.info(
+                f"File validation passed: {file_path} ({media_info.size / (1024 * 1024):.1f}MB, "
+                f"{media_info.width}x{media_info.height}, {media_info.duration or 0:.1f}s)"
+            )
             return True
         
         except Exception as e:
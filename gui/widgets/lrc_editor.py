@@ -105,9 +105,7 @@ class LrcTimelineEditor(QTableWidget):
         """更新指定詞的時間"""
         if not self.timeline:
             return
-        word = self.timeline.lines[line_idx].words[word_idx]  # 目標詞
-        word.start_time = start_time
-        word.end_time = end_time
+        self.timeline.update_word_time(line_idx, word_idx, start_time, end_time)
 
         row = self._row_map.get((line_idx, word_idx))
         if row is None:
@@ -129,9 +127,7 @@ class LrcTimelineEditor(QTableWidget):
         """時間變更事件"""
         if not self.timeline:
             return
-        word = self.timeline.lines[line_idx].words[word_idx]  # 目標詞
-        word.start_time = start_time
-        word.end_time = end_time
+        self.timeline.update_word_time(line_idx, word_idx, start_time, end_time)
         self.timing_changed.emit(line_idx, word_idx, start_time, end_time)
 
     def _on_item_changed(self, item: QTableWidgetItem):
@@ -150,17 +146,14 @@ class LrcTimelineEditor(QTableWidget):
 
     def _on_text_changed(self, line_idx: int, word_idx: int, text: str):
         """文字內容變更"""
-        word = self.timeline.lines[line_idx].words[word_idx]  # 目標詞
-        word.text = text
+        self.timeline.set_word_text(line_idx, word_idx, text)
         self.text_changed.emit(line_idx, word_idx, text)
 
     def _on_ruby_changed(self, line_idx: int, word_idx: int, ruby_text: str):
         """假名內容變更"""
         word = self.timeline.lines[line_idx].words[word_idx]  # 目標詞
-        if ruby_text:
-            word.ruby_pair = RubyPair(kanji=word.text, ruby=ruby_text)
-        else:
-            word.ruby_pair = None
+        ruby_pair = RubyPair(kanji=word.text, ruby=ruby_text) if ruby_text else None
+        self.timeline.set_word_ruby(line_idx, word_idx, ruby_pair)
         self.ruby_changed.emit(line_idx, word_idx, ruby_text)
 
     def add_line(self, text: str = ''):
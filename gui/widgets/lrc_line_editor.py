@@ -5,9 +5,11 @@ LRC 句子編輯表格
 - 以「一行一句」方式顯示
 - Ruby 只顯示在漢字上方
 - 提供字級游標與鍵盤操作
+- 訂閱時間軸變更通知，只更新受影響的列
+- 假名尚在背景產生的漢字上方顯示「…」
 """
 
-from typing import Optional
+from typing import List, Optional
 import html
 import re
 from functools import partial
@@ -22,6 +24,13 @@ from PyQt5.QtWidgets import (
 )
 
 from core.lrc import LrcLine, LrcParser, LrcTimeline, LrcWord, RubyPair
+from core.lrc.events import (
+    LINES_INSERTED,
+    LINES_REMOVED,
+    LINES_UPDATED,
+    WORD_TIMES,
+    TimelineChange,
+)
 from gui.widgets.ruby_edit_dialog import RubyEditDialog
 
 
@@ -69,7 +78,7 @@ class LrcLineEditor(QTableWidget):
         self.verticalHeader().setDefaultSectionSize(48)
         self.verticalHeader().setVisible(False)
         self.setSelectionBehavior(QTableWidget.SelectRows)
-        self.setSelectionMode(QTableWidget.SingleSelection)
+        self.setSelectionMode(QTableWidget.ExtendedSelection)
         self.setStyleSheet(
             "QTableWidget { color: #f5f5f5; }"
             "QTableWidget::item { color: #f5f5f5; }"
@@ -79,7 +88,11 @@ class LrcLineEditor(QTableWidget):
 
     def set_timeline(self, timeline: LrcTimeline):
         """設定時間軸並刷新"""
+        if self.timeline is not None:
+            self.timeline.unsubscribe(self._on_timeline_changed)
         self.timeline = timeline
+        if timeline is not None:
+            timeline.subscribe(self._on_timeline_changed)
         self.refresh()
 
     def refresh(self):
@@ -92,51 +105,115 @@ class LrcLineEditor(QTableWidget):
             self._is_updating = False
             return
 
-        for line_idx, line in enumerate(self.timeline.lines):
-            row = self.rowCount()
-            self.insertRow(row)
-            self._row_map[line_idx] = row
-
-            # 行號
-            line_item = QTableWidgetItem(str(line_idx + 1))
-            line_item.setFlags(Qt.ItemIsEnabled)
-            self.setItem(row, 0, line_item)
-
-            # 時間顯示（唯讀）
-            time_text = self._format_time_range(line)
-            time_item = QTableWidgetItem(time_text)
-            time_item.setFlags(Qt.ItemIsEnabled)
-            self.setItem(row, 1, time_item)
-
-            # Ruby 顯示
-            display_label = QLabel(self._build_ruby_html(line, line_idx))
-            display_label.setTextFormat(Qt.RichText)
-            display_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            display_label.setStyleSheet("color: #f5f5f5;")
-            display_label.setTextInteractionFlags(Qt.TextBrowserInteraction)
-            display_label.setOpenExternalLinks(False)
-            display_label.linkActivated.connect(
-                partial(self._on_display_link_clicked, line_idx),
-            )
-            self.setCellWidget(row, 2, display_label)
-
-            # 群組選擇
-            group_combo = self._build_group_combo(line_idx, line.group_id)
-            self.setCellWidget(row, 3, group_combo)
+        for line_idx in range(len(self.timeline.lines)):
+            self.insertRow(line_idx)
+            self._row_map[line_idx] = line_idx
+            self._populate_row(line_idx)
 
         self._is_updating = False
         self._ensure_cursor()
         self._update_line_display(self._current_line_idx)
 
+    def _populate_row(self, line_idx: int):
+        """建立一列的儲存格（列與行索引相同）"""
+        line = self.timeline.lines[line_idx]
+        row = line_idx
+
+        # 行號
+        line_item = QTableWidgetItem(str(line_idx + 1))
+        line_item.setFlags(Qt.ItemIsEnabled)
+        self.setItem(row, 0, line_item)
+
+        # 時間顯示（唯讀）
+        time_text = self._format_time_range(line)
+        time_item = QTableWidgetItem(time_text)
+        time_item.setFlags(Qt.ItemIsEnabled)
+        self.setItem(row, 1, time_item)
+
+        # Ruby 顯示（行索引存於屬性，插入 / 刪除行時更新）
+        display_label = QLabel(self._build_ruby_html(line, line_idx))
+        display_label.setProperty('line_idx', line_idx)
+        display_label.setTextFormat(Qt.RichText)
+        display_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        display_label.setStyleSheet("color: #f5f5f5;")
+        display_label.setTextInteractionFlags(Qt.TextBrowserInteraction)
+        display_label.setOpenExternalLinks(False)
+        display_label.linkActivated.connect(
+            partial(self._on_display_link_clicked, display_label),
+        )
+        self.setCellWidget(row, 2, display_label)
+
+        # 群組選擇
+        group_combo = self._build_group_combo(line_idx, line.group_id)
+        self.setCellWidget(row, 3, group_combo)
+
+    def _on_timeline_changed(self, change: TimelineChange):
+        """時間軸變更通知：只更新受影響的列"""
+        if not self.timeline:
+            return
+        if change.kind == LINES_INSERTED:
+            self._insert_rows(change.start, change.stop)
+        elif change.kind == LINES_REMOVED:
+            self._remove_rows(change.start, change.stop)
+        if self.rowCount() != len(self.timeline.lines):
+            self.refresh()
+            return
+        if change.kind == WORD_TIMES:
+            for line_idx in change.lines:
+                self._update_line_time(line_idx)
+        elif change.kind not in (LINES_INSERTED, LINES_REMOVED):
+            for line_idx in change.lines:
+                self._update_line_display(line_idx)
+                if change.kind == LINES_UPDATED:
+                    self._update_line_group(line_idx)
+
+    def _insert_rows(self, start: int, stop: int):
+        """插入列並位移後續列"""
+        if self.rowCount() + (stop - start) != len(self.timeline.lines):
+            return
+        self._is_updating = True
+        for line_idx in range(start, stop):
+            self.insertRow(line_idx)
+            self._populate_row(line_idx)
+        self._renumber_rows(stop)
+        self._is_updating = False
+        if self._current_line_idx >= start:
+            self._current_line_idx += stop - start
+        self._ensure_cursor()
+
+    def _remove_rows(self, start: int, stop: int):
+        """刪除列並位移後續列"""
+        if self.rowCount() - (stop - start) != len(self.timeline.lines):
+            return
+        self._is_updating = True
+        for _ in range(start, stop):
+            self.removeRow(start)
+        self._renumber_rows(start)
+        self._is_updating = False
+        if self._current_line_idx >= stop:
+            self._current_line_idx -= stop - start
+        elif self._current_line_idx >= start:
+            self._current_line_idx = start
+            self._current_word_idx = 0
+        self._ensure_cursor()
+
+    def _renumber_rows(self, start: int):
+        """更新 start 之後各列的行號與行索引屬性"""
+        for row in range(start, self.rowCount()):
+            line_item = self.item(row, 0)
+            if line_item:
+                line_item.setText(str(row + 1))
+            for column in (2, 3):
+                widget = self.cellWidget(row, column)
+                if widget is not None:
+                    widget.setProperty('line_idx', row)
+        self._row_map = {row: row for row in range(self.rowCount())}
+
     def update_word_time(self, line_idx: int, word_idx: int, start_time: float, end_time: float):
-        """更新指定詞的時間"""
+        """更新指定詞的時間（表格由變更通知更新）"""
         if not self.timeline:
             return
-        line = self.timeline.lines[line_idx]
-        word = line.words[word_idx]
-        word.start_time = start_time
-        word.end_time = end_time
-        self._update_line_time(line_idx)
+        self.timeline.update_word_time(line_idx, word_idx, start_time, end_time)
 
     def highlight_word(self, line_idx: int, word_idx: int):
         """高亮指定字"""
@@ -189,10 +266,11 @@ class LrcLineEditor(QTableWidget):
         line_idx = next((idx for idx, mapped in self._row_map.items() if mapped == row), row)
         self.set_cursor(line_idx, 0)
 
-    def _on_display_link_clicked(self, line_idx: int, link: str):
+    def _on_display_link_clicked(self, display_label: QLabel, link: str):
         """點擊顯示區文字時定位游標"""
         if not link.startswith('w'):
             return
+        line_idx = display_label.property('line_idx')
         try:
             word_idx = int(link[1:])
         except ValueError:
@@ -201,9 +279,7 @@ class LrcLineEditor(QTableWidget):
 
     def _on_line_text_changed(self, line_idx: int, text: str):
         """句子內容變更"""
-        line = self.timeline.lines[line_idx]
-        line.words = self._parse_line_words(text)
-        self._update_line_display(line_idx)
+        self.timeline.replace_line_words(line_idx, self._parse_line_words(text))
         self.set_cursor(line_idx, 0)
         self.line_text_changed.emit(line_idx, text)
 
@@ -225,18 +301,35 @@ class LrcLineEditor(QTableWidget):
         if group_id != current:
             self.timeline.lines[line_idx].group_id = current
         combo.setCurrentIndex(option_ids.index(current))
+        combo.setProperty('line_idx', line_idx)
         combo.currentIndexChanged.connect(
-            lambda _index, li=line_idx, cb=combo: self._on_group_changed(li, cb.currentData())
+            lambda _index, cb=combo: self._on_group_changed(
+                cb.property('line_idx'), cb.currentData()
+            )
         )
         return combo
 
+    def _update_line_group(self, line_idx: int):
+        """同步群組下拉（不觸發變更）"""
+        row = self._row_map.get(line_idx)
+        combo = self.cellWidget(row, 3) if row is not None else None
+        if not isinstance(combo, QComboBox):
+            return
+        index = combo.findData(self.timeline.lines[line_idx].group_id)
+        if index >= 0 and index != combo.currentIndex():
+            combo.blockSignals(True)
+            combo.setCurrentIndex(index)
+            combo.blockSignals(False)
+
     def _on_group_changed(self, line_idx: int, group_id: str):
         """群組變更"""
         if not self.timeline:
             return
         if line_idx < 0 or line_idx >= len(self.timeline.lines):
             return
-        self.timeline.lines[line_idx].group_id = group_id
+        if self.timeline.lines[line_idx].group_id == group_id:
+            return
+        self.timeline.set_line_group(line_idx, group_id)
 
     def set_group_options(self, options):
         """設定群組選項"""
@@ -266,6 +359,23 @@ class LrcLineEditor(QTableWidget):
             return
         self._on_line_text_changed(line_idx, text)
 
+    def selected_line_indices(self) -> List[int]:
+        """目前選取的行索引（排序）"""
+        rows = {index.row() for index in self.selectionModel().selectedRows()}
+        indices = [self.get_line_index_by_row(row) for row in rows]
+        return sorted(line_idx for line_idx in indices if line_idx is not None)
+
+    def visible_line_indices(self) -> List[int]:
+        """目前顯示在畫面上的行索引（列與行索引相同）"""
+        count = self.rowCount()
+        if not count:
+            return []
+        first = self.rowAt(0)
+        last = self.rowAt(self.viewport().height() - 1)
+        first = first if first >= 0 else 0
+        last = last if last >= 0 else count - 1
+        return list(range(first, last + 1))
+
     def get_line_index_by_row(self, row: int) -> Optional[int]:
         """透過列索引找出行索引"""
         for line_idx, mapped in self._row_map.items():
@@ -331,21 +441,24 @@ class LrcLineEditor(QTableWidget):
 
         base_style = "color:#f5f5f5;"
         highlight_style = "color:#7CFC00; font-weight:600;"
+        pending_style = "color:#808080;"
 
         for index, word in enumerate(line.words):
             ruby_text = word.ruby_pair.ruby if word.ruby_pair else ''
-            show_ruby = bool(ruby_text) and self._has_kanji(word.text)
+            pending = not ruby_text and word.ruby_pending  # 假名背景產生中
+            show_ruby = (bool(ruby_text) or pending) and self._has_kanji(word.text)
             if show_ruby:
                 has_ruby = True
 
             word_text = html.escape(word.text)
-            ruby_text = html.escape(ruby_text)
+            ruby_text = html.escape(ruby_text) if not pending else '…'
             if highlight_idx is not None and index == highlight_idx:
                 word_text = f"<span style='{highlight_style}'>{word_text}</span>"
-                ruby_text = f"<span style='{highlight_style}'>{ruby_text}</span>"
+                ruby_style = highlight_style
             else:
                 word_text = f"<span style='{base_style}'>{word_text}</span>"
-                ruby_text = f"<span style='{base_style}'>{ruby_text}</span>"
+                ruby_style = base_style
+            ruby_text = f"<span style='{pending_style if pending else ruby_style}'>{ruby_text}</span>"
 
             link_text = f"<a href='w{index}' style='text-decoration:none;'>{word_text}</a>"
 
@@ -443,9 +556,5 @@ class LrcLineEditor(QTableWidget):
             return
 
         ruby_text = dialog.get_ruby().strip()
-        if ruby_text:
-            word.ruby_pair = RubyPair(kanji=word.text, ruby=ruby_text)
-        else:
-            word.ruby_pair = None
-
-        self._update_line_display(self._current_line_idx)
+        ruby_pair = RubyPair(kanji=word.text, ruby=ruby_text) if ruby_text else None
+        self.timeline.set_word_ruby(self._current_line_idx, self._current_word_idx, ruby_pair)
@@ -5,9 +5,13 @@
 - 載入音訊與歌詞
 - 邊播邊按空白鍵標記時間
 - 回退修正與輸出 LRC
+- 批次調整時間（平移 / 伸縮 / 速度比例 / 對齊格線）
+- 復原 / 重做（Ctrl+Z / Ctrl+Y，連續打點合併為一步）
+- 載入 TXT 時假名於背景產生（畫面上的行優先，手動設定的假名不覆蓋）
 """
 
-from typing import List, Optional, Tuple
+from contextlib import nullcontext
+from typing import List, Optional
 
 from PyQt5.QtCore import Qt, QUrl, QEvent, pyqtSignal
 from PyQt5.QtGui import QKeySequence
@@ -31,9 +35,22 @@ from PyQt5.QtWidgets import (
 )
 
 from core.lrc import LrcParser, LrcTimeline, LrcWriter, LrcLine, LrcValidator, ValidationError
+from core.lrc.events import TimelineChange
+from core.lrc.history import EditJournal
+from core.lrc.retime import (
+    apply_offset,
+    change_tempo,
+    quantize_times,
+    shift_times,
+    stretch_times,
+)
+from core.lrc.ruby_fill import build_task, locate_line, pending_tasks
+from core.lrc.word_index import FlatWordIndex
 from core.subtitle import LrcToAssConverter, SubtitleConfig
 from gui.widgets.lrc_line_editor import LrcLineEditor
 from gui.widgets.lrc_editor import LrcEditorDialog
+from gui.widgets.retime_dialog import RetimeDialog
+from gui.workers import RubyFillWorker
 
 
 class LyricsTimingPanel(QWidget):
@@ -55,12 +72,10 @@ class LyricsTimingPanel(QWidget):
         self.subtitle_config = SubtitleConfig.from_dict(project_config)
         # 時間軸
         self.timeline: Optional[LrcTimeline] = None
-        # 單字索引列表
-        self._word_positions: List[Tuple[int, int]] = []
+        # 單字扁平索引（扁平序號 <-> 行 / 詞索引）
+        self._word_index = FlatWordIndex()
         # 目前索引
         self._current_index = 0
-        # 位置索引映射
-        self._word_index_map = {}
         # 預設時長（秒）
         self._default_duration = 0.5
         # 空白鍵標記狀態
@@ -69,6 +84,12 @@ class LyricsTimingPanel(QWidget):
         # 句子編輯狀態
         self._active_line_idx = None
         self._is_sentence_updating = False
+        # 編輯紀錄（復原 / 重做）
+        self._journal: Optional[EditJournal] = None
+        # 已訂閱變更通知的時間軸
+        self._watched_timeline: Optional[LrcTimeline] = None
+        # 背景假名產生工作
+        self._ruby_worker: Optional[RubyFillWorker] = None
         # 初始化 UI
         self._setup_ui()
         # 初始化播放器
@@ -83,9 +104,12 @@ class LyricsTimingPanel(QWidget):
     def set_project(self, project):
         """更新專案狀態"""
         self.project = project
+        self.stop_ruby_fill()
         self.timeline = None
         self.editor.set_timeline(LrcTimeline())
         self._reset_mark_state()
+        self._attach_journal()
+        self._watch_timeline()
         self._active_line_idx = None
         self._sync_sentence_editor(-1)
         self.lrc_loaded.emit(False)
@@ -133,6 +157,20 @@ class LyricsTimingPanel(QWidget):
         self.delete_line_btn.clicked.connect(self._on_delete_line)
         file_layout.addWidget(self.delete_line_btn)
 
+        self.retime_btn = QPushButton("批次調整時間")
+        self.retime_btn.clicked.connect(self._on_retime)
+        file_layout.addWidget(self.retime_btn)
+
+        self.undo_btn = QPushButton("復原")
+        self.undo_btn.setEnabled(False)
+        self.undo_btn.clicked.connect(self._on_undo)
+        file_layout.addWidget(self.undo_btn)
+
+        self.redo_btn = QPushButton("重做")
+        self.redo_btn.setEnabled(False)
+        self.redo_btn.clicked.connect(self._on_redo)
+        file_layout.addWidget(self.redo_btn)
+
         layout.addLayout(file_layout)
 
         # 播放控制列
@@ -168,6 +206,7 @@ class LyricsTimingPanel(QWidget):
         self.editor = LrcLineEditor(self)
         self.editor.line_text_changed.connect(self._on_line_text_changed)
         self.editor.cursor_changed.connect(self._on_cursor_changed)
+        self.editor.verticalScrollBar().valueChanged.connect(self._prioritize_visible_ruby)
         self.editor.set_group_options(self._get_enabled_group_options())
 
         side_panel = QWidget()
@@ -211,6 +250,9 @@ class LyricsTimingPanel(QWidget):
         QShortcut(QKeySequence(Qt.Key_W), self, activated=lambda: self._adjust_speed(0.1))
         QShortcut(QKeySequence(Qt.Key_Z), self, activated=lambda: self._seek_by(-5.0))
         QShortcut(QKeySequence(Qt.Key_X), self, activated=lambda: self._seek_by(5.0))
+        QShortcut(QKeySequence("Ctrl+Z"), self, activated=self._on_undo)
+        QShortcut(QKeySequence("Ctrl+Y"), self, activated=self._on_redo)
+        QShortcut(QKeySequence("Ctrl+Shift+Z"), self, activated=self._on_redo)
 
     def _on_open_audio(self):
         """載入音訊檔案"""
@@ -244,16 +286,22 @@ class LyricsTimingPanel(QWidget):
         if not file_path:
             return
 
+        self.stop_ruby_fill()
         try:
-            self.timeline = self.parser.parse_file(file_path, auto_ruby=True)
+            # 說明：假名延後到背景產生，大檔案也能立即顯示
+            self.timeline = self.parser.parse_file(file_path, auto_ruby=True, defer_ruby=True)
         except Exception as exc:
             QMessageBox.critical(self, "錯誤", f"載入字幕失敗：\n{exc}")
             return
+        # [offset:] 直接寫入各詞時間，編輯與播放看到的時間一致
+        apply_offset(self.timeline)
+        self._attach_journal()
+        self._watch_timeline()
 
         self.project.lrc_timeline = self.timeline
         self.editor.set_timeline(self.timeline)
+        self._start_ruby_fill()
         self.lyrics_label.setText(f"字幕：{file_path}")
-        self._build_word_positions()
         self._reset_mark_state()
         self._highlight_current_word()
         self.lrc_loaded.emit(True)
@@ -347,8 +395,7 @@ class LyricsTimingPanel(QWidget):
         return "\n".join(lines)
 
     def _on_line_text_changed(self, _line_idx: int, _text: str):
-        """句子內容變更時重新建立索引"""
-        self._build_word_positions()
+        """句子內容變更時重置標記位置（索引由變更通知更新）"""
         self._reset_mark_state()
         self._highlight_current_word()
         if self._active_line_idx is not None:
@@ -356,7 +403,7 @@ class LyricsTimingPanel(QWidget):
 
     def _on_cursor_changed(self, line_idx: int, word_idx: int):
         """游標變更時同步標記索引"""
-        index = self._word_index_map.get((line_idx, word_idx))
+        index = self._word_index.to_flat(line_idx, word_idx)
         if index is not None:
             self._current_index = index
         self._active_line_idx = line_idx
@@ -391,6 +438,8 @@ class LyricsTimingPanel(QWidget):
             self.timeline = LrcTimeline()
             self.project.lrc_timeline = self.timeline
             self.editor.set_timeline(self.timeline)
+            self._attach_journal()
+            self._watch_timeline()
 
         row = self.editor.currentRow()
         line_idx = self.editor.get_line_index_by_row(row)
@@ -398,9 +447,7 @@ class LyricsTimingPanel(QWidget):
             line_idx = len(self.timeline.lines)
         insert_idx = max(0, line_idx)
 
-        self.timeline.lines.insert(insert_idx, LrcLine(words=[]))
-        self.editor.refresh()
-        self._build_word_positions()
+        self.timeline.insert_line(insert_idx, LrcLine(words=[]))
         self._reset_mark_state()
         self.editor.set_cursor(insert_idx, 0)
 
@@ -427,8 +474,6 @@ class LyricsTimingPanel(QWidget):
             return
 
         self.timeline.remove_line(line_idx)
-        self.editor.refresh()
-        self._build_word_positions()
         self._reset_mark_state()
 
         if not self.timeline.lines:
@@ -439,6 +484,165 @@ class LyricsTimingPanel(QWidget):
         new_idx = min(line_idx, len(self.timeline.lines) - 1)
         self.editor.set_cursor(new_idx, 0)
 
+    def _on_retime(self):
+        """批次調整選取行或整首的時間"""
+        if not self.timeline or not self.timeline.lines:
+            QMessageBox.warning(self, "提醒", "尚未載入字幕")
+            return
+
+        selected = [
+            line_idx
+            for line_idx in self.editor.selected_line_indices()
+            if self.timeline.lines[line_idx].words
+        ]
+        anchor_time = self.timeline.lines[selected[0]].start_time if selected else 0.0
+        playback_time = None
+        if self.player.mediaStatus() != QMediaPlayer.NoMedia:
+            playback_time = self.player.position() / 1000.0
+
+        dialog = RetimeDialog(len(selected), anchor_time, playback_time, self)
+        if dialog.exec_() != dialog.Accepted:
+            return
+
+        lines = selected if dialog.selection_only() else None
+        mode = dialog.mode()
+        value = dialog.value()
+        anchor = dialog.anchor()
+        try:
+            if mode == 'shift':
+                shift_times(self.timeline, value, lines)
+            elif mode == 'stretch':
+                stretch_times(self.timeline, value, anchor, lines)
+            elif mode == 'tempo':
+                change_tempo(self.timeline, value, anchor, lines)
+            else:
+                quantize_times(self.timeline, value, anchor, lines)
+        except ValueError as exc:
+            QMessageBox.warning(self, "提醒", f"調整失敗：{exc}")
+            return
+
+        self._update_undo_buttons()
+
+    def _attach_journal(self):
+        """為目前時間軸建立新的編輯紀錄"""
+        if self._journal is not None:
+            self._journal.detach()
+        self._journal = EditJournal(self.timeline) if self.timeline else None
+        self._update_undo_buttons()
+
+    def _watch_timeline(self):
+        """改為訂閱目前時間軸的變更通知（單字索引先於面板更新）"""
+        if self._watched_timeline is not None:
+            self._watched_timeline.unsubscribe(self._on_timeline_changed)
+        self._watched_timeline = self.timeline
+        if self.timeline is not None:
+            self._word_index.attach(self.timeline)
+            self.timeline.subscribe(self._on_timeline_changed)
+        else:
+            self._word_index.detach()
+
+    def _on_timeline_changed(self, _change: TimelineChange):
+        """時間軸變更通知：更新復原按鈕"""
+        self._update_undo_buttons()
+
+    def _start_ruby_fill(self):
+        """在背景產生待產生的假名（畫面上的行優先）"""
+        self.stop_ruby_fill()
+        if not self.timeline:
+            return
+        tasks = pending_tasks(self.timeline, self.editor.visible_line_indices())
+        if not tasks:
+            return
+        worker = RubyFillWorker()
+        worker.line_ready.connect(self._on_ruby_ready)
+        worker.finished.connect(self._on_ruby_fill_finished)
+        worker.enqueue(tasks)
+        self._ruby_worker = worker
+        worker.start()
+
+    def stop_ruby_fill(self):
+        """停止背景假名產生（切換歌詞或關閉視窗時）"""
+        worker = self._ruby_worker
+        self._ruby_worker = None
+        if worker is not None and worker.isRunning():
+            worker.cancel()
+            worker.wait()
+
+    def _prioritize_visible_ruby(self, *_args):
+        """捲動後將畫面上尚未產生假名的行排到最前面"""
+        worker = self._ruby_worker
+        if worker is None or not self.timeline:
+            return
+        tasks = []
+        for line_idx in self.editor.visible_line_indices():
+            task = build_task(self.timeline, line_idx)
+            if task is not None:
+                tasks.append(task)
+        if not tasks:
+            return
+        worker.enqueue(tasks, front=True)
+        if not worker.isRunning():
+            worker.start()
+
+    def _on_ruby_ready(self, task, readings: list):
+        """套用背景產生的假名（已手動設定或文字已修改的詞略過）"""
+        if not self.timeline:
+            return
+        line_idx = locate_line(self.timeline, task)
+        if line_idx is not None:
+            self.timeline.fill_ruby(line_idx, readings)
+
+    def _on_ruby_fill_finished(self):
+        """工作線程結束時，若期間又加入工作則再次啟動"""
+        worker = self._ruby_worker
+        if worker is not None and len(worker.queue) and not worker.cancel_token.is_cancelled:
+            worker.start()
+
+    def _edit_group(self, label: str, merge_key: Optional[str] = None):
+        """將區塊內的編輯合併為一個復原步驟"""
+        if self._journal is None:
+            return nullcontext()
+        return self._journal.group(label, merge_key)
+
+    def _update_undo_buttons(self):
+        """更新復原 / 重做按鈕狀態"""
+        journal = self._journal
+        self.undo_btn.setEnabled(bool(journal and journal.can_undo))
+        self.redo_btn.setEnabled(bool(journal and journal.can_redo))
+        self.undo_btn.setToolTip(
+            f"復原：{journal.undo_label()}" if journal and journal.can_undo else ""
+        )
+        self.redo_btn.setToolTip(
+            f"重做：{journal.redo_label()}" if journal and journal.can_redo else ""
+        )
+
+    def _on_undo(self):
+        """復原一步"""
+        if self._journal is None or self._space_is_down:
+            return
+        self._after_history_step(self._journal.undo())
+
+    def _on_redo(self):
+        """重做一步"""
+        if self._journal is None or self._space_is_down:
+            return
+        self._after_history_step(self._journal.redo())
+
+    def _after_history_step(self, step):
+        """復原 / 重做後刷新表格並將標記游標移到最早變更的字"""
+        if step is None:
+            return
+        self._reset_mark_state()
+        indices = [self._word_index.to_flat(*ref) for ref in step.word_refs()]
+        indices = [index for index in indices if index is not None]
+        if indices:
+            self._current_index = min(indices)
+        if self._current_index < len(self._word_index):
+            self._highlight_current_word()
+        if self._active_line_idx is not None:
+            self._sync_sentence_editor(min(self._active_line_idx, len(self.timeline.lines) - 1))
+        self._update_undo_buttons()
+
     def set_subtitle_config(self, config: dict):
         """更新字幕設定"""
         self.subtitle_config = SubtitleConfig.from_dict(config)
@@ -517,17 +721,6 @@ class LyricsTimingPanel(QWidget):
         centisecs = int(round((seconds % 1) * 100))
         return f"{minutes:02d}:{secs:02d}.{centisecs:02d}"
 
-    def _build_word_positions(self):
-        """建立單字索引列表"""
-        self._word_positions = []
-        self._word_index_map = {}
-        if not self.timeline:
-            return
-        for line_idx, line in enumerate(self.timeline.lines):
-            for word_idx, _word in enumerate(line.words):
-                self._word_index_map[(line_idx, word_idx)] = len(self._word_positions)
-                self._word_positions.append((line_idx, word_idx))
-
     def _reset_mark_state(self):
         """重置標記狀態"""
         self._current_index = 0
@@ -536,9 +729,10 @@ class LyricsTimingPanel(QWidget):
 
     def _highlight_current_word(self):
         """高亮目前字"""
-        if not self._word_positions:
+        ref = self._word_index.to_ref(self._current_index)
+        if ref is None:
             return
-        line_idx, word_idx = self._word_positions[self._current_index]
+        line_idx, word_idx = ref
         self.editor.highlight_word(line_idx, word_idx)
 
     def _start_mark(self):
@@ -549,32 +743,35 @@ class LyricsTimingPanel(QWidget):
         if self.player.mediaStatus() == QMediaPlayer.NoMedia:
             QMessageBox.warning(self, "提醒", "請先載入音訊")
             return
-        if self._current_index >= len(self._word_positions):
+        if self._current_index >= len(self._word_index):
             QMessageBox.information(self, "提示", "已完成所有標記")
             return
 
         current_time = self.player.position() / 1000.0
-        line_idx, word_idx = self._word_positions[self._current_index]
-
-        # 更新目前字的開始時間
-        self.editor.update_word_time(
-            line_idx,
-            word_idx,
-            current_time,
-            current_time + self._default_duration,
-        )
+        line_idx, word_idx = self._word_index.to_ref(self._current_index)
 
-        # 更新上一字的結束時間
-        if self._current_index > 0:
-            prev_line_idx, prev_word_idx = self._word_positions[self._current_index - 1]
-            prev_word = self.timeline.lines[prev_line_idx].words[prev_word_idx]
+        # 說明：連續打點合併為同一個復原步驟
+        with self._edit_group("打點標記", merge_key='mark'):
+            # 更新目前字的開始時間
             self.editor.update_word_time(
-                prev_line_idx,
-                prev_word_idx,
-                prev_word.start_time,
+                line_idx,
+                word_idx,
                 current_time,
+                current_time + self._default_duration,
             )
 
+            # 更新上一字的結束時間
+            if self._current_index > 0:
+                prev_line_idx, prev_word_idx = self._word_index.to_ref(self._current_index - 1)
+                prev_word = self.timeline.lines[prev_line_idx].words[prev_word_idx]
+                self.editor.update_word_time(
+                    prev_line_idx,
+                    prev_word_idx,
+                    prev_word.start_time,
+                    current_time,
+                )
+        self._update_undo_buttons()
+
         self._pending_index = self._current_index
         self._space_is_down = True
         self._highlight_current_word()
@@ -587,22 +784,29 @@ class LyricsTimingPanel(QWidget):
             return
 
         current_time = self.player.position() / 1000.0
-        line_idx, word_idx = self._word_positions[self._pending_index]
+        ref = self._word_index.to_ref(self._pending_index)
+        if ref is None:
+            self._pending_index = None
+            self._space_is_down = False
+            return
+        line_idx, word_idx = ref
         word = self.timeline.lines[line_idx].words[word_idx]
         end_time = max(current_time, word.start_time + 0.01)
 
-        self.editor.update_word_time(
-            line_idx,
-            word_idx,
-            word.start_time,
-            end_time,
-        )
+        with self._edit_group("打點標記", merge_key='mark'):
+            self.editor.update_word_time(
+                line_idx,
+                word_idx,
+                word.start_time,
+                end_time,
+            )
+        self._update_undo_buttons()
 
         self._current_index = self._pending_index + 1
         self._pending_index = None
         self._space_is_down = False
 
-        if self._current_index < len(self._word_positions):
+        if self._current_index < len(self._word_index):
             self._highlight_current_word()
 
     def eventFilter(self, obj, event):
@@ -632,5 +836,4 @@ class LyricsTimingPanel(QWidget):
             return
         dialog = LrcEditorDialog(self.timeline, self)
         dialog.exec_()
-        self.editor.refresh()
-        self._build_word_positions()
+        self._update_undo_buttons()
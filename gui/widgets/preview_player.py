@@ -31,6 +31,12 @@ class PreviewPlayer(QWidget):
         self.player = QMediaPlayer()
         # LRC 時間軸
         self.timeline: Optional[LrcTimeline] = None
+        # 播放中的媒體路徑
+        self.media_path: Optional[str] = None
+        # 是否為仍在編碼中的輸出檔
+        self.progressive = False
+        # 已編碼到的時間（毫秒）
+        self.encoded_ms = 0
         # 初始化 UI
         self._setup_ui()
         # 設置信號
@@ -83,11 +89,40 @@ class PreviewPlayer(QWidget):
         """設置信號"""
         self.player.positionChanged.connect(self._on_position_changed)
         self.player.durationChanged.connect(self._on_duration_changed)
+        self.player.mediaStatusChanged.connect(self._on_media_status_changed)
 
     def set_media(self, file_path: str):
         """設置媒體檔案（影片或音訊）"""
+        self.progressive = False
+        self.media_path = file_path
         self.player.setMedia(QMediaContent(QUrl.fromLocalFile(file_path)))
 
+    def set_progressive_media(self, file_path: str):
+        """設置仍在編碼中的輸出檔（fragmented MP4，只能播放已編碼部分）"""
+        self.set_media(file_path)
+        self.progressive = True
+        self.encoded_ms = 0
+        self.player.play()
+        self.play_btn.setText("暫停")
+
+    def set_encoded_position(self, seconds: float):
+        """更新已編碼到的時間"""
+        if not self.progressive:
+            return
+        self.encoded_ms = int(seconds * 1000)
+        if self.player.duration() <= 0:
+            self.progress_slider.setMaximum(self.encoded_ms)
+        self._update_time_label()
+
+    def finish_progressive(self, file_path: str):
+        """編碼完成：重新載入完整檔案並保留播放位置"""
+        position_ms = self.player.position() if self.progressive else 0
+        playing = self.player.state() == QMediaPlayer.PlayingState
+        self.set_media(file_path)
+        self.player.setPosition(position_ms)
+        if playing:
+            self.player.play()
+
     def set_timeline(self, timeline: Optional[LrcTimeline]):
         """設置 LRC 時間軸"""
         self.timeline = timeline
@@ -119,8 +154,21 @@ class PreviewPlayer(QWidget):
 
     def _on_seek(self, position_ms: int):
         """拖動進度條"""
+        if self.progressive:
+            position_ms = min(position_ms, self.encoded_ms)
         self.player.setPosition(position_ms)
 
+    def _on_media_status_changed(self, status):
+        """播到已編碼部分的結尾時重新載入檔案以讀取新的 fragment"""
+        if not self.progressive or status != QMediaPlayer.EndOfMedia:
+            return
+        position_ms = self.player.position()
+        if position_ms >= self.encoded_ms:
+            return
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(self.media_path)))
+        self.player.setPosition(position_ms)
+        self.player.play()
+
     def _on_speed_change(self, speed_str: str):
         """改變播放速度"""
         rate = float(speed_str.replace('x', ''))
@@ -137,6 +185,11 @@ class PreviewPlayer(QWidget):
         current_str = f"{current_sec // 60:02d}:{current_sec % 60:02d}"
         duration_str = f"{duration_sec // 60:02d}:{duration_sec % 60:02d}"
 
+        if self.progressive:
+            encoded_sec = self.encoded_ms // 1000
+            encoded_str = f"{encoded_sec // 60:02d}:{encoded_sec % 60:02d}"
+            self.time_label.setText(f"{current_str} / 已編碼 {encoded_str}")
+            return
         self.time_label.setText(f"{current_str} / {duration_str}")
 
     def _update_lyrics(self, position_sec: float):
@@ -41,6 +41,10 @@ class ProgressDialog(QDialog):
         # 狀態標籤
         self.status_label = QLabel("開始處理...")
         layout.addWidget(self.status_label)
+
+        # 預估剩餘時間
+        self.eta_label = QLabel("")
+        layout.addWidget(self.eta_label)
         
         # 取消按鈕
         cancel_btn = QPushButton("取消")
@@ -55,6 +59,14 @@ class ProgressDialog(QDialog):
         if message:
             self.status_label.setText(message)
     
+    def set_eta(self, seconds: float):
+        """更新預估剩餘時間（負值表示無法預估）"""
+        if seconds < 0:
+            self.eta_label.setText("")
+            return
+        total = int(round(seconds))
+        self.eta_label.setText(f"預估剩餘時間：{total // 60:02d}:{total % 60:02d}")
+
     def on_cancel(self):
         """取消操作"""
         self.cancel_requested.emit()
@@ -0,0 +1,148 @@
+"""
+批次調整時間對話框
+
+作用：
+- 選擇調整方式（平移 / 伸縮 / 速度比例 / 對齊格線）與數值
+- 選擇套用範圍（選取行或整首）
+"""
+
+from typing import Optional
+
+from PyQt5.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QFormLayout,
+    QComboBox,
+    QDoubleSpinBox,
+    QRadioButton,
+    QPushButton,
+    QLabel,
+)
+
+# 調整方式（代碼, 顯示名稱）
+RETIME_MODES = [
+    ('shift', '平移（秒）'),
+    ('stretch', '伸縮倍率'),
+    ('tempo', '速度比例（新 / 原）'),
+    ('quantize', '對齊格線（秒）'),
+]
+
+
+class RetimeDialog(QDialog):
+    """批次調整時間對話框"""
+
+    def __init__(
+        self,
+        selected_count: int,
+        anchor_time: float = 0.0,
+        playback_time: Optional[float] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        # 選取行數
+        self.selected_count = selected_count
+        # 選取範圍第一個詞的開始時間（預設錨點）
+        self.anchor_time = anchor_time
+        # 目前播放位置（可作為錨點）
+        self.playback_time = playback_time
+        # 初始化 UI
+        self._setup_ui()
+
+    def _setup_ui(self):
+        """建立 UI"""
+        self.setWindowTitle("批次調整時間")
+        self.resize(360, 220)
+
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.mode_combo = QComboBox()
+        for mode, label in RETIME_MODES:
+            self.mode_combo.addItem(label, mode)
+        self.mode_combo.currentIndexChanged.connect(self._on_mode_changed)
+        form.addRow("方式", self.mode_combo)
+
+        self.value_spin = QDoubleSpinBox()
+        self.value_spin.setDecimals(3)
+        form.addRow("數值", self.value_spin)
+
+        self.anchor_combo = QComboBox()
+        self.anchor_combo.addItem(f"範圍開頭（{self.anchor_time:.2f}s）", self.anchor_time)
+        if self.playback_time is not None:
+            self.anchor_combo.addItem(
+                f"目前播放位置（{self.playback_time:.2f}s）", self.playback_time
+            )
+        self.anchor_combo.addItem("歌曲開頭（0s）", 0.0)
+        form.addRow("錨點 / 格線起點", self.anchor_combo)
+
+        layout.addLayout(form)
+
+        scope_layout = QHBoxLayout()
+        self.selection_radio = QRadioButton(f"選取的 {self.selected_count} 行")
+        self.all_radio = QRadioButton("整首")
+        if self.selected_count > 0:
+            self.selection_radio.setChecked(True)
+        else:
+            self.selection_radio.setEnabled(False)
+            self.all_radio.setChecked(True)
+        scope_layout.addWidget(self.selection_radio)
+        scope_layout.addWidget(self.all_radio)
+        layout.addLayout(scope_layout)
+
+        self.hint_label = QLabel()
+        self.hint_label.setWordWrap(True)
+        layout.addWidget(self.hint_label)
+
+        button_layout = QHBoxLayout()
+        ok_btn = QPushButton("套用")
+        ok_btn.clicked.connect(self.accept)
+        button_layout.addWidget(ok_btn)
+
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_btn)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self._on_mode_changed()
+
+    def _on_mode_changed(self, *_args):
+        """依方式調整數值範圍與說明"""
+        mode = self.mode()
+        if mode == 'shift':
+            self.value_spin.setRange(-600.0, 600.0)
+            self.value_spin.setSingleStep(0.05)
+            self.value_spin.setValue(0.0)
+            self.hint_label.setText("正值延後、負值提前")
+        elif mode == 'stretch':
+            self.value_spin.setRange(0.1, 10.0)
+            self.value_spin.setSingleStep(0.01)
+            self.value_spin.setValue(1.0)
+            self.hint_label.setText("以錨點為中心拉長（> 1）或壓縮（< 1）")
+        elif mode == 'tempo':
+            self.value_spin.setRange(0.1, 10.0)
+            self.value_spin.setSingleStep(0.01)
+            self.value_spin.setValue(1.0)
+            self.hint_label.setText("音源變快時填入 > 1（例如 1.05 表示快 5%）")
+        else:
+            self.value_spin.setRange(0.01, 10.0)
+            self.value_spin.setSingleStep(0.01)
+            self.value_spin.setValue(0.05)
+            self.hint_label.setText("開始與結束時間對齊到格線（例如一拍的秒數）")
+
+    def mode(self) -> str:
+        """調整方式代碼"""
+        return self.mode_combo.currentData()
+
+    def value(self) -> float:
+        """數值"""
+        return self.value_spin.value()
+
+    def anchor(self) -> float:
+        """錨點（秒）"""
+        return float(self.anchor_combo.currentData())
+
+    def selection_only(self) -> bool:
+        """是否只套用到選取行"""
+        return self.selection_radio.isChecked()
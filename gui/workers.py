@@ -4,17 +4,37 @@ Phase 1.1.4: 後台任務線程
 """
 
 import logging
-from typing import Dict, Optional
+import time
+from typing import Dict, Iterable, Optional
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
 from core.audio.separator import AudioSeparator
-from core.video import VideoRenderer
+from core.cancellation import CancellationToken, CancelledError
+from core.lrc import LrcTimeline, RubyGenerator
+from core.lrc.ruby_fill import RubyFillQueue, RubyTask, generate_readings
+from core.video import EncodeProfile, ProxyGenerator, VideoRenderer, get_media_probe
+from core.video.history import estimate_remaining
+from pipeline import KaraokeWorkflow
 
 logger = logging.getLogger(__name__)
 
 
-class SeparationWorker(QThread):
+class CancellableWorker(QThread):
+    """可取消的工作線程（取消旗標傳入核心層，終止子行程並刪除未完成檔案）"""
+
+    cancelled = pyqtSignal()  # 已取消並完成清理
+
+    def __init__(self):
+        super().__init__()
+        self.cancel_token = CancellationToken()  # 取消旗標
+
+    def cancel(self):
+        """要求取消（可由 GUI 執行緒呼叫）"""
+        self.cancel_token.cancel()
+
+
+class SeparationWorker(CancellableWorker):
     """音源分離工作線程"""
     
     # 信號
@@ -46,32 +66,54 @@ class SeparationWorker(QThread):
                 self.video_path,
                 self.output_dir,
                 self.output_options,
+                cancel_token=self.cancel_token,
             )  # stems 路徑字典
             
             self.progress.emit(100)
             self.message.emit("音訊分離完成！")
             self.finished.emit(stems)
         
+        except CancelledError:
+            logger.info("Separation cancelled")
+            self.cancelled.emit()
         except Exception as e:
             logger.error(f"Separation error: {e}")
             self.error.emit(str(e))
             self.progress.emit(0)
 
 
-class RenderWorker(QThread):
+class RenderWorker(CancellableWorker):
     """影片輸出工作線程"""
 
     progress = pyqtSignal(int)  # 進度百分比 (0-100)
     message = pyqtSignal(str)   # 狀態訊息
     finished = pyqtSignal(str)  # 完成，回傳輸出路徑
     error = pyqtSignal(str)     # 錯誤訊息
+    encoded = pyqtSignal(float)  # 已編碼到的影片時間（秒）
+    eta = pyqtSignal(float)      # 預估剩餘秒數（-1 表示無法預估）
 
-    def __init__(self, video_path: str, audio_path: str, subtitle_path: str, output_path: str):
+    def __init__(
+        self,
+        video_path: str,
+        audio_path: str,
+        subtitle_path: str,
+        output_path: str,
+        incremental: bool = False,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+        progressive: bool = False,
+        profile: Optional[EncodeProfile] = None,
+    ):
         super().__init__()
         self.video_path = video_path
         self.audio_path = audio_path
         self.subtitle_path = subtitle_path
         self.output_path = output_path
+        self.incremental = incremental  # 分段渲染（沿用未變更區段）
+        self.stems = stems  # 直接混音的分軌（None 表示使用 audio_path）
+        self.stem_volumes = stem_volumes  # 分軌音量
+        self.progressive = progressive  # 輸出 fragmented MP4（編碼途中即可預覽）
+        self.profile = profile  # 編碼設定（None 表示預設）
         self.renderer = VideoRenderer()
 
     def run(self):
@@ -80,15 +122,38 @@ class RenderWorker(QThread):
             self.message.emit("開始輸出影片...")
             self.progress.emit(0)
 
+            # 分段輸出事前不知道需重新編碼多少區段，只依目前速度推算
+            predicted = None
+            if self.progressive or not self.incremental:
+                predicted = self.renderer.predict_render_time(self.video_path, self.profile)
+            self.eta.emit(predicted if predicted is not None else -1.0)
+            started = time.time()
+
             def on_progress(value: int):
                 self.progress.emit(value)
+                remaining = estimate_remaining(predicted, time.time() - started, value)
+                self.eta.emit(remaining if remaining is not None else -1.0)
 
-            success = self.renderer.render(
+            kwargs = {}
+            if self.progressive:
+                # 分段渲染最後才串接輸出檔，即時預覽需單次輸出 fragmented MP4
+                render = self.renderer.render
+                kwargs = {'fragmented': True, 'time_callback': self.encoded.emit}
+            elif self.incremental:
+                render = self.renderer.render_incremental
+            else:
+                render = self.renderer.render
+            success = render(
                 self.video_path,
                 self.audio_path,
                 self.subtitle_path,
                 self.output_path,
                 progress_callback=on_progress,
+                stems=self.stems,
+                stem_volumes=self.stem_volumes,
+                profile=self.profile,
+                cancel_token=self.cancel_token,
+                **kwargs,
             )
 
             if success:
@@ -97,12 +162,133 @@ class RenderWorker(QThread):
                 self.finished.emit(self.output_path)
             else:
                 self.error.emit("FFmpeg 輸出失敗")
+        except CancelledError:
+            logger.info("Render cancelled")
+            self.cancelled.emit()
         except Exception as exc:
             logger.error(f"Render error: {exc}")
             self.error.emit(str(exc))
             self.progress.emit(0)
 
 
+class ProxyWorker(CancellableWorker):
+    """代理檔產生工作線程"""
+
+    progress = pyqtSignal(int)  # 進度百分比 (0-100)
+    finished = pyqtSignal(str)  # 完成，回傳代理檔路徑
+    error = pyqtSignal(str)     # 錯誤訊息
+
+    def __init__(self, video_path: str):
+        super().__init__()
+        self.video_path = video_path
+        self.generator = ProxyGenerator()
+
+    def run(self):
+        """產生代理檔"""
+        try:
+            proxy_path = self.generator.generate(
+                self.video_path, self.progress.emit, cancel_token=self.cancel_token
+            )
+            if proxy_path:
+                self.finished.emit(proxy_path)
+            else:
+                self.error.emit("代理檔產生失敗")
+        except CancelledError:
+            self.cancelled.emit()
+        except Exception as exc:
+            logger.error(f"Proxy error: {exc}")
+            self.error.emit(str(exc))
+
+
+class QaSheetWorker(CancellableWorker):
+    """QA 總覽圖工作線程"""
+
+    progress = pyqtSignal(int)  # 進度百分比 (0-100)
+    finished = pyqtSignal(str)  # 完成，回傳總覽圖路徑
+    error = pyqtSignal(str)     # 錯誤訊息
+
+    def __init__(self, output_video: str, timeline: LrcTimeline, qa_dir: str, every_n_lines: int = 1):
+        super().__init__()
+        self.output_video = output_video
+        self.timeline = timeline
+        self.qa_dir = qa_dir
+        self.every_n_lines = every_n_lines  # 每 N 行擷取一張
+
+    def run(self):
+        """擷取截圖並拼圖"""
+        try:
+            sheet_path = KaraokeWorkflow().export_qa_sheet(
+                self.output_video,
+                self.timeline,
+                self.qa_dir,
+                every_n_lines=self.every_n_lines,
+                progress_callback=self.progress.emit,
+                cancel_token=self.cancel_token,
+            )
+            if sheet_path:
+                self.finished.emit(sheet_path)
+            else:
+                self.error.emit("無法產生 QA 總覽圖")
+        except CancelledError:
+            self.cancelled.emit()
+        except Exception as exc:
+            logger.error(f"QA sheet error: {exc}")
+            self.error.emit(str(exc))
+
+
+class MediaProbeWorker(QThread):
+    """媒體資訊讀取工作線程（快取未命中時 ffprobe 在背景執行，不阻塞 GUI）"""
+
+    probed = pyqtSignal(str, object)  # (路徑, MediaInfo；無法讀取時為 None)
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def run(self):
+        """讀取媒體資訊"""
+        try:
+            media_info = get_media_probe().probe(self.path)
+        except Exception as exc:
+            logger.error(f"Media probe error: {exc}")
+            media_info = None
+        self.probed.emit(self.path, media_info)
+
+
+class RubyFillWorker(CancellableWorker):
+    """背景假名產生工作線程（佇列處理完即結束，結果由 GUI 執行緒套用）"""
+
+    line_ready = pyqtSignal(object, list)  # (RubyTask, [(詞索引, 詞文字, 假名)])
+
+    def __init__(self):
+        super().__init__()
+        self.queue = RubyFillQueue()  # 待處理的行（可見行排在前面）
+
+    def enqueue(self, tasks: Iterable[RubyTask], front: bool = False):
+        """加入工作（可由 GUI 執行緒呼叫）"""
+        self.queue.put(tasks, front=front)
+
+    def cancel(self):
+        """停止並丟棄剩餘工作"""
+        super().cancel()
+        self.queue.close()
+
+    def run(self):
+        """依佇列順序產生假名"""
+        # 說明：kakasi 在背景執行緒初始化，載入歌詞時不阻塞介面
+        generator = RubyGenerator()
+        while not self.cancel_token.is_cancelled:
+            task = self.queue.get()
+            if task is None:
+                return
+            try:
+                readings = generate_readings(generator, task)
+            except Exception as exc:
+                logger.error(f"Ruby generation error: {exc}")
+                readings = [(word_idx, text, '') for word_idx, text in task.words]
+            self.line_ready.emit(task, readings)
+
+
 if __name__ == "__main__":
     import sys
     from PyQt5.QtWidgets import QApplication
@@ -2,10 +2,17 @@
 Pipeline module exports
 """
 
+from .bulk_import import BulkImportReport, ImportResult, import_directory
 from .project import KaraokeProject
+from .render_queue import RenderJob, RenderQueue
 from .workflow import KaraokeWorkflow
 
 __all__ = [
+    'BulkImportReport',
+    'ImportResult',
+    'import_directory',
     'KaraokeProject',
     'KaraokeWorkflow',
+    'RenderJob',
+    'RenderQueue',
 ]
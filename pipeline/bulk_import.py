@@ -0,0 +1,267 @@
+"""
+歌詞批次匯入
+
+作用：
+- 掃描目錄下所有 .txt / .lrc 歌詞，以多行程並行解析並產生假名
+- 每個工作行程只初始化一次解析器與 kakasi 轉換器
+- 依原檔結構輸出：.lrc 為增強格式（每句一行、含詞時間與假名），.txt 為每句一行、漢字以 {假名} 標注
+  （載入時不需再產生假名），皆可直接由 LrcParser 載入
+- 輸出目錄寫入 import_report.json（成功 / 失敗清單、錯誤訊息與耗時）
+
+用法：
+    python -m pipeline.bulk_import lyrics/ output/lyrics [--workers 4] [--no-ruby]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core.lrc import LrcParser, LrcWriter
+
+logger = logging.getLogger(__name__)
+
+# 支援的歌詞副檔名
+LYRICS_EXTENSIONS = ('.txt', '.lrc')
+# 錯誤報告檔名
+REPORT_NAME = 'import_report.json'
+
+# 工作行程內共用的解析器與寫入器（由 _init_worker 建立）
+_worker_parser: Optional[LrcParser] = None
+_worker_writer: Optional[LrcWriter] = None
+
+
+@dataclass
+class ImportResult:
+    """單一檔案的匯入結果"""
+
+    source_path: str
+    output_path: str
+    success: bool = False
+    lines: int = 0
+    words: int = 0
+    seconds: float = 0.0
+    error: str = ''
+
+
+@dataclass
+class BulkImportReport:
+    """批次匯入結果"""
+
+    source_dir: str
+    output_dir: str
+    workers: int
+    results: List[ImportResult] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    @property
+    def succeeded(self) -> List[ImportResult]:
+        return [result for result in self.results if result.success]
+
+    @property
+    def failed(self) -> List[ImportResult]:
+        return [result for result in self.results if not result.success]
+
+    @property
+    def files_per_second(self) -> float:
+        """每秒處理檔案數"""
+        if self.wall_time <= 0:
+            return 0.0
+        return len(self.results) / self.wall_time
+
+    def to_dict(self) -> dict:
+        """轉為字典"""
+        return {
+            'source_dir': self.source_dir,
+            'output_dir': self.output_dir,
+            'workers': self.workers,
+            'total': len(self.results),
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'wall_time': self.wall_time,
+            'files_per_second': self.files_per_second,
+            'errors': [
+                {'source_path': result.source_path, 'error': result.error}
+                for result in self.failed
+            ],
+            'results': [asdict(result) for result in self.results],
+        }
+
+    def save(self, path: str):
+        """寫入 JSON 報告"""
+        with open(path, 'w', encoding='utf-8') as file_handle:
+            json.dump(self.to_dict(), file_handle, ensure_ascii=False, indent=2)
+
+
+def find_lyrics_files(
+    source_dir: str, recursive: bool = True, exclude_dir: Optional[str] = None
+) -> List[str]:
+    """列出目錄下的歌詞檔（依路徑排序，exclude_dir 之下的檔案不列入）"""
+    root = Path(source_dir)
+    excluded = Path(exclude_dir).resolve() if exclude_dir else None
+    candidates = root.rglob('*') if recursive else root.iterdir()
+    return sorted(
+        str(path)
+        for path in candidates
+        if path.is_file()
+        and path.suffix.lower() in LYRICS_EXTENSIONS
+        and not (excluded and _is_within(path.resolve(), excluded))
+    )
+
+
+def _is_within(path: Path, directory: Path) -> bool:
+    """path 是否為 directory 本身或位於其下"""
+    return path == directory or directory in path.parents
+
+
+def import_directory(
+    source_dir: str,
+    output_dir: str,
+    workers: Optional[int] = None,
+    auto_ruby: bool = True,
+    recursive: bool = True,
+    default_word_duration: float = 0.5,
+) -> BulkImportReport:
+    """
+    批次匯入目錄下的歌詞
+
+    Args:
+        source_dir: 歌詞目錄
+        output_dir: 輸出目錄（寫入歌詞檔與 import_report.json）
+        workers: 工作行程數（None 為 CPU 核心數，1 為在目前行程依序處理）
+        auto_ruby: .txt 是否自動產生假名
+        recursive: 是否包含子目錄
+        default_word_duration: 預設詞時長（秒）
+
+    Raises:
+        ValueError: 輸出目錄與歌詞目錄相同，或包含歌詞目錄
+    """
+    source_root = Path(source_dir).resolve()
+    output_root = Path(output_dir).resolve()
+    if _is_within(source_root, output_root):
+        # 說明：輸出會覆寫原檔，或下次匯入時把輸出當成來源
+        raise ValueError(f'output directory must not contain the source directory: {output_dir}')
+    # 說明：輸出目錄位於歌詞目錄內時，排除先前的輸出
+    files = find_lyrics_files(source_dir, recursive=recursive, exclude_dir=output_dir)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files) or 1))
+    report = BulkImportReport(source_dir, output_dir, workers)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 說明：輸出保留子目錄結構與原檔名
+    tasks = [
+        (source, str(Path(output_dir) / Path(source).relative_to(source_dir)), auto_ruby)
+        for source in files
+    ]
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(default_word_duration)
+        report.results = [_import_file(task) for task in tasks]
+    else:
+        report.results = _run_pool(tasks, workers, default_word_duration)
+    report.wall_time = time.perf_counter() - started
+
+    report.save(str(Path(output_dir) / REPORT_NAME))
+    logger.info(
+        "Bulk import done: %d ok, %d failed, %.1f files/s (%d workers)",
+        len(report.succeeded),
+        len(report.failed),
+        report.files_per_second,
+        workers,
+    )
+    return report
+
+
+def _run_pool(tasks: list, workers: int, default_word_duration: float) -> List[ImportResult]:
+    """以行程池處理（工作行程當機時，未完成的檔案記為失敗）"""
+    # 說明：小檔案多，分批送出以減少行程間往返
+    chunksize = max(1, len(tasks) // (workers * 8))
+    results: List[ImportResult] = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(default_word_duration,),
+        ) as executor:
+            for result in executor.map(_import_file, tasks, chunksize=chunksize):
+                results.append(result)
+    except BrokenProcessPool as e:
+        logger.error(f"Bulk import worker crashed: {e}")
+        for source, target, _ in tasks[len(results):]:
+            results.append(ImportResult(source, target, error=f'工作行程異常結束：{e}'))
+    return results
+
+
+def _init_worker(default_word_duration: float):
+    """工作行程初始化：建立解析器並預先初始化 kakasi"""
+    global _worker_parser, _worker_writer
+    _worker_parser = LrcParser(default_word_duration=default_word_duration)
+    _ = _worker_parser.ruby_generator
+    _worker_writer = LrcWriter()
+
+
+def _import_file(task: Tuple[str, str, bool]) -> ImportResult:
+    """解析單一檔案並輸出（.lrc 為增強格式，.txt 為附假名的純文字）"""
+    source, target, auto_ruby = task
+    result = ImportResult(source, target)
+    started = time.perf_counter()
+    try:
+        timeline = _worker_parser.parse_file(source, auto_ruby=auto_ruby)
+        if not timeline.lines:
+            result.error = '沒有歌詞行'
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if target.lower().endswith('.txt'):
+                _worker_writer.write_txt_file(timeline, target)
+            else:
+                _worker_writer.write_file(timeline, target)
+            result.success = True
+            result.lines = len(timeline.lines)
+            result.words = sum(len(line.words) for line in timeline.lines)
+    except Exception as e:
+        result.error = f'{type(e).__name__}: {e}'
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='歌詞批次匯入')
+    arg_parser.add_argument('source_dir', help='歌詞目錄')
+    arg_parser.add_argument('output_dir', help='輸出目錄')
+    arg_parser.add_argument('--workers', type=int, default=None, help='工作行程數（預設為 CPU 核心數）')
+    arg_parser.add_argument('--no-ruby', action='store_true', help='不自動產生假名')
+    arg_parser.add_argument('--flat', action='store_true', help='不包含子目錄')
+    args = arg_parser.parse_args()
+
+    try:
+        report = import_directory(
+            args.source_dir,
+            args.output_dir,
+            workers=args.workers,
+            auto_ruby=not args.no_ruby,
+            recursive=not args.flat,
+        )
+    except ValueError as e:
+        print(f"錯誤：{e}")
+        return 2
+    for result in report.failed:
+        print(f"失敗：{result.source_path}：{result.error}")
+    print(
+        f"{len(report.succeeded)} / {len(report.results)} 成功，"
+        f"{report.wall_time:.2f} 秒，{report.files_per_second:.1f} 檔/秒"
+    )
+    return 0 if not report.failed else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    sys.exit(main())
@@ -23,6 +23,7 @@ class KaraokeProject:
     project_name: str = ""
     project_path: Optional[str] = None
     video_path: Optional[str] = None
+    proxy_path: Optional[str] = None  # 低解析度代理檔（預覽與草稿輸出用）
     
     # 音訊狀態
     stems: Optional[Dict[str, str]] = None  # {'vocal': '/path/to/vocal.wav', ...}
@@ -62,12 +63,19 @@ class KaraokeProject:
             return 'EXPORT_COMPLETE'
         return 'UNKNOWN'
     
+    def get_preview_video(self) -> Optional[str]:
+        """預覽用影片（代理檔存在時優先使用）"""
+        if self.proxy_path and Path(self.proxy_path).exists():
+            return self.proxy_path
+        return self.video_path
+
     def to_dict(self) -> dict:
         """轉為字典（不包含不可序列化的對象）"""
         return {
             'project_name': self.project_name,
             'project_path': self.project_path,
             'video_path': self.video_path,
+            'proxy_path': self.proxy_path,
             'stems': self.stems,
             'stems_dir': self.stems_dir,
             'lrc_file_path': self.lrc_file_path,
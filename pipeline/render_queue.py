@@ -0,0 +1,520 @@
+"""
+影片輸出佇列
+
+作用：
+- 將輸出工作持久化到 JSON（程式重啟或當機後可續跑）
+- 多個行程（GUI 與背景執行器）共用佇列檔：每次寫入都在檔案鎖內重新讀取並只更新自己改動的工作
+- 執行中工作記錄所屬行程 PID，只有該行程已結束時才改回待執行；同一佇列只會有一個執行器
+- 依 CPU 核心數與每個工作的執行緒預算決定同時執行數量
+- 依優先度排程並記錄每個工作的輸出速度
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import config
+from core.video import VideoRenderer
+
+logger = logging.getLogger(__name__)
+
+# 預設佇列檔案
+DEFAULT_QUEUE_PATH = str(config.OUTPUT_DIR / 'render_queue.json')
+
+# 工作狀態
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+@dataclass
+class RenderJob:
+    """單一輸出工作"""
+
+    video_path: str
+    audio_path: str
+    subtitle_path: str
+    output_path: str
+    priority: int = 0  # 數字越大越先執行
+    threads: int = 0  # 執行緒預算（0 表示使用佇列預設值）
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    status: str = JOB_PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    media_duration: Optional[float] = None  # 影片長度（秒）
+    wall_time: Optional[float] = None  # 實際耗時（秒）
+    speed: Optional[float] = None  # 輸出速度（影片秒數 / 實際秒數）
+    error: str = ''
+    stems: Optional[Dict[str, str]] = None  # 直接混音的分軌（None 表示使用 audio_path）
+    stem_volumes: Optional[Dict[str, float]] = None  # 分軌音量
+    estimated_time: Optional[float] = None  # 依歷史紀錄預估的耗時（秒）
+    owner_pid: Optional[int] = None  # 執行此工作的行程（判斷 running 工作是否已中斷）
+
+    def to_dict(self) -> dict:
+        """轉為字典"""
+        return {
+            'job_id': self.job_id,
+            'video_path': self.video_path,
+            'audio_path': self.audio_path,
+            'subtitle_path': self.subtitle_path,
+            'output_path': self.output_path,
+            'priority': self.priority,
+            'threads': self.threads,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'media_duration': self.media_duration,
+            'wall_time': self.wall_time,
+            'speed': self.speed,
+            'error': self.error,
+            'stems': self.stems,
+            'stem_volumes': self.stem_volumes,
+            'estimated_time': self.estimated_time,
+            'owner_pid': self.owner_pid,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'RenderJob':
+        """由字典建立工作"""
+        return cls(**data)
+
+
+class RenderQueue:
+    """持久化輸出佇列"""
+
+    def __init__(
+        self,
+        queue_path: str = DEFAULT_QUEUE_PATH,
+        threads_per_job: int = 2,
+        cpu_budget: Optional[int] = None,
+        renderer: Optional[VideoRenderer] = None,
+    ):
+        # 佇列檔案路徑
+        self.queue_path = queue_path
+        # 每個工作的預設執行緒預算
+        self.threads_per_job = max(1, threads_per_job)
+        # 可用的總執行緒（預設為 CPU 核心數）
+        self.cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+        # 渲染器
+        self.renderer = renderer or VideoRenderer()
+        # 工作列表
+        self.jobs: List[RenderJob] = []
+        # 存取鎖（背景執行緒同時更新狀態）
+        self._lock = threading.Lock()
+        # 本行程執行中的工作 ID（記憶體中的狀態為準，不被檔案內容覆蓋）
+        self._active_ids: Set[str] = set()
+        self.load()
+
+    @property
+    def max_concurrent(self) -> int:
+        """依核心數與每工作執行緒預算推算的同時執行上限"""
+        return max(1, self.cpu_budget // self.threads_per_job)
+
+    @property
+    def lock_path(self) -> str:
+        """佇列檔案鎖"""
+        return f"{self.queue_path}.lock"
+
+    @property
+    def runner_path(self) -> str:
+        """執行器 PID 檔"""
+        return f"{self.queue_path}.runner"
+
+    def load(self):
+        """讀取佇列（所屬行程已結束的 running 工作改回 pending 並寫回）"""
+        with self._lock, _file_lock(self.lock_path):
+            jobs = self._read_jobs()
+            interrupted = [job for job in jobs if _is_interrupted(job)]
+            for job in interrupted:
+                logger.info(f"Resuming interrupted job: {job.job_id}")
+                job.status = JOB_PENDING
+                job.started_at = None
+                job.owner_pid = None
+            if interrupted:
+                self._write_jobs(jobs)
+            self._apply_jobs(jobs)
+
+    def refresh(self):
+        """重新讀取佇列檔（併入其他行程新增的工作與狀態變更）"""
+        with self._lock, _file_lock(self.lock_path):
+            self._apply_jobs(self._read_jobs())
+
+    def _store(self, changed: Iterable[RenderJob]):
+        """
+        寫入指定工作（在檔案鎖內重新讀取佇列檔，只取代這些工作的紀錄，其餘保留檔案內容）
+
+        呼叫端需持有 self._lock。
+        """
+        with _file_lock(self.lock_path):
+            jobs = self._read_jobs()
+            positions = {job.job_id: index for index, job in enumerate(jobs)}
+            for job in changed:
+                if job.job_id in positions:
+                    jobs[positions[job.job_id]] = job
+                else:
+                    positions[job.job_id] = len(jobs)
+                    jobs.append(job)
+            self._write_jobs(jobs)
+            self._apply_jobs(jobs)
+
+    def _write_jobs(self, jobs: List[RenderJob]):
+        """寫入佇列檔（先寫暫存檔再取代，避免寫到一半當機；呼叫端需持有檔案鎖）"""
+        payload = {'jobs': [job.to_dict() for job in jobs]}
+        temp_path = f"{self.queue_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.queue_path)
+
+    def _read_jobs(self) -> List[RenderJob]:
+        """從檔案讀取工作列表"""
+        if not os.path.exists(self.queue_path):
+            return []
+        try:
+            with open(self.queue_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load render queue: {e}")
+            return []
+        return [RenderJob.from_dict(item) for item in data.get('jobs', [])]
+
+    def _apply_jobs(self, jobs: List[RenderJob]):
+        """
+        以檔案內容更新記憶體中的工作（呼叫端需持有 self._lock）
+
+        已載入的工作保留同一物件（執行中的執行緒持有參考）；本行程執行中的工作以記憶體為準。
+        """
+        current = {job.job_id: job for job in self.jobs}
+        merged = []
+        for job in jobs:
+            existing = current.pop(job.job_id, None)
+            if existing is None:
+                merged.append(job)
+                continue
+            if job.job_id not in self._active_ids:
+                vars(existing).update(vars(job))
+            merged.append(existing)
+        merged.extend(job for job in current.values() if job.job_id in self._active_ids)
+        self.jobs = merged
+
+    def add_job(
+        self,
+        video_path: str,
+        audio_path: Optional[str],
+        subtitle_path: str,
+        output_path: str,
+        priority: int = 0,
+        threads: int = 0,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
+    ) -> RenderJob:
+        """新增工作並立即寫入檔案（只附加這個工作，不覆寫其他工作的狀態）"""
+        job = RenderJob(
+            video_path=video_path,
+            audio_path=audio_path or '',
+            subtitle_path=subtitle_path,
+            output_path=output_path,
+            priority=priority,
+            threads=threads,
+            stems=stems,
+            stem_volumes=stem_volumes,
+        )
+        job.estimated_time = self.renderer.predict_render_time(video_path)
+        with self._lock:
+            self._store([job])
+        logger.info(f"Render job queued: {job.job_id} -> {output_path}")
+        return job
+
+    def pending_jobs(self) -> List[RenderJob]:
+        """待執行工作（優先度高、建立早者在前）"""
+        with self._lock:
+            pending = [job for job in self.jobs if job.status == JOB_PENDING]
+        return sorted(pending, key=lambda job: (-job.priority, job.created_at))
+
+    def estimate_remaining(self) -> Optional[float]:
+        """預估待執行工作全部完成所需秒數（依同時執行數平均分攤；皆無預估時回傳 None）"""
+        estimates = [job.estimated_time for job in self.pending_jobs() if job.estimated_time]
+        if not estimates:
+            return None
+        return sum(estimates) / min(self.max_concurrent, len(estimates))
+
+    def get_job(self, job_id: str) -> Optional[RenderJob]:
+        """以 ID 取得工作"""
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+
+    def run(
+        self,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+        job_callback: Optional[Callable[[RenderJob], None]] = None,
+    ):
+        """
+        執行所有待執行工作直到佇列清空
+
+        Args:
+            progress_callback: 進度回呼（job_id, 百分比）
+            job_callback: 工作結束回呼
+        """
+        running: Dict[Future, RenderJob] = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            while True:
+                self.refresh()
+                for job in self.pending_jobs():
+                    if len(running) >= self.max_concurrent:
+                        break
+                    if running and self._used_threads(running) + self._job_threads(job) > self.cpu_budget:
+                        break
+                    if not self._mark_started(job):
+                        continue
+                    future = executor.submit(self._run_job, job, progress_callback)
+                    running[future] = job
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    with self._lock:
+                        self._active_ids.discard(job.job_id)
+                    if job_callback:
+                        job_callback(job)
+
+    def _job_threads(self, job: RenderJob) -> int:
+        """工作的執行緒預算"""
+        return job.threads if job.threads > 0 else self.threads_per_job
+
+    def _used_threads(self, running: Dict[Future, RenderJob]) -> int:
+        """執行中工作佔用的執行緒數"""
+        return sum(self._job_threads(job) for job in running.values())
+
+    def _mark_started(self, job: RenderJob) -> bool:
+        """
+        標記工作開始（在檔案鎖內確認仍可執行後才取得）
+
+        Returns:
+            是否取得（其他執行器已取得或工作已被移除時為 False）
+        """
+        with self._lock, _file_lock(self.lock_path):
+            jobs = self._read_jobs()
+            current = next((item for item in jobs if item.job_id == job.job_id), None)
+            if current is None or not (current.status == JOB_PENDING or _is_interrupted(current)):
+                self._apply_jobs(jobs)
+                return False
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            job.finished_at = None
+            job.error = ''
+            job.owner_pid = os.getpid()
+            jobs[jobs.index(current)] = job
+            self._write_jobs(jobs)
+            self._active_ids.add(job.job_id)
+            self._apply_jobs(jobs)
+        return True
+
+    def _run_job(
+        self,
+        job: RenderJob,
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+    ) -> RenderJob:
+        """執行單一工作並記錄速度"""
+        def on_progress(value: int):
+            if progress_callback:
+                progress_callback(job.job_id, value)
+
+        try:
+            job.media_duration = self.renderer._get_duration(job.video_path)
+            success = self.renderer.render(
+                job.video_path,
+                job.audio_path,
+                job.subtitle_path,
+                job.output_path,
+                progress_callback=on_progress,
+                threads=self._job_threads(job),
+                stems=job.stems,
+                stem_volumes=job.stem_volumes,
+            )
+            error = '' if success else 'FFmpeg 輸出失敗'
+        except Exception as e:
+            success = False
+            error = str(e)
+
+        with self._lock:
+            job.finished_at = time.time()
+            job.wall_time = job.finished_at - (job.started_at or job.finished_at)
+            if success and job.media_duration and job.wall_time > 0:
+                job.speed = job.media_duration / job.wall_time
+            job.status = JOB_DONE if success else JOB_FAILED
+            job.error = error
+            job.owner_pid = None
+            self._store([job])
+
+        if success:
+            speed_text = f"{job.speed:.2f}x" if job.speed else 'n/a'
+            logger.info(f"Render job done: {job.job_id} ({job.wall_time:.1f}s, {speed_text})")
+        else:
+            logger.error(f"Render job failed: {job.job_id}: {error}")
+        return job
+
+    def runner_pid(self) -> Optional[int]:
+        """目前執行此佇列的執行器 PID（沒有存活的執行器時為 None）"""
+        with _file_lock(self.lock_path):
+            return self._read_runner_pid()
+
+    def _read_runner_pid(self) -> Optional[int]:
+        """讀取執行器 PID 檔（呼叫端需持有檔案鎖）"""
+        try:
+            with open(self.runner_path, 'r', encoding='utf-8') as f:
+                pid = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+        return pid if _pid_alive(pid) else None
+
+    def run_as_runner(self, **kwargs) -> bool:
+        """
+        以佇列唯一執行器的身分執行（已有存活的執行器時直接返回 False）
+
+        佇列清空時在檔案鎖內確認沒有新工作才釋放執行器身分，避免剛加入的工作無人處理。
+        """
+        with _file_lock(self.lock_path):
+            pid = self._read_runner_pid()
+            if pid is not None and pid != os.getpid():
+                logger.info(f"Render queue already has a runner: pid {pid}")
+                return False
+            with open(self.runner_path, 'w', encoding='utf-8') as f:
+                f.write(str(os.getpid()))
+
+        try:
+            while True:
+                self.run(**kwargs)
+                with self._lock, _file_lock(self.lock_path):
+                    self._apply_jobs(self._read_jobs())
+                    if any(job.status == JOB_PENDING for job in self.jobs):
+                        continue
+                    os.remove(self.runner_path)
+                    return True
+        except BaseException:
+            with _file_lock(self.lock_path):
+                if self._read_runner_pid() == os.getpid():
+                    os.remove(self.runner_path)
+            raise
+
+
+@contextmanager
+def _file_lock(path: str):
+    """跨行程的獨佔檔案鎖（阻塞直到取得）"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'a+b') as handle:
+        if os.name == 'nt':
+            import msvcrt
+
+            handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """判斷行程是否仍存在"""
+    if not pid or pid <= 0:
+        return False
+    if os.name == 'nt':
+        import ctypes
+
+        # 說明：Windows 的 os.kill 會結束行程，改以 OpenProcess 查詢
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _is_interrupted(job: RenderJob) -> bool:
+    """running 工作的所屬行程已結束（執行器當機或被強制結束）"""
+    if job.status != JOB_RUNNING:
+        return False
+    # 說明：舊版佇列檔沒有 owner_pid，無法判斷時視為已中斷
+    return job.owner_pid is None or not _pid_alive(job.owner_pid)
+
+
+def launch_detached(queue_path: str = DEFAULT_QUEUE_PATH):
+    """
+    在獨立行程中執行佇列（GUI 關閉後仍會繼續）
+
+    Returns:
+        啟動的行程；已有存活的執行器時為 None（新工作會由該執行器接手）
+    """
+    import subprocess
+
+    if RenderQueue(queue_path).runner_pid() is not None:
+        return None
+
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(
+        [sys.executable, '-m', 'pipeline.render_queue', queue_path],
+        cwd=str(config.PROJECT_ROOT),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    queue = RenderQueue(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_QUEUE_PATH)
+    logger.info(
+        "Running render queue: %d pending, max_concurrent=%d",
+        len(queue.pending_jobs()),
+        queue.max_concurrent,
+    )
+    queue.run_as_runner()
@@ -3,10 +3,11 @@
 """
 
 from pathlib import Path
-from typing import Optional, Callable, Tuple
+from typing import Dict, List, Optional, Callable, Tuple
 
+from core.cancellation import CancellationToken
 from core.subtitle import LrcToAssConverter, SubtitleConfig
-from core.video import VideoRenderer
+from core.video import QaFrameExtractor, RenderTarget, VideoRenderer
 from core.lrc import LrcTimeline
 
 
@@ -32,12 +33,82 @@ class KaraokeWorkflow:
         subtitle_path: str,
         output_path: str,
         progress_callback: Optional[Callable[[int], None]] = None,
+        incremental: bool = False,
+        stems: Optional[Dict[str, str]] = None,
+        stem_volumes: Optional[Dict[str, float]] = None,
     ) -> bool:
-        """輸出影片"""
-        return self.renderer.render(
+        """
+        輸出影片
+
+        Args:
+            incremental: 只重新編碼字幕有變更的區段
+            stems / stem_volumes: 直接在渲染濾鏡圖內混音（不產生中間音檔）
+        """
+        render = self.renderer.render_incremental if incremental else self.renderer.render
+        return render(
             video_path=video_path,
             audio_path=audio_path,
             subtitle_path=subtitle_path,
             output_path=output_path,
             progress_callback=progress_callback,
+            stems=stems,
+            stem_volumes=stem_volumes,
+        )
+
+    @staticmethod
+    def select_mix_stems(stems: Dict[str, str], vocal_volume: float) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """
+        挑選混音用的分軌與音量（人聲音量可調）
+
+        優先使用 drums/bass/other 三軌，否則使用 music；original 不參與混音。
+        """
+        stems = stems or {}
+        if all(stems.get(key) for key in ['drums', 'bass', 'other']):
+            selected = {key: stems[key] for key in ['drums', 'bass', 'other']}
+        elif stems.get('music'):
+            selected = {'music': stems['music']}
+        else:
+            selected = {}
+        if stems.get('vocal'):
+            selected['vocal'] = stems['vocal']
+        volumes = {key: (vocal_volume if key == 'vocal' else 1.0) for key in selected}
+        return selected, volumes
+
+    def export_videos(
+        self,
+        video_path: str,
+        audio_path: str,
+        subtitle_path: str,
+        targets: List[RenderTarget],
+        progress_callback: Optional[Callable[[str, int], None]] = None,
+    ) -> Dict[str, bool]:
+        """一次輸出多個版本（母帶 / 網路版 / 預覽）"""
+        return self.renderer.render_multi(
+            video_path=video_path,
+            audio_path=audio_path,
+            subtitle_path=subtitle_path,
+            targets=targets,
+            progress_callback=progress_callback,
+        )
+
+    def export_qa_sheet(
+        self,
+        output_video: str,
+        timeline: LrcTimeline,
+        qa_dir: str,
+        every_n_lines: int = 1,
+        columns: int = 4,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional[str]:
+        """擷取每行開始畫面並拼成 QA 總覽圖，回傳總覽圖路徑"""
+        extractor = QaFrameExtractor()
+        frames = extractor.extract(
+            output_video,
+            timeline,
+            qa_dir,
+            every_n_lines=every_n_lines,
+            progress_callback=progress_callback,
+            cancel_token=cancel_token,
         )
+        return extractor.build_contact_sheet(frames, str(Path(qa_dir) / "contact_sheet.jpg"), columns)
@@ -0,0 +1,44 @@
+"""
+歌詞批次匯入測試
+"""
+
+import pytest
+
+from pipeline.bulk_import import find_lyrics_files, import_directory
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    root = tmp_path / 'lyrics'
+    (root / 'album').mkdir(parents=True)
+    (root / 'a.txt').write_text('first line\nsecond line\n', encoding='utf-8')
+    (root / 'album' / 'b.lrc').write_text('[00:01.00]hello\n[00:02.00]world\n', encoding='utf-8')
+    return root
+
+
+def test_import_keeps_structure(source_dir, tmp_path):
+    output_dir = tmp_path / 'out'
+
+    report = import_directory(str(source_dir), str(output_dir), workers=1, auto_ruby=False)
+
+    assert len(report.succeeded) == 2 and report.failed == []
+    assert (output_dir / 'a.txt').exists()
+    assert (output_dir / 'album' / 'b.lrc').exists()
+    assert (output_dir / 'import_report.json').exists()
+
+
+@pytest.mark.parametrize('relative', ['.', '..'])
+def test_output_containing_source_rejected(source_dir, relative):
+    with pytest.raises(ValueError):
+        import_directory(str(source_dir), str(source_dir / relative), workers=1, auto_ruby=False)
+
+
+def test_nested_output_excluded(source_dir):
+    output_dir = source_dir / 'out'
+
+    import_directory(str(source_dir), str(output_dir), workers=1, auto_ruby=False)
+    report = import_directory(str(source_dir), str(output_dir), workers=1, auto_ruby=False)
+
+    assert len(report.results) == 2
+    assert not (output_dir / 'out').exists()
+    assert len(find_lyrics_files(str(source_dir))) == 4
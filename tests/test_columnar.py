@@ -0,0 +1,91 @@
+"""
+欄式時間軸測試（需要 numpy）
+"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from core.lrc import ColumnarTimeline, LrcLine, LrcParser, LrcTimeline, LrcWord, LrcWriter, RubyPair
+from core.lrc.ruby_fill import build_task, locate_line, pending_tasks
+
+
+def make_timeline():
+    timeline = LrcTimeline()
+    timeline.lines = [
+        LrcLine([LrcWord('今', 1.0, 1.5), LrcWord('日', 1.5, 2.0, RubyPair('日', 'ひ'))]),
+        LrcLine([LrcWord('abc', 3.0, 4.0)], group_id='B'),
+    ]
+    return timeline
+
+
+def test_shares_timeline_state():
+    columnar = ColumnarTimeline()
+    plain = LrcTimeline()
+
+    assert set(vars(plain)) - {'lines'} <= set(vars(columnar))
+    assert len(columnar.lines) == 0 and columnar.word_count == 0
+
+
+def test_round_trip():
+    timeline = make_timeline()
+    columnar = ColumnarTimeline.from_timeline(timeline)
+
+    assert columnar.to_timeline().lines == timeline.lines
+    assert LrcWriter().to_string(columnar) == LrcWriter().to_string(timeline)
+
+
+def test_parser_builds_columnar():
+    content = LrcWriter().to_string(make_timeline())
+    columnar = LrcParser(timeline_factory=ColumnarTimeline).parse_string(content)
+
+    assert isinstance(columnar, ColumnarTimeline)
+    assert columnar.to_timeline().lines == LrcParser().parse_string(content).lines
+
+
+def test_word_slice_assignment():
+    columnar = ColumnarTimeline.from_timeline(make_timeline())
+    words = columnar.lines[0].words
+
+    words[0:2] = [LrcWord('今日', 1.0, 2.0, RubyPair('今日', 'きょう'))]
+    words.append(LrcWord('は', 2.0, 2.5))
+    del words[1]
+
+    assert [word.text for word in columnar.lines[0].words] == ['今日']
+    assert columnar.lines[0].words[0].ruby_pair == RubyPair('今日', 'きょう')
+    assert columnar.lines[1].text == 'abc'
+    assert columnar.get_word_at_time(3.5).text == 'abc'
+
+
+def test_shift_selected_lines():
+    columnar = ColumnarTimeline.from_timeline(make_timeline())
+
+    columnar.shift_times(1.0, lines=[1])
+
+    assert columnar.lines[0].start_time == 1.0
+    assert columnar.lines[1].start_time == 4.0
+    assert columnar.get_word_at_time(4.5).text == 'abc'
+
+
+def test_deferred_ruby_kept_pending():
+    columnar = LrcParser(timeline_factory=ColumnarTimeline).parse_txt_string('今日は\nabc', defer_ruby=True)
+
+    assert [word.ruby_pending for word in columnar.lines[0].words] == [True, True, False]
+    assert columnar.lines[0].ruby_pending and not columnar.lines[1].ruby_pending
+    assert [task.line_idx for task in pending_tasks(columnar)] == [0]
+
+    assert columnar.fill_ruby(0, [(0, '今日', 'きょう')])
+    assert columnar.lines[0].words[0].ruby_pair == RubyPair('今日', 'きょう')
+    assert not columnar.lines[0].ruby_pending
+    assert pending_tasks(columnar) == []
+
+
+def test_ruby_task_located_after_insert():
+    columnar = LrcParser(timeline_factory=ColumnarTimeline).parse_txt_string('今日は\n明日', defer_ruby=True)
+    task = build_task(columnar, 1)
+
+    columnar.insert_line(0, LrcLine([LrcWord('x', 0.0, 0.5)]))
+
+    assert locate_line(columnar, task) == 2
+    columnar.remove_line(2)
+    assert locate_line(columnar, task) is None
@@ -0,0 +1,48 @@
+"""
+歌詞編碼判斷測試
+"""
+
+import codecs
+import logging
+
+import pytest
+
+from core.lrc.encoding import decode_bytes
+
+TRADITIONAL = '我們一起走過的路\n風吹過了山頂\n你說愛情像一首歌\n永遠不會結束\n讓我再唱一遍'
+SIMPLIFIED = '我们一起走过的路\n风吹过了山顶\n你说爱情像一首歌\n永远不会结束\n让我再唱一遍'
+KANJI_ONLY = '春夏秋冬\n桜花爛漫\n月光下\n永遠約束\n天空海原\n心中想\n愛情物語\n東京駅前'
+WITH_KANA = '君の声が聞こえる\n夜空に光る星を見上げて'
+
+
+@pytest.mark.parametrize(
+    'text, encoding',
+    [
+        (TRADITIONAL, 'cp950'),
+        (SIMPLIFIED, 'gbk'),
+        (KANJI_ONLY, 'cp932'),
+        (WITH_KANA, 'cp932'),
+        (WITH_KANA, 'euc_jp'),
+    ],
+)
+def test_legacy_encodings(text, encoding, caplog):
+    with caplog.at_level(logging.WARNING):
+        decoded, detected = decode_bytes(text.encode(encoding))
+
+    assert detected == encoding
+    assert decoded == text
+    assert not caplog.records
+
+
+def test_unicode_encodings():
+    assert decode_bytes(WITH_KANA.encode('utf-8')) == (WITH_KANA, 'utf-8')
+    assert decode_bytes(codecs.BOM_UTF8 + WITH_KANA.encode('utf-8')) == (WITH_KANA, 'utf-8-sig')
+    assert decode_bytes(WITH_KANA.encode('utf-16')) == (WITH_KANA, 'utf-16')
+
+
+def test_ambiguous_encoding_warns(caplog):
+    # 只有漢字的 EUC-JP 與 GBK 結構相同，無法可靠區分
+    with caplog.at_level(logging.WARNING):
+        decode_bytes(KANJI_ONLY.encode('euc_jp'), source='song.txt')
+
+    assert any('song.txt' in record.getMessage() for record in caplog.records)
@@ -2,6 +2,7 @@
 Example test file
 """
 
+
 def test_placeholder():
-"""Placeholder test"""
-assert True
+    """Placeholder test"""
+    assert True
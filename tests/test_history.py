@@ -0,0 +1,130 @@
+"""
+編輯紀錄（復原 / 重做）測試
+"""
+
+from core.lrc import EditJournal, LrcLine, LrcTimeline, LrcWord, RubyPair
+
+
+def make_timeline():
+    timeline = LrcTimeline()
+    timeline.lines = [
+        LrcLine([LrcWord('今', 1.0, 1.5), LrcWord('日', 1.5, 2.0)]),
+        LrcLine([LrcWord('abc', 3.0, 4.0)]),
+    ]
+    return timeline
+
+
+def snapshot(timeline):
+    return [
+        (line.group_id, [(word.text, word.start_time, word.end_time, word.ruby_pair) for word in line.words])
+        for line in timeline.lines
+    ]
+
+
+def test_each_edit_undone_and_redone():
+    timeline = make_timeline()
+    journal = EditJournal(timeline)
+    states = [snapshot(timeline)]
+
+    timeline.update_word_time(0, 0, 0.8, 1.4)
+    states.append(snapshot(timeline))
+    timeline.set_word_ruby(0, 1, RubyPair('日', 'ひ'))
+    states.append(snapshot(timeline))
+    timeline.set_line_group(1, 'B')
+    states.append(snapshot(timeline))
+    timeline.replace_line_words(1, [LrcWord('a', 3.0, 3.5), LrcWord('bc', 3.5, 4.0)])
+    states.append(snapshot(timeline))
+    timeline.insert_line(1, LrcLine([LrcWord('x', 2.5, 2.8)]))
+    states.append(snapshot(timeline))
+    timeline.remove_line(0)
+    states.append(snapshot(timeline))
+
+    for state in reversed(states[:-1]):
+        assert journal.undo() is not None
+        assert snapshot(timeline) == state
+    assert not journal.can_undo and journal.undo() is None
+
+    for state in states[1:]:
+        assert journal.redo() is not None
+        assert snapshot(timeline) == state
+    assert not journal.can_redo
+
+
+def test_new_edit_clears_redo():
+    timeline = make_timeline()
+    journal = EditJournal(timeline)
+
+    timeline.update_word_time(1, 0, 3.2, 4.0)
+    journal.undo()
+    assert journal.can_redo
+
+    timeline.set_word_text(1, 0, 'xyz')
+    assert not journal.can_redo
+    assert journal.undo_label() == '修改文字'
+
+
+def test_group_is_one_step():
+    timeline = make_timeline()
+    journal = EditJournal(timeline)
+    before = snapshot(timeline)
+
+    with journal.group('平移'):
+        timeline.update_word_time(0, 0, 2.0, 2.5)
+        timeline.update_word_time(0, 1, 2.5, 3.0)
+        timeline.update_word_time(0, 0, 2.1, 2.5)
+
+    assert journal.undo_label() == '平移'
+    journal.undo()
+    assert snapshot(timeline) == before
+    assert not journal.can_undo
+    journal.redo()
+    assert timeline.lines[0].words[0].start_time == 2.1
+
+
+def test_consecutive_marks_coalesced():
+    timeline = make_timeline()
+    journal = EditJournal(timeline)
+
+    for start in (1.1, 1.2):
+        with journal.group('打點', merge_key='mark'):
+            timeline.update_word_time(0, 0, start, 1.5)
+    with journal.group('其他'):
+        timeline.update_word_time(1, 0, 3.1, 4.0)
+
+    journal.undo()
+    journal.undo()
+    assert timeline.lines[0].words[0].start_time == 1.0
+    assert not journal.can_undo
+
+
+def test_old_steps_dropped_over_limits():
+    timeline = make_timeline()
+    journal = EditJournal(timeline, max_steps=2)
+
+    for start in (1.1, 1.2, 1.3):
+        timeline.update_word_time(0, 0, start, 1.5)
+
+    assert journal.undo() and journal.undo()
+    assert journal.undo() is None
+    assert timeline.lines[0].words[0].start_time == 1.1
+
+    timeline = make_timeline()
+    journal = EditJournal(timeline, max_cost=3)
+    timeline.update_word_time(0, 0, 1.1, 1.5)
+    timeline.insert_line(0, LrcLine([LrcWord('x', 0.0, 0.5), LrcWord('y', 0.5, 1.0)]))
+
+    assert journal.undo_label() == '新增行'
+    journal.undo()
+    assert not journal.can_undo
+
+
+def test_index_follows_undo():
+    timeline = make_timeline()
+    journal = EditJournal(timeline)
+    assert timeline.get_word_at_time(3.5).text == 'abc'
+
+    timeline.remove_line(1)
+    assert timeline.get_word_at_time(3.5) is None
+
+    journal.undo()
+    assert timeline.get_word_at_time(3.5).text == 'abc'
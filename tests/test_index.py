@@ -0,0 +1,119 @@
+"""
+時間軸區間索引測試（與逐一掃描的結果比對）
+"""
+
+import random
+
+from core.lrc import LrcLine, LrcTimeline, LrcWord, TimelineIndex
+
+
+def make_timeline(seed=1, line_count=40):
+    rng = random.Random(seed)
+    timeline = LrcTimeline()
+    time = 0.0
+    for _ in range(line_count):
+        words = []
+        for _ in range(rng.randint(0, 6)):
+            start = time + rng.uniform(-0.3, 0.5)  # 允許重疊
+            end = start + rng.uniform(0.1, 1.0)
+            words.append(LrcWord('x', round(start, 2), round(end, 2)))
+            time = max(time, start)
+        timeline.lines.append(LrcLine(words))
+    return timeline
+
+
+def scan_locate(timeline, time_seconds):
+    best = None
+    for line_idx, line in enumerate(timeline.lines):
+        for word_idx, word in enumerate(line.words):
+            if word.start_time <= time_seconds < word.end_time:
+                key = (word.start_time, word.end_time, line_idx, word_idx)
+                if best is None or key > best[0]:
+                    best = (key, (line_idx, word_idx))
+    return best[1] if best else None
+
+
+def scan_range(timeline, start, end):
+    refs = [
+        (word.start_time, word.end_time, line_idx, word_idx)
+        for line_idx, line in enumerate(timeline.lines)
+        for word_idx, word in enumerate(line.words)
+        if word.start_time < end and word.end_time > start
+    ]
+    return [(line_idx, word_idx) for _, _, line_idx, word_idx in sorted(refs)]
+
+
+def probe_times(timeline):
+    times = [-1.0]
+    for line in timeline.lines:
+        for word in line.words:
+            times.extend((word.start_time, word.end_time, word.start_time + 0.01))
+    return times
+
+
+def assert_matches_scan(timeline, index):
+    for time_seconds in probe_times(timeline):
+        assert index.locate(time_seconds) == scan_locate(timeline, time_seconds)
+        assert index.words_in_range(time_seconds, time_seconds + 0.7) == scan_range(
+            timeline, time_seconds, time_seconds + 0.7
+        )
+
+
+def test_interval_queries_match_scan():
+    timeline = make_timeline()
+    assert_matches_scan(timeline, TimelineIndex(timeline))
+
+
+def test_line_at_with_lead_in_and_tail_hold():
+    timeline = LrcTimeline()
+    timeline.lines = [
+        LrcLine([LrcWord('a', 1.0, 2.0)]),
+        LrcLine([]),
+        LrcLine([LrcWord('b', 3.0, 4.0)]),
+    ]
+    index = TimelineIndex(timeline)
+
+    assert index.line_at(0.5) is None
+    assert index.line_at(0.5, lead_in=0.6) == 0
+    assert index.line_at(2.5) is None
+    assert index.line_at(2.5, tail_hold=0.6) == 0
+    assert index.line_at(2.5, lead_in=0.6) == 2
+    assert index.line_at(3.5) == 2
+
+
+def test_boundaries():
+    timeline = make_timeline(seed=2, line_count=5)
+    index = TimelineIndex(timeline)
+    boundaries = sorted(
+        {value for line in timeline.lines for word in line.words for value in (word.start_time, word.end_time)}
+    )
+
+    assert index.next_boundary(-1.0) == boundaries[0]
+    assert index.previous_boundary(boundaries[0]) is None
+    for previous, current in zip(boundaries, boundaries[1:]):
+        assert index.next_boundary(previous) == current
+        assert index.previous_boundary(current) == previous
+    assert index.next_boundary(boundaries[-1]) is None
+
+
+def test_index_patched_on_time_edits():
+    timeline = make_timeline(seed=3)
+    index = timeline.index
+    index.locate(0.0)
+    rng = random.Random(3)
+
+    refs = [
+        (line_idx, word_idx)
+        for line_idx, line in enumerate(timeline.lines)
+        for word_idx in range(len(line.words))
+    ]
+    for _ in range(50):
+        line_idx, word_idx = rng.choice(refs)
+        word = timeline.lines[line_idx].words[word_idx]
+        start = round(word.start_time + rng.uniform(-0.05, 0.05), 3)
+        timeline.update_word_time(line_idx, word_idx, start, round(start + rng.uniform(0.1, 1.0), 3))
+        assert_matches_scan(timeline, index)
+
+    timeline.remove_line(0)
+    timeline.insert_line(3, LrcLine([LrcWord('y', 2.0, 9.0)]))
+    assert_matches_scan(timeline, index)
@@ -0,0 +1,183 @@
+"""
+區網渲染派送測試（以 127.0.0.1 上的替身節點取代實際渲染節點，不需要 FFmpeg）
+"""
+
+import shutil
+import threading
+import time
+
+import pytest
+
+from core.video.farm import FarmWorkerServer, RenderFarm
+from core.video.profile import EncodeProfile
+from core.video.segments import Segment
+
+
+class LocalFarm(RenderFarm):
+    """切段改為直接寫入區段編號（不呼叫 FFmpeg）"""
+
+    def _cut_source(self, video_path, segment, output_path):
+        with open(output_path, 'wb') as file_handle:
+            file_handle.write(f'segment-{segment.index}'.encode('utf-8'))
+        return True
+
+
+class StandInWorker:
+    """在 127.0.0.1 執行的替身節點（encode 決定每個區段的行為）"""
+
+    def __init__(self, encode=None, token=''):
+        self.calls = []
+        self.release = threading.Event()  # 讓卡住的編碼結束
+        self._encode = encode or (lambda worker, segment: True)
+        self.server = FarmWorkerServer('127.0.0.1', 0, slots=4, token=token, encoder=self.encoder)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server.server_address
+        return f'{host}:{port}'
+
+    def encoder(self, source_path, ass_path, segment, profile):
+        self.calls.append(segment.index)
+        if not self._encode(self, segment):
+            return False
+        shutil.copyfile(source_path, segment.path)
+        with open(segment.path, 'ab') as file_handle:
+            file_handle.write(f'|{self.endpoint}'.encode('utf-8'))
+        return True
+
+    def close(self):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def workers():
+    started = []
+
+    def start(encode=None, token=''):
+        worker = StandInWorker(encode, token)
+        started.append(worker)
+        return worker
+
+    yield start
+    for worker in started:
+        worker.close()
+
+
+def make_segments(tmp_path, count, duration=1.0):
+    return [
+        Segment(index, index * duration, (index + 1) * duration, key=f'k{index}', path=str(tmp_path / f'{index}.mp4'))
+        for index in range(count)
+    ]
+
+
+def encode(farm, tmp_path, segments):
+    subtitle_path = tmp_path / 'sub.ass'
+    subtitle_path.write_text('[Script Info]\n', encoding='utf-8')
+    return farm.encode_segments('video.mp4', str(subtitle_path), segments, EncodeProfile())
+
+
+def read_result(segment):
+    with open(segment.path, 'rb') as file_handle:
+        return file_handle.read().decode('utf-8')
+
+
+def test_dispatch_to_local_workers(tmp_path, workers):
+    first = workers()
+    second = workers()
+    segments = make_segments(tmp_path, 6)
+
+    remaining = encode(LocalFarm([first.endpoint, second.endpoint]), tmp_path, segments)
+
+    assert remaining == []
+    assert sorted(first.calls + second.calls) == list(range(6))
+    for segment in segments:
+        assert read_result(segment).startswith(f'segment-{segment.index}|127.0.0.1:')
+
+
+def test_failed_segment_retried_on_other_worker(tmp_path, workers):
+    broken = workers(encode=lambda worker, segment: False)
+    healthy = workers()
+    segments = make_segments(tmp_path, 4)
+
+    farm = LocalFarm([broken.endpoint, healthy.endpoint], retries=2, max_worker_failures=2)
+    remaining = encode(farm, tmp_path, segments)
+
+    assert remaining == []
+    assert broken.calls
+    for segment in segments:
+        assert read_result(segment).endswith(healthy.endpoint)
+
+
+def test_segments_given_up_after_retries(tmp_path, workers):
+    broken = workers(encode=lambda worker, segment: False)
+    segments = make_segments(tmp_path, 2)
+
+    farm = LocalFarm([broken.endpoint], retries=1, max_worker_failures=10)
+    remaining = encode(farm, tmp_path, segments)
+
+    assert [segment.index for segment in remaining] == [0, 1]
+    assert sorted(broken.calls) == [0, 0, 1, 1]
+
+
+def test_straggler_speculatively_redispatched(tmp_path, workers):
+    def stall_first(worker, segment):
+        if segment.index == 0:
+            worker.release.wait(30)
+        return True
+
+    slow = workers(encode=stall_first)
+    fast = workers()
+    segments = make_segments(tmp_path, 4)
+
+    farm = LocalFarm([slow.endpoint, fast.endpoint], straggler_factor=2.0)
+    started = time.time()
+    remaining = encode(farm, tmp_path, segments)
+
+    assert remaining == []
+    assert time.time() - started < 10
+    assert 0 in slow.calls and 0 in fast.calls
+    assert read_result(segments[0]).endswith(fast.endpoint)
+
+
+def test_job_deadline_follows_segment_length(tmp_path, workers):
+    def hang(worker, segment):
+        worker.release.wait(30)
+        return True
+
+    stuck = workers(encode=hang)
+    segments = make_segments(tmp_path, 1, duration=0.5)
+
+    farm = LocalFarm(
+        [stuck.endpoint], job_timeout_base=0.2, job_timeout_per_sec=0.4, retries=0, io_timeout=5.0
+    )
+    assert farm.job_timeout(segments[0]) == pytest.approx(0.4)
+    started = time.time()
+    remaining = encode(farm, tmp_path, segments)
+
+    assert remaining == segments
+    assert time.time() - started < 5
+
+
+def test_token_required(tmp_path, workers):
+    guarded = workers(token='secret')
+    segments = make_segments(tmp_path, 1)
+
+    rejected = encode(LocalFarm([guarded.endpoint], retries=0), tmp_path, segments)
+    assert rejected == segments
+    assert guarded.calls == []
+
+    accepted = encode(LocalFarm([guarded.endpoint], token='secret'), tmp_path, segments)
+    assert accepted == []
+    assert guarded.calls == [0]
+
+
+def test_worker_defaults_to_loopback():
+    server = FarmWorkerServer(port=0)
+    try:
+        assert server.server_address[0] == '127.0.0.1'
+    finally:
+        server.server_close()
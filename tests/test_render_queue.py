@@ -0,0 +1,163 @@
+"""
+輸出佇列狀態轉換測試
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from pipeline.render_queue import (
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_PENDING,
+    JOB_RUNNING,
+    RenderQueue,
+)
+
+
+class FakeRenderer:
+    """不呼叫 FFmpeg 的渲染器（輸出路徑含 fail 時回傳失敗）"""
+
+    def __init__(self):
+        self.rendered = []
+
+    def predict_render_time(self, video_path):
+        return 10.0
+
+    def _get_duration(self, video_path):
+        return 60.0
+
+    def render(self, video_path, audio_path, subtitle_path, output_path, **kwargs):
+        self.rendered.append(output_path)
+        return 'fail' not in output_path
+
+
+def dead_pid() -> int:
+    """已結束行程的 PID"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'render_queue.json')
+
+
+def make_queue(queue_path, renderer=None):
+    return RenderQueue(queue_path, threads_per_job=1, cpu_budget=2, renderer=renderer or FakeRenderer())
+
+
+def read_statuses(queue_path):
+    with open(queue_path, 'r', encoding='utf-8') as f:
+        return {item['job_id']: item['status'] for item in json.load(f)['jobs']}
+
+
+def test_add_job_persists_pending(queue_path):
+    queue = make_queue(queue_path)
+    job = queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'out.mp4')
+
+    assert read_statuses(queue_path) == {job.job_id: JOB_PENDING}
+    assert make_queue(queue_path).get_job(job.job_id).estimated_time == 10.0
+
+
+def test_run_marks_done_and_failed(queue_path):
+    renderer = FakeRenderer()
+    queue = make_queue(queue_path, renderer)
+    ok = queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'ok.mp4')
+    bad = queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'fail.mp4')
+
+    finished = []
+    queue.run(job_callback=finished.append)
+
+    assert sorted(renderer.rendered) == ['fail.mp4', 'ok.mp4']
+    assert {job.job_id for job in finished} == {ok.job_id, bad.job_id}
+    assert read_statuses(queue_path) == {ok.job_id: JOB_DONE, bad.job_id: JOB_FAILED}
+    done = make_queue(queue_path).get_job(ok.job_id)
+    assert done.speed == pytest.approx(60.0 / done.wall_time)
+    assert done.owner_pid is None
+
+
+def test_priority_order(queue_path):
+    renderer = FakeRenderer()
+    queue = RenderQueue(queue_path, threads_per_job=1, cpu_budget=1, renderer=renderer)
+    queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'low.mp4', priority=0)
+    queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'high.mp4', priority=5)
+
+    queue.run()
+
+    assert renderer.rendered == ['high.mp4', 'low.mp4']
+
+
+def test_enqueue_does_not_clobber_other_process_state(queue_path):
+    runner = make_queue(queue_path)
+    first = runner.add_job('in.mp4', 'a.wav', 'sub.ass', 'first.mp4')
+    done = runner.add_job('in.mp4', 'a.wav', 'sub.ass', 'done.mp4')
+
+    # GUI 先載入（此時皆為 pending），之後執行器才更新狀態
+    gui = make_queue(queue_path)
+    assert runner._mark_started(first)
+    runner.get_job(done.job_id).status = JOB_DONE
+    with runner._lock:
+        runner._store([runner.get_job(done.job_id)])
+
+    added = gui.add_job('in.mp4', 'a.wav', 'sub.ass', 'second.mp4')
+
+    assert read_statuses(queue_path) == {
+        first.job_id: JOB_RUNNING,
+        done.job_id: JOB_DONE,
+        added.job_id: JOB_PENDING,
+    }
+    assert gui.get_job(first.job_id).status == JOB_RUNNING
+
+
+def test_load_keeps_running_job_of_live_owner(queue_path):
+    runner = make_queue(queue_path)
+    job = runner.add_job('in.mp4', 'a.wav', 'sub.ass', 'out.mp4')
+    assert runner._mark_started(job)
+
+    reloaded = make_queue(queue_path)
+
+    assert reloaded.get_job(job.job_id).status == JOB_RUNNING
+    assert reloaded.pending_jobs() == []
+    # 另一個行程不能再取得同一個工作
+    assert not reloaded._mark_started(reloaded.get_job(job.job_id))
+
+
+def test_load_resumes_job_of_dead_owner(queue_path):
+    queue = make_queue(queue_path)
+    job = queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'out.mp4')
+    stored = queue.get_job(job.job_id)
+    stored.status = JOB_RUNNING
+    stored.owner_pid = dead_pid()
+    with queue._lock:
+        queue._store([stored])
+
+    reloaded = make_queue(queue_path)
+
+    assert reloaded.get_job(job.job_id).status == JOB_PENDING
+    assert read_statuses(queue_path) == {job.job_id: JOB_PENDING}
+
+
+def test_single_runner(queue_path):
+    renderer = FakeRenderer()
+    queue = make_queue(queue_path, renderer)
+    queue.add_job('in.mp4', 'a.wav', 'sub.ass', 'out.mp4')
+
+    # 存活的執行器（以目前測試行程的父行程代表）
+    with open(queue.runner_path, 'w', encoding='utf-8') as f:
+        f.write(str(os.getppid()))
+    assert queue.runner_pid() == os.getppid()
+    assert not queue.run_as_runner()
+    assert renderer.rendered == []
+
+    # 執行器已結束時可接手，完成後釋放
+    with open(queue.runner_path, 'w', encoding='utf-8') as f:
+        f.write(str(dead_pid()))
+    assert queue.runner_pid() is None
+    assert queue.run_as_runner()
+    assert renderer.rendered == ['out.mp4']
+    assert not os.path.exists(queue.runner_path)
@@ -0,0 +1,109 @@
+"""
+沿用上次輸出影像串流測試（以替身取代 FFmpeg 與 ffprobe）
+"""
+
+import os
+
+import pytest
+
+from core.video.probe import MediaInfo
+from core.video.renderer import VideoRenderer
+
+
+class FakeProbe:
+    """以固定長度回傳媒體資訊（輸出檔的長度寫在檔案內容中）"""
+
+    def __init__(self):
+        self.durations = {}
+
+    def probe(self, path):
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        return MediaInfo(path, stat.st_size, stat.st_mtime, duration=self.get_duration(path))
+
+    def get_duration(self, path):
+        if path in self.durations:
+            return self.durations[path]
+        with open(path, 'r', encoding='utf-8') as file_handle:
+            return float(file_handle.read())
+
+
+class FakeHistory:
+    def record(self, record):
+        pass
+
+    def predict(self, *args):
+        return None
+
+
+class FakeRenderer(VideoRenderer):
+    """執行 FFmpeg 時只寫入輸出檔（內容為長度：影片與音訊較短者）"""
+
+    def __init__(self, probe):
+        super().__init__(probe, FakeHistory())
+        self.commands = []
+
+    def _run_ffmpeg(self, cmd, total_duration, progress_callback=None, time_callback=None, cancel_token=None):
+        self.commands.append(cmd)
+        inputs = [cmd[index + 1] for index, arg in enumerate(cmd) if arg == '-i']
+        output_path = cmd[-1]
+        with open(output_path, 'w', encoding='utf-8') as file_handle:
+            file_handle.write(str(min(self.probe.get_duration(path) for path in inputs)))
+        return True
+
+
+@pytest.fixture
+def media(tmp_path):
+    probe = FakeProbe()
+    paths = {}
+    for name, duration in (('video.mp4', 200.0), ('short.wav', 100.0), ('long.wav', 180.0), ('same.wav', 100.0)):
+        path = str(tmp_path / name)
+        with open(path, 'wb') as file_handle:
+            file_handle.write(name.encode('utf-8'))
+        probe.durations[path] = duration
+        paths[name] = path
+    subtitle_path = tmp_path / 'sub.ass'
+    subtitle_path.write_text('[Script Info]\n', encoding='utf-8')
+    paths['sub.ass'] = str(subtitle_path)
+    paths['out.mp4'] = str(tmp_path / 'out.mp4')
+    return FakeRenderer(probe), paths
+
+
+def render(renderer, paths, audio):
+    return renderer.render(paths['video.mp4'], paths[audio], paths['sub.ass'], paths['out.mp4'])
+
+
+def is_remux(cmd, paths):
+    return cmd[cmd.index('-i') + 1] == paths['out.mp4']
+
+
+def test_same_length_audio_remuxed(media):
+    renderer, paths = media
+    assert render(renderer, paths, 'short.wav')
+
+    assert render(renderer, paths, 'same.wav')
+
+    assert len(renderer.commands) == 2
+    assert is_remux(renderer.commands[1], paths)
+    assert renderer.probe.get_duration(paths['out.mp4']) == 100.0
+
+
+def test_longer_audio_renders_in_full(media):
+    renderer, paths = media
+    assert render(renderer, paths, 'short.wav')
+
+    assert render(renderer, paths, 'long.wav')
+
+    assert not is_remux(renderer.commands[1], paths)
+    assert renderer.probe.get_duration(paths['out.mp4']) == 180.0
+
+
+def test_shorter_audio_remuxed(media):
+    renderer, paths = media
+    assert render(renderer, paths, 'long.wav')
+
+    assert render(renderer, paths, 'short.wav')
+
+    assert is_remux(renderer.commands[1], paths)
+    assert renderer.probe.get_duration(paths['out.mp4']) == 100.0
@@ -0,0 +1,87 @@
+"""
+批次調整時間測試（一般時間軸與欄式時間軸的結果需一致）
+"""
+
+import pytest
+
+from core.lrc import EditJournal, LrcLine, LrcTimeline, LrcWord
+from core.lrc.retime import apply_offset, change_tempo, quantize_times, shift_times, stretch_times
+
+OPERATIONS = [
+    ('shift', lambda timeline: shift_times(timeline, -1.2)),
+    ('shift_lines', lambda timeline: shift_times(timeline, 0.75, lines=[2, 0, 2])),
+    ('stretch', lambda timeline: stretch_times(timeline, 1.5, anchor=2.0)),
+    ('stretch_lines', lambda timeline: stretch_times(timeline, 0.5, anchor=10.0, lines=[1])),
+    ('tempo', lambda timeline: change_tempo(timeline, 1.25)),
+    ('quantize', lambda timeline: quantize_times(timeline, 0.25, origin=0.1)),
+    ('offset', apply_offset),
+]
+
+
+def make_timeline():
+    timeline = LrcTimeline()
+    timeline.offset = 0.5
+    timeline.lines = [
+        LrcLine([LrcWord('a', 0.3, 0.9), LrcWord('b', 0.9, 1.37)]),
+        LrcLine([LrcWord('c', 5.0, 5.05)]),
+        LrcLine([]),
+        LrcLine([LrcWord('d', 10.12, 11.0), LrcWord('e', 11.2, 12.6)], group_id='B'),
+    ]
+    return timeline
+
+
+def times(timeline):
+    return [[(word.start_time, word.end_time) for word in line.words] for line in timeline.lines]
+
+
+def assert_same_times(actual, expected):
+    assert len(actual) == len(expected)
+    for actual_line, expected_line in zip(actual, expected):
+        assert len(actual_line) == len(expected_line)
+        for actual_times, expected_times in zip(actual_line, expected_line):
+            assert actual_times == pytest.approx(expected_times, abs=1e-9)
+
+
+def test_shift_clamps_at_zero():
+    timeline = make_timeline()
+
+    shift_times(timeline, -1.0)
+
+    assert times(timeline)[0] == [(0.0, 0.0), (0.0, pytest.approx(0.37))]
+
+
+def test_apply_offset_writes_offset_into_times():
+    timeline = make_timeline()
+
+    assert apply_offset(timeline)
+    assert timeline.offset == 0.0
+    assert times(timeline)[1] == [(4.5, pytest.approx(4.55))]
+    assert not apply_offset(timeline)
+
+
+def test_retime_is_one_undo_step():
+    timeline = make_timeline()
+    before = times(timeline)
+    journal = EditJournal(timeline)
+
+    stretch_times(timeline, 2.0, lines=[0, 3])
+    journal.undo()
+
+    assert times(timeline) == before
+    assert not journal.can_undo
+
+
+@pytest.mark.parametrize('name, operation', OPERATIONS, ids=[name for name, _ in OPERATIONS])
+def test_columnar_matches_plain(name, operation):
+    pytest.importorskip('numpy')
+    from core.lrc import ColumnarTimeline
+
+    plain = make_timeline()
+    columnar = ColumnarTimeline.from_timeline(make_timeline())
+    columnar.offset = plain.offset
+
+    operation(plain)
+    operation(columnar)
+
+    assert_same_times(times(columnar), times(plain))
+    assert columnar.offset == plain.offset
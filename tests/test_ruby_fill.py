@@ -0,0 +1,78 @@
+"""
+背景假名填入測試
+"""
+
+from core.lrc import EditJournal, LrcLine, LrcTimeline, LrcWord, RubyPair, compact_timeline
+from core.lrc.ruby_fill import build_task
+
+
+def make_timeline(times):
+    timeline = LrcTimeline()
+    words = [LrcWord(char, start, end, ruby_pending=True) for char, (start, end) in zip('今日', times)]
+    words.append(LrcWord('は', times[-1][1], times[-1][1] + 1.0))
+    timeline.lines = [LrcLine(words)]
+    return timeline
+
+
+def line_words(timeline):
+    return [(word.text, word.ruby_pair, word.ruby_pending) for word in timeline.lines[0].words]
+
+
+def test_single_word_reading():
+    timeline = make_timeline([(0.0, 1.0), (1.0, 2.0)])
+
+    assert timeline.fill_ruby(0, [(0, '今', 'いま'), (1, '日', 'ひ')])
+    assert line_words(timeline)[:2] == [
+        ('今', RubyPair('今', 'いま'), False),
+        ('日', RubyPair('日', 'ひ'), False),
+    ]
+
+
+def test_untimed_span_merged():
+    timeline = make_timeline([(0.0, 0.5), (0.0, 0.5)])
+
+    assert timeline.fill_ruby(0, [(0, '今日', 'きょう')])
+    assert line_words(timeline) == [('今日', RubyPair('今日', 'きょう'), False), ('は', None, False)]
+
+
+def test_timed_span_not_mislabelled():
+    timeline = make_timeline([(0.0, 1.0), (1.0, 2.0)])
+
+    assert timeline.fill_ruby(0, [(0, '今日', 'きょう')])
+    # 各詞時間保留，也不把整段讀音標在「今」上
+    assert line_words(timeline)[:2] == [('今', None, False), ('日', None, False)]
+    assert [word.end_time for word in timeline.lines[0].words[:2]] == [1.0, 2.0]
+    assert build_task(timeline, 0) is None
+
+
+def test_span_not_merged_with_history():
+    timeline = make_timeline([(0.0, 0.5), (0.0, 0.5)])
+    journal = EditJournal(timeline)
+    timeline.set_line_group(0, 'B')
+
+    assert timeline.fill_ruby(0, [(0, '今日', 'きょう')])
+    assert len(timeline.lines[0].words) == 3
+    assert timeline.lines[0].words[0].ruby_pair is None
+
+    journal.undo()
+    assert timeline.lines[0].group_id == 'A'
+
+
+def test_manual_ruby_not_overwritten():
+    timeline = make_timeline([(0.0, 1.0), (1.0, 2.0)])
+    timeline.set_word_ruby(0, 0, RubyPair('今', 'こん'))
+
+    timeline.fill_ruby(0, [(0, '今', 'いま'), (1, '日', 'にち')])
+    assert timeline.lines[0].words[0].ruby_pair == RubyPair('今', 'こん')
+    assert timeline.lines[0].words[1].ruby_pair == RubyPair('日', 'にち')
+
+
+def test_compact_words_keep_pending():
+    timeline = compact_timeline(make_timeline([(0.0, 1.0), (1.0, 2.0)]))
+
+    assert [word.ruby_pending for word in timeline.lines[0].words] == [True, True, False]
+    assert build_task(timeline, 0) is not None
+
+    assert timeline.fill_ruby(0, [(0, '今', 'いま'), (1, '日', 'ひ')])
+    assert timeline.lines[0].words[1].ruby_pair == RubyPair('日', 'ひ')
+    assert build_task(timeline, 0) is None
@@ -0,0 +1,68 @@
+"""
+假名對齊測試（以固定詞典的替身轉換器取代 kakasi）
+"""
+
+from core.lrc import RubyGenerator
+
+WORDS = {'学校': 'がっこう', '今日': 'きょう', '時々': 'ときどき'}
+CHARS = {'学': 'がく', '校': 'こう', '今': 'いま', '日': 'ひ', '泣': 'なき', '時': 'とき', '行': 'い'}
+
+
+class FakeConverter:
+    """最長比對的替身轉換器（記錄每次轉換的輸入）"""
+
+    def __init__(self):
+        self.calls = []
+
+    def do(self, text):
+        self.calls.append(text)
+        result = []
+        index = 0
+        while index < len(text):
+            for word, reading in WORDS.items():
+                if text.startswith(word, index):
+                    result.append(reading)
+                    index += len(word)
+                    break
+            else:
+                result.append(CHARS.get(text[index], text[index]))
+                index += 1
+        return ''.join(result)
+
+
+def make_generator():
+    generator = RubyGenerator()
+    generator._converter = FakeConverter()
+    return generator
+
+
+def test_split_by_char_readings():
+    generator = make_generator()
+
+    assert generator.segment_ruby('学校へ行く') == [
+        ('学', 'がっ'), ('校', 'こう'), ('へ', ''), ('行', 'い'), ('く', ''),
+    ]
+
+
+def test_jukujikun_kept_whole():
+    generator = make_generator()
+
+    assert generator.segment_ruby('今日は') == [('今日', 'きょう'), ('は', '')]
+
+
+def test_iteration_mark_with_rendaku():
+    generator = make_generator()
+
+    assert generator.segment_ruby('時々') == [('時', 'とき'), ('々', 'どき')]
+
+
+def test_char_readings_batched_per_line():
+    generator = make_generator()
+
+    generator.segment_ruby('学校と今日')
+    # 整句一次 + 未快取的單字一次
+    assert len(generator._converter.calls) == 2
+
+    generator._converter.calls.clear()
+    generator.segment_ruby('今日の学校')
+    assert len(generator._converter.calls) == 1
@@ -0,0 +1,85 @@
+"""
+LRC 逐行標記化與多時間標記解析測試
+"""
+
+import io
+
+import pytest
+
+from core.lrc import LrcParser
+from core.lrc.tokenizer import TOKEN_LYRIC, TOKEN_META, tokenize, to_seconds
+
+
+@pytest.mark.parametrize('tag, seconds', [
+    ('[01:02]', 62.0),
+    ('[01:02.5]', 62.5),
+    ('[01:02.50]', 62.5),
+    ('[01:02.050]', 62.05),
+    ('[123:00.01]', 7380.01),
+])
+def test_time_tag_precision(tag, seconds):
+    token, = tokenize([tag + 'text'])
+
+    assert token.kind == TOKEN_LYRIC
+    assert token.times == pytest.approx((seconds,))
+    assert token.text == 'text'
+
+
+def test_multiple_time_tags_and_meta():
+    tokens = list(tokenize([
+        '﻿[ar:Artist]',
+        '',
+        'no tag',
+        '[00:10.00][00:30.00][01:00.5]chorus',
+        '[Offset:+250]',
+        '[00:x]broken',
+    ]))
+
+    assert [(token.kind, token.key, token.text) for token in tokens] == [
+        (TOKEN_META, 'ar', 'Artist'),
+        (TOKEN_LYRIC, '', 'chorus'),
+        (TOKEN_META, 'offset', '+250'),
+    ]
+    assert tokens[1].times == pytest.approx((10.0, 30.0, 60.5))
+
+
+def test_to_seconds():
+    assert to_seconds('01', '02') == 62.0
+    assert to_seconds('01', '02', '7') == pytest.approx(62.7)
+    assert to_seconds('01', '02', '007') == pytest.approx(62.007)
+
+
+def test_repeated_lines_expanded_in_time_order():
+    content = '\n'.join([
+        '[00:20.00][00:05.00]chorus',
+        '[00:10.00]verse',
+        '[00:30.00]<00:30.00>a<00:30.50>b<00:31.00>',
+    ])
+
+    timeline = LrcParser().parse_string(content)
+
+    assert [(line.start_time, line.text) for line in timeline.lines] == [
+        (5.0, 'chorus'),
+        (10.0, 'verse'),
+        (20.0, 'chorus'),
+        (30.0, 'ab'),
+    ]
+    # 展開後的行各自獨立
+    assert timeline.lines[0].words is not timeline.lines[2].words
+
+
+def test_repeated_enhanced_line():
+    timeline = LrcParser().parse_string('[00:01.00][00:09.00]<00:01.00>a<00:01.50>b<00:02.00>')
+
+    assert [line.start_time for line in timeline.lines] == [1.0, 9.0]
+    assert [(word.text, word.end_time) for word in timeline.lines[1].words] == [('a', 9.5), ('b', 10.0)]
+
+
+def test_stream_matches_string():
+    content = '[ti:Song]\n[00:01.00]one\n[00:02.25][00:04.00]two\n'
+
+    streamed = LrcParser().parse_stream(io.StringIO(content))
+    parsed = LrcParser().parse_string(content)
+
+    assert streamed.metadata['title'] == 'Song'
+    assert streamed.lines == parsed.lines
@@ -0,0 +1,46 @@
+"""
+扁平詞索引測試
+"""
+
+from core.lrc import FlatWordIndex, LrcLine, LrcTimeline, LrcWord
+
+
+def test_flat_index_round_trip():
+    timeline = LrcTimeline()
+    timeline.lines = [LrcLine([LrcWord('x', 0.0, 1.0)] * count) for count in (3, 0, 0, 1, 5, 0, 2, 7, 0, 1)]
+    index = FlatWordIndex(timeline)
+    refs = [
+        (line_idx, word_idx)
+        for line_idx, line in enumerate(timeline.lines)
+        for word_idx in range(len(line.words))
+    ]
+
+    assert len(index) == len(refs)
+    for flat, ref in enumerate(refs):
+        assert index.to_flat(*ref) == flat
+        assert index.to_ref(flat) == ref
+    assert index.to_ref(len(refs)) is None
+    assert index.to_ref(-1) is None
+    assert index.to_flat(0, 99) is None
+
+
+def test_flat_index_follows_changes():
+    timeline = LrcTimeline()
+    timeline.lines = [LrcLine([LrcWord('a', 0.0, 1.0)]), LrcLine([]), LrcLine([LrcWord('b', 2.0, 3.0)])]
+    index = FlatWordIndex(timeline)
+    assert index.to_ref(1) == (2, 0)
+
+    timeline.replace_line_words(1, [LrcWord('c', 1.0, 1.5), LrcWord('d', 1.5, 2.0)])
+    assert [index.to_ref(flat) for flat in range(len(index))] == [(0, 0), (1, 0), (1, 1), (2, 0)]
+
+    timeline.insert_line(0, LrcLine([LrcWord('e', -1.0, 0.0)]))
+    assert index.to_flat(3, 0) == 4
+    assert index.line_offset(2) == 2
+
+    timeline.remove_line(2)
+    assert len(index) == 3
+    assert index.to_ref(2) == (2, 0)
+
+    index.detach()
+    timeline.remove_line(0)
+    assert len(index) == 0
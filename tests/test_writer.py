@@ -0,0 +1,100 @@
+"""
+增強格式 LRC 寫入 / 解析來回測試
+"""
+
+import pytest
+
+from core.lrc import LrcLine, LrcParser, LrcTimeline, LrcWord, LrcWriter, RubyPair
+
+
+def make_timeline():
+    timeline = LrcTimeline()
+    timeline.metadata.update({'artist': '歌手', 'title': '曲名', 'by': 'bookara'})
+    timeline.offset = 0.25
+    timeline.lines = [
+        # 詞相連、含假名
+        LrcLine([
+            LrcWord('今日', 1.0, 1.8, RubyPair('今日', 'きょう')),
+            LrcWord('は', 1.8, 2.1),
+            LrcWord('晴', 2.1, 2.6, RubyPair('晴', 'は')),
+        ]),
+        # 詞間有間隔、有重疊，毫秒精度
+        LrcLine([
+            LrcWord('a', 10.005, 10.5),
+            LrcWord('b', 11.0, 11.75),
+            LrcWord('c', 11.5, 12.0),
+        ]),
+        # 超過一小時
+        LrcLine([LrcWord('end', 3725.12, 3726.0)]),
+    ]
+    return timeline
+
+
+def word_tuples(timeline):
+    return [
+        [(word.text, word.start_time, word.end_time, word.ruby_pair) for word in line.words]
+        for line in timeline.lines
+    ]
+
+
+def test_round_trip_keeps_words_times_and_ruby():
+    timeline = make_timeline()
+
+    content = LrcWriter().to_string(timeline)
+    parsed = LrcParser().parse_string(content)
+
+    assert len(parsed.lines) == len(timeline.lines)
+    for parsed_line, line in zip(word_tuples(parsed), word_tuples(timeline)):
+        assert len(parsed_line) == len(line)
+        for (text, start, end, ruby), (expected_text, expected_start, expected_end, expected_ruby) in zip(
+            parsed_line, line
+        ):
+            assert (text, ruby) == (expected_text, expected_ruby)
+            assert start == pytest.approx(expected_start)
+            assert end == pytest.approx(expected_end)
+    assert parsed.metadata['artist'] == '歌手'
+    assert parsed.metadata['by'] == 'bookara'
+    assert parsed.offset == pytest.approx(0.25)
+    # 再寫一次結果相同
+    assert LrcWriter().to_string(parsed) == content
+
+
+def test_enhanced_line_format():
+    content = LrcWriter().to_string(make_timeline())
+    lines = content.splitlines()
+
+    assert '[00:01.00]今日{きょう}<00:01.80>は<00:02.10>晴{は}<00:02.60>' in lines
+    assert '[00:10.005]a<00:10.50><00:11.00>b<00:11.75><00:11.50>c<00:12.00>' in lines
+    assert '[62:05.12]end<62:06.00>' in lines
+
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / 'song.lrc')
+    timeline = make_timeline()
+
+    LrcWriter().write_file(timeline, path)
+
+    with open(path, 'rb') as file_handle:
+        assert file_handle.read(3) == b'\xef\xbb\xbf'
+    assert word_tuples(LrcParser().parse_lrc_file(path))[0] == word_tuples(timeline)[0]
+
+
+def test_txt_round_trip():
+    timeline = make_timeline()
+    timeline.lines.append(LrcLine([
+        LrcWord('あ', 20.0, 20.5),
+        LrcWord('い', 20.5, 21.0),
+        LrcWord('漢', 21.0, 21.5, RubyPair('漢', 'かん')),
+        LrcWord('う', 21.5, 22.0),
+        LrcWord('え', 22.0, 22.5),
+    ]))
+
+    content = LrcWriter().to_txt_string(timeline)
+    parsed = LrcParser().parse_txt_string(content, auto_ruby=False)
+
+    assert content.splitlines()[0] == '今日{きょう}は{}晴{は}'
+    assert content.splitlines()[-1] == 'あ{}い{}漢{かん}うえ'
+    for line_idx in (0, 3):
+        assert [(word.text, word.ruby_pair) for word in parsed.lines[line_idx].words] == [
+            (word.text, word.ruby_pair) for word in timeline.lines[line_idx].words
+        ]